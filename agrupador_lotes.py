@@ -0,0 +1,123 @@
+"""
+Agrupador dinámico de lotes para el servicio de inferencia
+Junta los textos pendientes de varias peticiones hasta un tamaño máximo de
+lote o un tiempo máximo de espera, ejecuta una sola pasada del modelo y
+devuelve a cada petición sus resultados
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as TiempoAgotado
+
+from histograma import Histograma
+
+# Límites superiores de los histogramas (el último cubo es +inf)
+CUBOS_TAMANO_LOTE = (1, 2, 4, 8, 16, 32, 64, 128)
+CUBOS_PROFUNDIDAD_COLA = (0, 1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+
+
+class AgrupadorLotes:
+    """
+    Reúne textos de varias peticiones en lotes para una función por lotes
+
+    ``funcion`` recibe una lista de textos y devuelve un resultado por texto.
+    Un hilo propio toma el primer texto pendiente y sigue juntando hasta
+    ``tamano_maximo`` textos o hasta que pasan ``espera_maxima`` segundos;
+    entonces ejecuta ``funcion`` una vez y resuelve los resultados de cada texto.
+    Los textos de peticiones que ya vencieron su timeout se descartan sin
+    procesarlos.
+    """
+
+    def __init__(self, funcion, tamano_maximo=16, espera_maxima=0.01, nombre='agrupador'):
+        self.funcion = funcion
+        self.tamano_maximo = max(1, tamano_maximo)
+        self.espera_maxima = espera_maxima
+        self.cola = queue.Queue()
+        self.histograma_lotes = Histograma(CUBOS_TAMANO_LOTE)
+        self.histograma_cola = Histograma(CUBOS_PROFUNDIDAD_COLA)
+        self.descartados = 0
+        self._hilo = threading.Thread(target=self._ejecutar, name=nombre, daemon=True)
+        self._hilo.start()
+
+    def _vigente(self, entrada):
+        """
+        Marca el futuro como en curso; False si la petición ya lo canceló
+        """
+        if entrada[1].set_running_or_notify_cancel():
+            return True
+        self.descartados += 1
+        return False
+
+    def _siguiente_lote(self):
+        lote = []
+        while not lote:
+            entrada = self.cola.get()
+            if self._vigente(entrada):
+                lote.append(entrada)
+        limite = time.monotonic() + self.espera_maxima
+        while len(lote) < self.tamano_maximo:
+            restante = limite - time.monotonic()
+            if restante <= 0:
+                break
+            try:
+                entrada = self.cola.get(timeout=restante)
+            except queue.Empty:
+                break
+            if self._vigente(entrada):
+                lote.append(entrada)
+        return lote
+
+    def _ejecutar(self):
+        while True:
+            lote = self._siguiente_lote()
+            # Profundidad: textos del lote más los que siguen esperando
+            self.histograma_cola.observar(len(lote) + self.cola.qsize())
+            self.histograma_lotes.observar(len(lote))
+            try:
+                resultados = list(self.funcion([texto for texto, _ in lote]))
+                if len(resultados) != len(lote):
+                    raise ValueError(f"La función por lotes devolvió {len(resultados)} resultados "
+                                     f"para {len(lote)} textos")
+                for (_, futuro), resultado in zip(lote, resultados):
+                    futuro.set_result(resultado)
+            except Exception as e:
+                for _, futuro in lote:
+                    futuro.set_exception(e)
+
+    def procesar(self, textos, timeout=None):
+        """
+        Encola los textos y espera sus resultados (en el mismo orden)
+
+        Lanza ``concurrent.futures.TimeoutError`` si no terminan en ``timeout``
+        segundos; los textos que seguían en cola se cancelan para no procesarlos.
+        """
+        futuros = []
+        for texto in textos:
+            futuro = Future()
+            self.cola.put((texto, futuro))
+            futuros.append(futuro)
+
+        limite = None if timeout is None else time.monotonic() + timeout
+        try:
+            return [
+                futuro.result(timeout=None if limite is None else max(0.0, limite - time.monotonic()))
+                for futuro in futuros
+            ]
+        except TiempoAgotado:
+            for futuro in futuros:
+                futuro.cancel()
+            raise
+
+    def metricas(self):
+        """
+        Histogramas de tamaño de lote y profundidad de cola
+        """
+        return {
+            'tamano_maximo': self.tamano_maximo,
+            'espera_maxima_ms': self.espera_maxima * 1000,
+            'pendientes': self.cola.qsize(),
+            'descartados': self.descartados,
+            'tamano_lote': self.histograma_lotes.resumen(),
+            'profundidad_cola': self.histograma_cola.resumen()
+        }
@@ -0,0 +1,191 @@
+"""
+⚙️ Ejecutor de etapas del análisis personalizado
+Ejecuta un grafo de dependencias (DAG) de etapas sobre un pool de hilos y
+mide el tiempo de pared, el tiempo de CPU y el pico de memoria de cada etapa
+"""
+
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from contextlib import contextmanager
+
+# tracemalloc es global al proceso: solo una traza de memoria a la vez
+_tracemalloc_lock = threading.Lock()
+
+
+class AnalysisStage:
+    """Etapa del análisis: nombre, función y etapas de las que depende
+
+    La función recibe como argumentos posicionales los resultados de sus
+    dependencias, en el mismo orden en que se declaran en ``depends_on``.
+    """
+
+    def __init__(self, name, func, depends_on=()):
+        self.name = name
+        self.func = func
+        self.depends_on = tuple(depends_on)
+
+    def run(self, results):
+        """Ejecutar la etapa con los resultados de sus dependencias"""
+        return self.func(*[results[dep] for dep in self.depends_on])
+
+
+class StageTrace:
+    """Tiempo de pared, tiempo de CPU y pico de memoria de cada etapa
+
+    El tiempo de CPU es el del hilo que ejecuta la etapa (no incluye
+    procesos auxiliares). El pico de memoria solo se mide con
+    ``trace_memory=True`` y mientras la traza está activa (``with trace:``),
+    usando tracemalloc; si otra traza ya lo está usando, se omite.
+    ``on_stage(name, timing)`` se llama al terminar cada etapa.
+    """
+
+    def __init__(self, trace_memory=False, on_stage=None):
+        self.trace_memory = trace_memory
+        self.on_stage = on_stage
+        self.stages = {}
+        self._owns_tracemalloc = False
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        if self.trace_memory:
+            if _tracemalloc_lock.acquire(blocking=False):
+                self._owns_tracemalloc = not tracemalloc.is_tracing()
+                if self._owns_tracemalloc:
+                    tracemalloc.start()
+            else:
+                self.trace_memory = False
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.trace_memory:
+            if self._owns_tracemalloc:
+                tracemalloc.stop()
+            self.trace_memory = False
+            _tracemalloc_lock.release()
+        return False
+
+    @contextmanager
+    def measure(self, name):
+        """Medir el bloque como la etapa ``name``"""
+        trace_memory = self.trace_memory and tracemalloc.is_tracing()
+        if trace_memory:
+            tracemalloc.reset_peak()
+            start_memory = tracemalloc.get_traced_memory()[0]
+        start_wall = time.perf_counter()
+        start_cpu = time.thread_time()
+        try:
+            yield
+        finally:
+            timing = {
+                'wall_ms': round((time.perf_counter() - start_wall) * 1000, 3),
+                'cpu_ms': round((time.thread_time() - start_cpu) * 1000, 3),
+                'peak_memory_kb': None
+            }
+            if trace_memory:
+                peak = tracemalloc.get_traced_memory()[1]
+                timing['peak_memory_kb'] = round(max(0, peak - start_memory) / 1024, 1)
+            with self._lock:
+                self.stages[name] = timing
+            if self.on_stage is not None:
+                self.on_stage(name, timing)
+
+    def as_dict(self):
+        """Bloque ``timings`` de la respuesta"""
+        with self._lock:
+            stages = {name: dict(timing) for name, timing in self.stages.items()}
+        return {
+            'memory_traced': any(t['peak_memory_kb'] is not None for t in stages.values()),
+            'total_wall_ms': round(sum(t['wall_ms'] for t in stages.values()), 3),
+            'total_cpu_ms': round(sum(t['cpu_ms'] for t in stages.values()), 3),
+            'stages': stages
+        }
+
+
+def _run_stage(stage, results, trace):
+    if trace is None:
+        return stage.run(results)
+    with trace.measure(stage.name):
+        return stage.run(results)
+
+
+def validate_stage_graph(stages):
+    """Validar nombres únicos, dependencias conocidas y ausencia de ciclos"""
+    names = [stage.name for stage in stages]
+    if len(names) != len(set(names)):
+        raise ValueError(f"Etapas duplicadas en el análisis: {names}")
+
+    known = set(names)
+    for stage in stages:
+        missing = [dep for dep in stage.depends_on if dep not in known]
+        if missing:
+            raise ValueError(f"La etapa '{stage.name}' depende de etapas inexistentes: {missing}")
+
+    # Orden topológico (Kahn) para detectar ciclos
+    pending = {stage.name: set(stage.depends_on) for stage in stages}
+    order = []
+    while pending:
+        ready = [name for name, deps in pending.items() if not deps]
+        if not ready:
+            raise ValueError(f"Dependencias cíclicas entre etapas: {sorted(pending)}")
+        for name in ready:
+            order.append(name)
+            del pending[name]
+        for deps in pending.values():
+            deps.difference_update(ready)
+
+    return order
+
+
+def run_stage_graph(stages, max_workers=4, trace=None):
+    """Ejecutar las etapas respetando sus dependencias
+
+    Las etapas sin dependencias pendientes se lanzan en paralelo; cada etapa
+    arranca en cuanto terminan todas sus dependencias. Con ``max_workers`` <= 1
+    se ejecutan secuencialmente en orden topológico. Devuelve un diccionario
+    ``{nombre: resultado}``. Si una etapa lanza una excepción, se cancelan las
+    pendientes y la excepción se propaga.
+
+    Con ``trace`` (StageTrace) se mide cada etapa; si la traza mide memoria,
+    las etapas se ejecutan secuencialmente para que el pico de cada una no
+    incluya las asignaciones de las que corren en paralelo.
+    """
+    order = validate_stage_graph(stages)
+    by_name = {stage.name: stage for stage in stages}
+    results = {}
+
+    if trace is not None and trace.trace_memory:
+        max_workers = 1
+
+    if not max_workers or max_workers <= 1:
+        for name in order:
+            results[name] = _run_stage(by_name[name], results, trace)
+        return results
+
+    remaining = {stage.name: set(stage.depends_on) for stage in stages}
+    running = {}
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='analysis-stage') as executor:
+        def submit_ready():
+            ready = [name for name, deps in remaining.items() if not deps]
+            for name in ready:
+                del remaining[name]
+                running[executor.submit(_run_stage, by_name[name], dict(results), trace)] = name
+
+        submit_ready()
+        while running:
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    results[name] = future.result()
+                except Exception:
+                    for pending_future in running:
+                        pending_future.cancel()
+                    raise
+                for deps in remaining.values():
+                    deps.discard(name)
+            submit_ready()
+
+    return results
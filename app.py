@@ -4,16 +4,26 @@ Aplicación Web Flask para visualizar resultados del análisis de IA
 Reto IBM SenaSoft 2025
 """
 
-from flask import Flask, render_template, jsonify, request, redirect, url_for
+from flask import Flask, render_template, jsonify, request, redirect, url_for, g, Response
 import pandas as pd
 import json
 import os
+import hmac
+import threading
+import time
 import uuid
+from contextlib import contextmanager
 from datetime import datetime, timedelta
-import plotly.graph_objs as go
-import plotly.utils
 from werkzeug.utils import secure_filename
 import numpy as np
+from analysis_stages import AnalysisStage, StageTrace, run_stage_graph
+from text_sharding import count_pattern_matches
+from data_profiling import get_dataset_profile, profile_cache_stats
+from approximate_analysis import choose_strata_column, stratified_sample, estimate_total
+from keyword_lexicon import CATEGORY_KEYWORDS
+from app_logging import get_logger, LOG_SAMPLE_RATE
+from web_metrics import MetricsRegistry, LATENCY_BUCKETS, SIZE_BUCKETS, STAGE_BUCKETS, ROW_BUCKETS, MEMORY_BUCKETS
+from request_profiling import ProfileStore, RequestProfiler, summarize_profile, MAX_STORED_PROFILES
 
 app = Flask(__name__)
 
@@ -22,10 +32,161 @@ app.config['SECRET_KEY'] = 'senasoft2025_ibm_reto'
 app.config['DEBUG'] = os.environ.get('FLASK_DEBUG', 'False').lower() == 'true'
 app.config['UPLOAD_FOLDER'] = 'uploads'
 app.config['MAX_CONTENT_LENGTH'] = 50 * 1024 * 1024  # 50MB
+# Hilos para ejecutar en paralelo las etapas del análisis personalizado (1 = secuencial)
+app.config['ANALYSIS_MAX_WORKERS'] = int(os.environ.get('ANALYSIS_MAX_WORKERS', 4))
+# Conteo de palabras clave en varios procesos a partir de este número de filas
+app.config['TEXT_SHARD_MIN_ROWS'] = int(os.environ.get('TEXT_SHARD_MIN_ROWS', 100000))
+app.config['TEXT_SHARD_WORKERS'] = int(os.environ.get('TEXT_SHARD_WORKERS', os.cpu_count() or 1))
+# Vista previa rápida (opcional): muestra estratificada para datasets grandes
+app.config['FAST_PREVIEW_MIN_ROWS'] = int(os.environ.get('FAST_PREVIEW_MIN_ROWS', 200000))
+app.config['FAST_PREVIEW_SAMPLE_SIZE'] = int(os.environ.get('FAST_PREVIEW_SAMPLE_SIZE', 20000))
+# Máximo de registros que devuelven las rutas de casos prioritarios (?limit=)
+app.config['MAX_PRIORITY_CASES'] = int(os.environ.get('MAX_PRIORITY_CASES', 100))
+# Filas por lote al leer hojas de Excel en modo streaming
+app.config['EXCEL_BATCH_ROWS'] = int(os.environ.get('EXCEL_BATCH_ROWS', 5000))
+# Servicio local de inferencia (servidor_inferencia.py); sin URL se usan palabras clave
+app.config['INFERENCE_SERVICE_URL'] = os.environ.get('INFERENCE_SERVICE_URL', '')
+app.config['INFERENCE_TIMEOUT'] = float(os.environ.get('INFERENCE_TIMEOUT', 10))
+app.config['INFERENCE_BATCH_SIZE'] = int(os.environ.get('INFERENCE_BATCH_SIZE', 64))
+# Máximo de textos distintos por columna para usar el modelo (si hay más, palabras clave)
+app.config['INFERENCE_MAX_TEXTS'] = int(os.environ.get('INFERENCE_MAX_TEXTS', 5000))
+# Segundos de inferencia por análisis (todas las etapas juntas); al agotarse se usan
+# palabras clave. Debe quedar por debajo del timeout del worker (30 s en gunicorn)
+app.config['INFERENCE_ANALYSIS_BUDGET'] = float(os.environ.get('INFERENCE_ANALYSIS_BUDGET', 15))
+# Calentamiento al arrancar: /health/ready responde 503 hasta que termina
+app.config['WARMUP_ON_START'] = os.environ.get('WARMUP_ON_START', 'True').lower() == 'true'
+
+# Perfilado de peticiones: se activa por petición con la cabecera X-Profile-Token
+# (igual a PROFILING_TOKEN) o para todas con PROFILE_ALL_REQUESTS. /admin/profiles
+# exige siempre el token: sin PROFILING_TOKEN los perfiles no se pueden consultar
+app.config['PROFILING_TOKEN'] = os.environ.get('PROFILING_TOKEN', '')
+app.config['PROFILE_ALL_REQUESTS'] = os.environ.get('PROFILE_ALL_REQUESTS', 'False').lower() == 'true'
+app.config['PROFILE_STORE_SIZE'] = int(os.environ.get('PROFILE_STORE_SIZE', MAX_STORED_PROFILES))
+# Fracción de mensajes informativos que se escriben en las rutas frecuentes (errores siempre)
+app.config['LOG_SAMPLE_RATE'] = LOG_SAMPLE_RATE
 
 # Crear directorio de uploads si no existe
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
+request_log = get_logger('reportes.requests', sample_rate=app.config['LOG_SAMPLE_RATE'])
+# Las cargas son poco frecuentes: su registro no se muestrea
+upload_log = get_logger('reportes.uploads')
+
+# Métricas expuestas en /metrics
+metrics = MetricsRegistry()
+metrics.counter('http_requests_total', 'Peticiones por ruta, método y estado')
+metrics.histogram('http_request_duration_seconds', 'Latencia de las peticiones por ruta', LATENCY_BUCKETS)
+metrics.histogram('http_response_size_bytes', 'Tamaño de las respuestas por ruta', SIZE_BUCKETS)
+metrics.counter('cache_requests_total', 'Consultas a cachés por resultado (hit/miss)')
+metrics.gauge('cache_hit_ratio', 'Fracción de aciertos de cada caché')
+metrics.histogram('upload_stage_duration_seconds', 'Duración de las etapas de carga y análisis', STAGE_BUCKETS)
+metrics.histogram('upload_dataset_rows', 'Filas de los datasets cargados', ROW_BUCKETS)
+metrics.histogram('analysis_stage_wall_seconds', 'Tiempo de pared de cada etapa de lectura y análisis', STAGE_BUCKETS)
+metrics.histogram('analysis_stage_cpu_seconds', 'Tiempo de CPU de cada etapa de lectura y análisis', STAGE_BUCKETS)
+metrics.histogram('analysis_stage_peak_memory_bytes', 'Pico de memoria de cada etapa (solo con timings)', MEMORY_BUCKETS)
+metrics.gauge('dashboard_dataset_rows', 'Filas del dataset del dashboard')
+metrics.gauge('custom_analyses_stored', 'Análisis personalizados guardados en memoria')
+
+def record_cache(cache, hit):
+    """Registrar un acierto o fallo de caché y actualizar su fracción de aciertos"""
+    metrics.inc('cache_requests_total', {'cache': cache, 'result': 'hit' if hit else 'miss'})
+    hits = metrics.value('cache_requests_total', {'cache': cache, 'result': 'hit'})
+    misses = metrics.value('cache_requests_total', {'cache': cache, 'result': 'miss'})
+    metrics.set('cache_hit_ratio', round(hits / (hits + misses), 4), {'cache': cache})
+
+@contextmanager
+def observe_upload_stage(stage):
+    """Medir la duración de una etapa de carga o análisis"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.observe('upload_stage_duration_seconds', time.perf_counter() - started, {'stage': stage})
+
+def record_stage_timing(stage, timing):
+    """Agregar la medición de una etapa de análisis a /metrics"""
+    labels = {'stage': stage}
+    metrics.observe('analysis_stage_wall_seconds', timing['wall_ms'] / 1000, labels)
+    metrics.observe('analysis_stage_cpu_seconds', timing['cpu_ms'] / 1000, labels)
+    if timing['peak_memory_kb'] is not None:
+        metrics.observe('analysis_stage_peak_memory_bytes', timing['peak_memory_kb'] * 1024, labels)
+
+def new_stage_trace(trace_memory=False):
+    """Traza de etapas cuyas mediciones se agregan a /metrics"""
+    return StageTrace(trace_memory=trace_memory, on_stage=record_stage_timing)
+
+@app.before_request
+def start_request_timer():
+    # Las peticiones internas del calentamiento no cuentan como tráfico
+    if request.environ.get(WARMUP_ENVIRON_KEY):
+        return
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    started = getattr(g, 'request_started', None)
+    if started is not None:
+        # Plantilla de la ruta (no la URL) para no crear una serie por ID
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        metrics.inc('http_requests_total', {'route': route, 'method': request.method,
+                                            'status': str(response.status_code)})
+        metrics.observe('http_request_duration_seconds', time.perf_counter() - started,
+                        {'route': route, 'method': request.method})
+        size = response.calculate_content_length()
+        if size is not None:
+            metrics.observe('http_response_size_bytes', size, {'route': route})
+    return response
+
+# Perfiles de peticiones guardados (ver /admin/profiles)
+profile_store = ProfileStore(app.config['PROFILE_STORE_SIZE'])
+
+def has_profiling_token():
+    """True si la petición trae el token de perfilado configurado"""
+    token = app.config['PROFILING_TOKEN']
+    return bool(token) and hmac.compare_digest(request.headers.get('X-Profile-Token', ''), token)
+
+@app.before_request
+def start_request_profiling():
+    if request.path.startswith('/admin/profiles') or request.environ.get(WARMUP_ENVIRON_KEY):
+        return
+    if not (app.config['PROFILE_ALL_REQUESTS'] or has_profiling_token()):
+        return
+    profiler = RequestProfiler()
+    if profiler.start():
+        g.request_profiler = profiler
+        # Generado en el servidor: el cliente no elige la clave del almacén
+        g.profile_id = uuid.uuid4().hex
+
+@app.after_request
+def store_request_profile(response):
+    profiler = g.pop('request_profiler', None)
+    if profiler is None:
+        return response
+    duration_ms, profile = profiler.stop()
+    try:
+        summary = summarize_profile(profile)
+        summary.update({
+            'request_id': g.profile_id,
+            'method': request.method,
+            'path': request.full_path.rstrip('?'),
+            'route': request.url_rule.rule if request.url_rule else 'unmatched',
+            'status': response.status_code,
+            'duration_ms': duration_ms,
+            'created_at': datetime.now().isoformat()
+        })
+        profile_store.add(g.profile_id, summary)
+        response.headers['X-Profile-Id'] = g.profile_id
+    except Exception as e:
+        request_log.error("❌ Error guardando perfil de la petición: %s", e)
+    return response
+
+@app.teardown_request
+def stop_request_profiling(error=None):
+    # Si la petición terminó con una excepción no se pasó por after_request
+    profiler = g.pop('request_profiler', None)
+    if profiler is not None:
+        profiler.stop()
+
 # Almacenamiento temporal de análisis personalizados
 custom_analyses = {}
 
@@ -34,10 +195,43 @@ class DataAnalyzer:
     
     def __init__(self):
         self.df = None
+        # Versión del dataset cargado: identifica su perfil de calidad en caché
+        self.data_version = 0
+        # Resultados sin filtros de la versión actual (métricas, distribuciones, reportes)
+        self._aggregates = {}
+        self._aggregates_lock = threading.Lock()
         self.load_data()
     
+    @property
+    def profile_key(self):
+        """Clave del perfil de calidad para la versión actual de los datos"""
+        return ('dashboard', self.data_version)
+    
+    def cached(self, name, compute):
+        """Resultado de ``compute()`` guardado para la versión actual de los datos"""
+        key = (name, self.data_version)
+        with self._aggregates_lock:
+            if key in self._aggregates:
+                record_cache('dashboard_aggregates', True)
+                return self._aggregates[key]
+        record_cache('dashboard_aggregates', False)
+        value = compute()
+        with self._aggregates_lock:
+            self._aggregates[key] = value
+        return value
+    
+    def set_data(self, df):
+        """Reemplazar el dataset del dashboard (nueva versión: se descartan los agregados)"""
+        self.data_version += 1
+        with self._aggregates_lock:
+            self._aggregates.clear()
+        self.df = df
+    
     def load_data(self):
         """Cargar datos procesados por el modelo de IA"""
+        self.data_version += 1
+        with self._aggregates_lock:
+            self._aggregates.clear()
         try:
             # Intentar cargar datos procesados
             if os.path.exists('dataset_procesado_huggingface.csv'):
@@ -166,8 +360,8 @@ class DataAnalyzer:
                 print("⚠️ Columna Prioridad no encontrada, calculando...")
                 self.df['Prioridad'] = self.calculate_priority()
             
-            # Ordenar por prioridad descendente
-            sorted_df = self.df.sort_values('Prioridad', ascending=False)
+            # Ordenar por prioridad descendente (una vez por versión; cada petición toma su corte)
+            sorted_df = self.cached('priority_sorted', lambda: self.df.sort_values('Prioridad', ascending=False))
             result = sorted_df.head(limit).to_dict('records')
             
             # Limpiar datos para JSON
@@ -252,15 +446,15 @@ class DataAnalyzer:
     
     def get_temporal_trends(self):
         """Obtener tendencias temporales"""
-        print("🔄 Obteniendo tendencias temporales...")
+        request_log.debug("🔄 Obteniendo tendencias temporales...")
         if self.df is None:
-            print("⚠️ DataFrame es None")
+            request_log.warning("⚠️ DataFrame es None")
             return {}
         
         try:
             # Verificar si existe la columna de fecha
             if 'Fecha del reporte' in self.df.columns:
-                print(f"✅ Columna 'Fecha del reporte' encontrada")
+                request_log.debug("✅ Columna 'Fecha del reporte' encontrada")
                 # Agrupar por mes
                 df_copy = self.df.copy()
                 df_copy['Mes'] = pd.to_datetime(df_copy['Fecha del reporte']).dt.to_period('M')
@@ -270,25 +464,25 @@ class DataAnalyzer:
                 months = [str(month) for month in monthly_data.index]
                 counts = monthly_data.values.tolist()
                 
-                print(f"📊 Datos temporales generados: {len(months)} meses, {sum(counts)} total reportes")
+                request_log.debug("📊 Datos temporales generados: %s meses, %s total reportes", len(months), sum(counts))
                 
                 return {
                     'months': months,
                     'counts': counts
                 }
             else:
-                print("⚠️ Columna 'Fecha del reporte' no encontrada, usando datos de ejemplo")
+                request_log.warning("⚠️ Columna 'Fecha del reporte' no encontrada, usando datos de ejemplo")
                 # Si no hay columna de fecha, crear datos de ejemplo
                 import numpy as np
                 months = ['2024-01', '2024-02', '2024-03', '2024-04', '2024-05', '2024-06']
                 counts = np.random.randint(50, 200, len(months))
-                print(f"📊 Datos de ejemplo generados: {len(months)} meses")
+                request_log.debug("📊 Datos de ejemplo generados: %s meses", len(months))
                 return {
                     'months': months,
                     'counts': counts.tolist()
                 }
         except Exception as e:
-            print(f"Error en tendencias temporales: {e}")
+            request_log.error("Error en tendencias temporales: %s", e)
             return {'months': [], 'counts': []}
 
 # Instancia global del analizador
@@ -324,15 +518,15 @@ def favicon():
 def api_metrics():
     """API para obtener métricas del dashboard"""
     try:
-        print("📊 Obteniendo métricas del dashboard...")
-        metrics = analyzer.get_dashboard_metrics()
-        print(f"✅ Métricas obtenidas: {metrics}")
+        request_log.debug("📊 Obteniendo métricas del dashboard...")
+        dashboard_metrics = analyzer.cached('metrics', analyzer.get_dashboard_metrics)
+        request_log.debug("✅ Métricas obtenidas: %s", dashboard_metrics)
         return jsonify({
             'success': True,
-            'data': metrics
+            'data': dashboard_metrics
         })
     except Exception as e:
-        print(f"❌ Error en API metrics: {e}")
+        request_log.error("❌ Error en API metrics: %s", e)
         return jsonify({
             'success': False,
             'error': str(e)
@@ -342,15 +536,15 @@ def api_metrics():
 def api_category_distribution():
     """API para distribución por categorías"""
     try:
-        print("📊 Obteniendo distribución por categorías...")
-        data = analyzer.get_category_distribution()
-        print(f"✅ Distribución categorías: {data}")
+        request_log.debug("📊 Obteniendo distribución por categorías...")
+        data = analyzer.cached('category_distribution', analyzer.get_category_distribution)
+        request_log.debug("✅ Distribución categorías: %s", data)
         return jsonify({
             'success': True,
             'data': data
         })
     except Exception as e:
-        print(f"❌ Error en API category-distribution: {e}")
+        request_log.error("❌ Error en API category-distribution: %s", e)
         return jsonify({
             'success': False,
             'error': str(e)
@@ -360,7 +554,7 @@ def api_category_distribution():
 def api_urgency_distribution():
     """API para distribución por urgencia"""
     try:
-        data = analyzer.get_urgency_distribution()
+        data = analyzer.cached('urgency_distribution', analyzer.get_urgency_distribution)
         return jsonify({
             'success': True,
             'data': data
@@ -371,20 +565,25 @@ def api_urgency_distribution():
             'error': str(e)
         }), 500
 
+def priority_cases_limit():
+    """Parámetro ``limit`` de los casos prioritarios, acotado a 1..MAX_PRIORITY_CASES"""
+    limit = request.args.get('limit', 20, type=int)
+    return min(max(limit, 1), app.config['MAX_PRIORITY_CASES'])
+
 @app.route('/api/priority-cases')
 def api_priority_cases():
     """API para casos prioritarios"""
     try:
-        limit = request.args.get('limit', 20, type=int)
-        print(f"📊 Obteniendo {limit} casos prioritarios...")
+        limit = priority_cases_limit()
+        request_log.debug("📊 Obteniendo %s casos prioritarios...", limit)
         data = analyzer.get_priority_cases(limit)
-        print(f"✅ Casos prioritarios obtenidos: {len(data)} registros")
+        request_log.info("✅ Casos prioritarios obtenidos: %s registros", len(data))
         return jsonify({
             'success': True,
             'data': data
         })
     except Exception as e:
-        print(f"❌ Error en API priority-cases: {e}")
+        request_log.error("❌ Error en API priority-cases: %s", e)
         return jsonify({
             'success': False,
             'error': str(e)
@@ -394,7 +593,7 @@ def api_priority_cases():
 def api_temporal_trends():
     """API para tendencias temporales"""
     try:
-        data = analyzer.get_temporal_trends()
+        data = analyzer.cached('temporal_trends', analyzer.get_temporal_trends)
         return jsonify({
             'success': True,
             'data': data
@@ -415,7 +614,7 @@ def api_filtered_data():
         fecha_inicio = request.args.get('fecha_inicio', '')
         fecha_fin = request.args.get('fecha_fin', '')
         
-        print(f"📊 Aplicando filtros: categoria={categoria}, urgencia={urgencia}, fecha_inicio={fecha_inicio}, fecha_fin={fecha_fin}")
+        request_log.debug("📊 Aplicando filtros: categoria=%s, urgencia=%s, fecha_inicio=%s, fecha_fin=%s", categoria, urgencia, fecha_inicio, fecha_fin)
         
         # Validar fechas
         if not validate_date_range(fecha_inicio, fecha_fin):
@@ -429,24 +628,24 @@ def api_filtered_data():
         
         if categoria:
             filtered_df = filtered_df[filtered_df['Categoría del problema'] == categoria]
-            print(f"✅ Filtro por categoría aplicado: {len(filtered_df)} registros")
+            request_log.debug("✅ Filtro por categoría aplicado: %s registros", len(filtered_df))
         
         if urgencia:
             filtered_df = filtered_df[filtered_df['Nivel de urgencia'] == urgencia]
-            print(f"✅ Filtro por urgencia aplicado: {len(filtered_df)} registros")
+            request_log.debug("✅ Filtro por urgencia aplicado: %s registros", len(filtered_df))
         
         if fecha_inicio:
             filtered_df = filtered_df[pd.to_datetime(filtered_df['Fecha del reporte']) >= fecha_inicio]
-            print(f"✅ Filtro por fecha inicio aplicado: {len(filtered_df)} registros")
+            request_log.debug("✅ Filtro por fecha inicio aplicado: %s registros", len(filtered_df))
         
         if fecha_fin:
             filtered_df = filtered_df[pd.to_datetime(filtered_df['Fecha del reporte']) <= fecha_fin]
-            print(f"✅ Filtro por fecha fin aplicado: {len(filtered_df)} registros")
+            request_log.debug("✅ Filtro por fecha fin aplicado: %s registros", len(filtered_df))
         
         # Limpiar datos para JSON
         cleaned_data = analyzer.clean_data_for_json(filtered_df.to_dict('records'))
         
-        print(f"✅ Datos filtrados devueltos: {len(cleaned_data)} registros")
+        request_log.info("✅ Datos filtrados devueltos: %s registros", len(cleaned_data))
         
         return jsonify({
             'success': True,
@@ -454,7 +653,7 @@ def api_filtered_data():
             'total_records': len(cleaned_data)
         })
     except Exception as e:
-        print(f"❌ Error en api_filtered_data: {e}")
+        request_log.error("❌ Error en api_filtered_data: %s", e)
         return jsonify({
             'success': False,
             'error': str(e)
@@ -496,7 +695,7 @@ def api_filtered_metrics():
         fecha_inicio = request.args.get('fecha_inicio', '')
         fecha_fin = request.args.get('fecha_fin', '')
         
-        print(f"📊 Obteniendo métricas filtradas: categoria={categoria}, urgencia={urgencia}")
+        request_log.debug("📊 Obteniendo métricas filtradas: categoria=%s, urgencia=%s", categoria, urgencia)
         
         # Validar fechas
         if not validate_date_range(fecha_inicio, fecha_fin):
@@ -526,7 +725,7 @@ def api_filtered_metrics():
         zona_rural = len(filtered_df[filtered_df['Zona rural'] == 1])
         sin_internet = len(filtered_df[filtered_df['Acceso a internet'] == 0])
         
-        metrics = {
+        filtered_metrics = {
             'total_casos': total_casos,
             'casos_urgentes': casos_urgentes,
             'porcentaje_urgentes': round((casos_urgentes / total_casos) * 100, 1) if total_casos > 0 else 0,
@@ -536,14 +735,14 @@ def api_filtered_metrics():
             'porcentaje_sin_internet': round((sin_internet / total_casos) * 100, 1) if total_casos > 0 else 0
         }
         
-        print(f"✅ Métricas filtradas calculadas: {metrics}")
+        request_log.debug("✅ Métricas filtradas calculadas: %s", filtered_metrics)
         
         return jsonify({
             'success': True,
-            'data': metrics
+            'data': filtered_metrics
         })
     except Exception as e:
-        print(f"❌ Error en api_filtered_metrics: {e}")
+        request_log.error("❌ Error en api_filtered_metrics: %s", e)
         return jsonify({
             'success': False,
             'error': str(e)
@@ -558,9 +757,9 @@ def api_filtered_priority_cases():
         urgencia = request.args.get('urgencia', '')
         fecha_inicio = request.args.get('fecha_inicio', '')
         fecha_fin = request.args.get('fecha_fin', '')
-        limit = request.args.get('limit', 20, type=int)
+        limit = priority_cases_limit()
         
-        print(f"📊 Obteniendo casos prioritarios filtrados: categoria={categoria}, urgencia={urgencia}")
+        request_log.debug("📊 Obteniendo casos prioritarios filtrados: categoria=%s, urgencia=%s", categoria, urgencia)
         
         # Validar fechas
         if not validate_date_range(fecha_inicio, fecha_fin):
@@ -586,7 +785,7 @@ def api_filtered_priority_cases():
         
         # Verificar si existe la columna Prioridad, si no, calcularla
         if 'Prioridad' not in filtered_df.columns:
-            print("⚠️ Columna Prioridad no encontrada, calculando...")
+            request_log.warning("⚠️ Columna Prioridad no encontrada, calculando...")
             filtered_df['Prioridad'] = analyzer.calculate_priority()
         
         # Ordenar por prioridad descendente
@@ -596,14 +795,14 @@ def api_filtered_priority_cases():
         # Limpiar datos para JSON
         cleaned_result = analyzer.clean_data_for_json(result)
         
-        print(f"✅ Casos prioritarios filtrados devueltos: {len(cleaned_result)} registros")
+        request_log.info("✅ Casos prioritarios filtrados devueltos: %s registros", len(cleaned_result))
         
         return jsonify({
             'success': True,
             'data': cleaned_result
         })
     except Exception as e:
-        print(f"❌ Error en api_filtered_priority_cases: {e}")
+        request_log.error("❌ Error en api_filtered_priority_cases: %s", e)
         return jsonify({
             'success': False,
             'error': str(e)
@@ -619,7 +818,7 @@ def api_filtered_category_distribution():
         fecha_inicio = request.args.get('fecha_inicio', '')
         fecha_fin = request.args.get('fecha_fin', '')
         
-        print(f"📊 Obteniendo distribución de categorías filtrada...")
+        request_log.debug("📊 Obteniendo distribución de categorías filtrada...")
         
         # Validar fechas
         if not validate_date_range(fecha_inicio, fecha_fin):
@@ -651,14 +850,14 @@ def api_filtered_category_distribution():
             'values': distribution.values.tolist()
         }
         
-        print(f"✅ Distribución de categorías filtrada: {data}")
+        request_log.debug("✅ Distribución de categorías filtrada: %s", data)
         
         return jsonify({
             'success': True,
             'data': data
         })
     except Exception as e:
-        print(f"❌ Error en api_filtered_category_distribution: {e}")
+        request_log.error("❌ Error en api_filtered_category_distribution: %s", e)
         return jsonify({
             'success': False,
             'error': str(e)
@@ -674,7 +873,7 @@ def api_filtered_urgency_distribution():
         fecha_inicio = request.args.get('fecha_inicio', '')
         fecha_fin = request.args.get('fecha_fin', '')
         
-        print(f"📊 Obteniendo distribución de urgencia filtrada...")
+        request_log.debug("📊 Obteniendo distribución de urgencia filtrada...")
         
         # Validar fechas
         if not validate_date_range(fecha_inicio, fecha_fin):
@@ -706,14 +905,14 @@ def api_filtered_urgency_distribution():
             'values': distribution.values.tolist()
         }
         
-        print(f"✅ Distribución de urgencia filtrada: {data}")
+        request_log.debug("✅ Distribución de urgencia filtrada: %s", data)
         
         return jsonify({
             'success': True,
             'data': data
         })
     except Exception as e:
-        print(f"❌ Error en api_filtered_urgency_distribution: {e}")
+        request_log.error("❌ Error en api_filtered_urgency_distribution: %s", e)
         return jsonify({
             'success': False,
             'error': str(e)
@@ -729,7 +928,7 @@ def api_filtered_temporal_trends():
         fecha_inicio = request.args.get('fecha_inicio', '')
         fecha_fin = request.args.get('fecha_fin', '')
         
-        print(f"📊 Obteniendo tendencias temporales filtradas...")
+        request_log.debug("📊 Obteniendo tendencias temporales filtradas...")
         
         # Validar fechas
         if not validate_date_range(fecha_inicio, fecha_fin):
@@ -777,17 +976,17 @@ def api_filtered_temporal_trends():
                     'counts': counts.tolist()
                 }
         except Exception as e:
-            print(f"Error en tendencias temporales filtradas: {e}")
+            request_log.error("Error en tendencias temporales filtradas: %s", e)
             data = {'months': [], 'counts': []}
         
-        print(f"✅ Tendencias temporales filtradas: {data}")
+        request_log.debug("✅ Tendencias temporales filtradas: %s", data)
         
         return jsonify({
             'success': True,
             'data': data
         })
     except Exception as e:
-        print(f"❌ Error en api_filtered_temporal_trends: {e}")
+        request_log.error("❌ Error en api_filtered_temporal_trends: %s", e)
         return jsonify({
             'success': False,
             'error': str(e)
@@ -797,21 +996,21 @@ def api_filtered_temporal_trends():
 def api_upload_dataset():
     """API para cargar y analizar dataset personalizado"""
     try:
-        print(f"🔄 Iniciando carga de archivo...")
+        upload_log.info("🔄 Iniciando carga de archivo...")
         
         # Verificar que hay archivos en la request
         if 'file' not in request.files:
-            print("❌ No se encontró archivo en la request")
+            upload_log.error("❌ No se encontró archivo en la request")
             return jsonify({
                 'success': False,
                 'error': 'No se encontró archivo'
             }), 400
         
         file = request.files['file']
-        print(f"📁 Archivo recibido: {file.filename}")
+        upload_log.info("📁 Archivo recibido: %s", file.filename)
         
         if file.filename == '':
-            print("❌ Nombre de archivo vacío")
+            upload_log.error("❌ Nombre de archivo vacío")
             return jsonify({
                 'success': False,
                 'error': 'No se seleccionó archivo'
@@ -821,7 +1020,7 @@ def api_upload_dataset():
         allowed_extensions = {'.csv', '.xlsx', '.xls'}
         file_ext = os.path.splitext(file.filename)[1].lower()
         if file_ext not in allowed_extensions:
-            print(f"❌ Extensión no permitida: {file_ext}")
+            upload_log.error("❌ Extensión no permitida: %s", file_ext)
             return jsonify({
                 'success': False,
                 'error': f'Tipo de archivo no soportado. Use: {", ".join(allowed_extensions)}'
@@ -829,23 +1028,24 @@ def api_upload_dataset():
         
         # Generar ID único para el análisis
         analysis_id = str(uuid.uuid4())
-        print(f"🆔 ID de análisis generado: {analysis_id}")
+        upload_log.info("🆔 ID de análisis generado: %s", analysis_id)
         
         # Crear directorio de uploads si no existe
         upload_dir = app.config['UPLOAD_FOLDER']
         os.makedirs(upload_dir, exist_ok=True)
-        print(f"📂 Directorio de uploads: {upload_dir}")
+        upload_log.info("📂 Directorio de uploads: %s", upload_dir)
         
         # Guardar archivo
         filename = secure_filename(file.filename)
         file_path = os.path.join(upload_dir, f"{analysis_id}_{filename}")
-        print(f"💾 Guardando archivo en: {file_path}")
+        upload_log.info("💾 Guardando archivo en: %s", file_path)
         
         try:
-            file.save(file_path)
-            print(f"✅ Archivo guardado exitosamente")
+            with observe_upload_stage('save'):
+                file.save(file_path)
+            upload_log.info("✅ Archivo guardado exitosamente")
         except Exception as save_error:
-            print(f"❌ Error guardando archivo: {save_error}")
+            upload_log.error("❌ Error guardando archivo: %s", save_error)
             return jsonify({
                 'success': False,
                 'error': f'Error guardando archivo: {str(save_error)}'
@@ -853,54 +1053,72 @@ def api_upload_dataset():
         
         # Verificar que el archivo se guardó
         if not os.path.exists(file_path):
-            print(f"❌ Archivo no encontrado después de guardar: {file_path}")
+            upload_log.error("❌ Archivo no encontrado después de guardar: %s", file_path)
             return jsonify({
                 'success': False,
                 'error': 'Error guardando archivo'
             }), 500
         
-        # Procesar archivo
-        print(f"🔄 Procesando archivo...")
-        df = process_uploaded_file(file_path)
-        
-        if df is None:
-            print(f"❌ Error procesando archivo")
-            return jsonify({
-                'success': False,
-                'error': 'Error procesando archivo. Verifique el formato y que el archivo no esté corrupto.'
-            }), 400
-        
-        print(f"✅ Archivo procesado: {len(df)} registros, {len(df.columns)} columnas")
-        
-        # Realizar análisis personalizado
-        print(f"🤖 Iniciando análisis de IA...")
-        analysis_result = perform_custom_analysis(df, analysis_id)
+        # Desglose opcional por etapa (tiempo de pared, CPU y pico de memoria)
+        timings_flag = request.form.get('timings') or request.args.get('timings') or ''
+        include_timings = timings_flag.lower() in ('1', 'true', 'on', 'yes')
         
-        if analysis_result is None:
-            print(f"❌ Error en análisis de IA")
-            return jsonify({
-                'success': False,
-                'error': 'Error en análisis de IA'
-            }), 500
+        with new_stage_trace(trace_memory=include_timings) as trace:
+            # Procesar archivo (hoja opcional para Excel)
+            sheet_name = request.form.get('sheet_name') or None
+            upload_log.info("🔄 Procesando archivo...")
+            with observe_upload_stage('parse'):
+                df = process_uploaded_file(file_path, sheet_name=sheet_name, trace=trace)
+            
+            if df is None:
+                upload_log.error("❌ Error procesando archivo")
+                return jsonify({
+                    'success': False,
+                    'error': 'Error procesando archivo. Verifique el formato y que el archivo no esté corrupto.'
+                }), 400
+            
+            upload_log.info("✅ Archivo procesado: %s registros, %s columnas", len(df), len(df.columns))
+            metrics.observe('upload_dataset_rows', len(df))
+            
+            # Realizar análisis personalizado (vista previa aproximada si se solicita)
+            fast_preview = request.form.get('fast_preview', '').lower() in ('1', 'true', 'on', 'yes')
+            upload_log.info("🤖 Iniciando análisis de IA...")
+            with observe_upload_stage('analysis'):
+                analysis_result = perform_custom_analysis(df, analysis_id, fast_preview=fast_preview, trace=trace)
+            
+            if analysis_result is None:
+                upload_log.error("❌ Error en análisis de IA")
+                return jsonify({
+                    'success': False,
+                    'error': 'Error en análisis de IA'
+                }), 500
         
         # Guardar análisis en memoria
         custom_analyses[analysis_id] = {
             'data': df,
+            'priority_scores': analysis_result.pop('priority_scores', None),
             'analysis': analysis_result,
             'file_path': file_path,
             'created_at': datetime.now().isoformat()
         }
         
-        print(f"✅ Análisis personalizado completado: {analysis_id}")
+        # La vista previa se refina con el análisis exacto en segundo plano
+        if analysis_result.get('approximate'):
+            refine_analysis_in_background(df, analysis_id)
         
-        return jsonify({
+        upload_log.info("✅ Análisis personalizado completado: %s", analysis_id)
+        
+        response = {
             'success': True,
             'data': analysis_result,
             'analysis_id': analysis_id
-        })
+        }
+        if include_timings:
+            response['timings'] = trace.as_dict()
+        return jsonify(response)
         
     except Exception as e:
-        print(f"❌ Error general en upload-dataset: {e}")
+        upload_log.error("❌ Error general en upload-dataset: %s", e)
         import traceback
         traceback.print_exc()
         return jsonify({
@@ -955,11 +1173,11 @@ def api_custom_metrics(analysis_id):
         analysis = analysis_data['analysis']
         
         # Calcular métricas personalizadas
-        metrics = calculate_custom_metrics(df, analysis)
+        custom_metrics = calculate_custom_metrics(df, analysis)
         
         return jsonify({
             'success': True,
-            'data': metrics
+            'data': custom_metrics
         })
         
     except Exception as e:
@@ -969,95 +1187,123 @@ def api_custom_metrics(analysis_id):
             'error': str(e)
         }), 500
 
+@app.route('/api/analysis-status/<analysis_id>')
+def api_analysis_status(analysis_id):
+    """API para consultar si un análisis es una vista previa o ya es exacto"""
+    if analysis_id not in custom_analyses:
+        return jsonify({
+            'success': False,
+            'error': 'Análisis no encontrado'
+        }), 404
+    
+    analysis = custom_analyses[analysis_id]['analysis']
+    return jsonify({
+        'success': True,
+        'data': {
+            'analysis_id': analysis_id,
+            'status': analysis.get('analysis_status', 'complete'),
+            'approximate': bool(analysis.get('approximate', False)),
+            'sample_size': analysis.get('sample_size')
+        }
+    })
+
 @app.route('/api/dashboard-problems')
 def api_dashboard_problems():
     """API para detectar problemas en el dashboard y sugerir soluciones"""
     try:
-        print("🔍 Analizando problemas del dashboard...")
-        
-        # Detectar problemas en los datos
-        problems = detect_dashboard_problems()
+        request_log.debug("🔍 Analizando problemas del dashboard...")
         
-        # Generar soluciones para cada problema
-        solutions = generate_solutions_for_problems(problems)
+        result = analyzer.cached('dashboard_problems', build_dashboard_problems_report)
         
-            # Crear plan de acción
-            action_plan = create_action_plan(problems, solutions)
-            
-            # Calcular presupuesto total
-            budget_summary = calculate_total_budget(action_plan)
-            
-            result = {
-                'problems': problems,
-                'solutions': solutions,
-                'action_plan': action_plan,
-                'budget_summary': budget_summary,
-                'total_problems': len(problems),
-                'critical_problems': len([p for p in problems if p.get('severity') == 'critical']),
-                'analysis_timestamp': datetime.now().isoformat()
-            }
-        
-        print(f"✅ Análisis completado: {len(problems)} problemas detectados")
+        request_log.info("✅ Análisis completado: %s problemas detectados", result['total_problems'])
         
         return jsonify({
             'success': True,
-            'data': result
+            # El reporte se guarda por versión de datos; la marca de tiempo es de esta respuesta
+            'data': {**result, 'analysis_timestamp': datetime.now().isoformat()}
         })
         
     except Exception as e:
-        print(f"❌ Error en dashboard-problems: {e}")
+        request_log.error("❌ Error en dashboard-problems: %s", e)
         return jsonify({
             'success': False,
             'error': str(e)
         }), 500
 
-def process_uploaded_file(file_path):
+def build_dashboard_problems_report():
+    """Problemas detectados, soluciones, plan de acción y presupuesto del dashboard"""
+    # Detectar problemas en los datos
+    problems = detect_dashboard_problems()
+    
+    # Generar soluciones para cada problema
+    solutions = generate_solutions_for_problems(problems)
+    
+    # Crear plan de acción
+    action_plan = create_action_plan(problems, solutions)
+    
+    # Calcular presupuesto total
+    budget_summary = calculate_total_budget(action_plan)
+    
+    return {
+        'problems': problems,
+        'solutions': solutions,
+        'action_plan': action_plan,
+        'budget_summary': budget_summary,
+        'total_problems': len(problems),
+        'critical_problems': len([p for p in problems if p.get('severity') == 'critical'])
+    }
+
+def process_uploaded_file(file_path, sheet_name=None, trace=None):
     """Procesar archivo subido con mejor manejo de errores"""
+    trace = trace or new_stage_trace()
     try:
-        print(f"🔄 Procesando archivo: {file_path}")
+        upload_log.info("🔄 Procesando archivo: %s", file_path)
         
         # Verificar que el archivo existe
         if not os.path.exists(file_path):
-            print(f"❌ Archivo no encontrado: {file_path}")
+            upload_log.error("❌ Archivo no encontrado: %s", file_path)
             return None
         
         # Verificar tamaño del archivo
         file_size = os.path.getsize(file_path)
-        print(f"📏 Tamaño del archivo: {file_size} bytes")
+        upload_log.info("📏 Tamaño del archivo: %s bytes", file_size)
         
         if file_size == 0:
-            print(f"❌ Archivo vacío: {file_path}")
+            upload_log.error("❌ Archivo vacío: %s", file_path)
             return None
         
         # Detectar tipo de archivo y procesar
-        if file_path.endswith('.csv'):
-            print(f"📄 Procesando archivo CSV...")
-            df = process_csv_file(file_path)
-        elif file_path.endswith(('.xlsx', '.xls')):
-            print(f"📊 Procesando archivo Excel...")
-            df = process_excel_file(file_path)
-        else:
-            print(f"❌ Tipo de archivo no soportado: {file_path}")
+        if not file_path.endswith(('.csv', '.xlsx', '.xls')):
+            upload_log.error("❌ Tipo de archivo no soportado: %s", file_path)
             return None
         
+        with trace.measure('read'):
+            if file_path.endswith('.csv'):
+                upload_log.info("📄 Procesando archivo CSV...")
+                df = process_csv_file(file_path)
+            else:
+                upload_log.info("📊 Procesando archivo Excel...")
+                df = process_excel_file(file_path, sheet_name=sheet_name)
+        
         if df is None:
             return None
         
         # Verificar que el DataFrame no esté vacío
         if df.empty:
-            print(f"❌ Archivo vacío después de procesar: {file_path}")
+            upload_log.error("❌ Archivo vacío después de procesar: %s", file_path)
             return None
         
         # Normalizar columnas para compatibilidad
-        df = normalize_dataframe_columns(df)
+        with trace.measure('normalize'):
+            df = normalize_dataframe_columns(df)
         
-        print(f"✅ Archivo procesado exitosamente: {len(df)} registros, {len(df.columns)} columnas")
-        print(f"📋 Columnas detectadas: {list(df.columns)}")
+        upload_log.info("✅ Archivo procesado exitosamente: %s registros, %s columnas", len(df), len(df.columns))
+        upload_log.info("📋 Columnas detectadas: %s", list(df.columns))
         
         return df
         
     except Exception as e:
-        print(f"❌ Error procesando archivo {file_path}: {e}")
+        upload_log.error("❌ Error procesando archivo %s: %s", file_path, e)
         import traceback
         traceback.print_exc()
         return None
@@ -1070,35 +1316,131 @@ def process_csv_file(file_path):
     for encoding in encodings:
         for separator in separators:
             try:
-                print(f"🔄 Intentando con codificación: {encoding}, separador: '{separator}'")
+                upload_log.info("🔄 Intentando con codificación: %s, separador: '%s'", encoding, separator)
                 df = pd.read_csv(file_path, encoding=encoding, sep=separator, low_memory=False)
                 
                 # Verificar que se leyeron datos válidos
                 if len(df.columns) > 1 and len(df) > 0:
-                    print(f"✅ CSV procesado exitosamente con {encoding} y separador '{separator}'")
+                    upload_log.info("✅ CSV procesado exitosamente con %s y separador '%s'", encoding, separator)
                     return df
                     
             except Exception as e:
-                print(f"⚠️ Error con {encoding} y separador '{separator}': {e}")
+                upload_log.warning("⚠️ Error con %s y separador '%s': %s", encoding, separator, e)
                 continue
     
-    print(f"❌ No se pudo procesar el archivo CSV con ninguna combinación de codificación/separador")
+    upload_log.error("❌ No se pudo procesar el archivo CSV con ninguna combinación de codificación/separador")
     return None
 
-def process_excel_file(file_path):
+def excel_header(values):
+    """Nombres de columna a partir de la primera fila, como pd.read_excel"""
+    header = []
+    seen = {}
+    for i, value in enumerate(values):
+        name = f'Unnamed: {i}' if value is None else value
+        if name in seen:
+            seen[name] += 1
+            name = f'{name}.{seen[name]}'
+        else:
+            seen[name] = 0
+        header.append(name)
+    return header
+
+def iter_excel_batches(file_path, sheet_name=None, batch_size=5000):
+    """Leer una hoja .xlsx en modo read-only y entregar lotes de filas como DataFrames
+
+    No se construye el modelo completo del libro en memoria: las filas se
+    recorren en streaming y solo se mantiene un lote a la vez. Sin
+    ``sheet_name`` se usa la primera hoja. Las filas completamente vacías se omiten.
+    """
+    from openpyxl import load_workbook
+    
+    workbook = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        if sheet_name is None:
+            worksheet = workbook.worksheets[0]
+        elif sheet_name in workbook.sheetnames:
+            worksheet = workbook[sheet_name]
+        else:
+            raise KeyError(f"Hoja '{sheet_name}' no encontrada. Hojas disponibles: {workbook.sheetnames}")
+        
+        # Algunos generadores guardan dimensiones incorrectas en la hoja
+        worksheet.reset_dimensions()
+        
+        rows = worksheet.iter_rows(values_only=True)
+        header = None
+        for values in rows:
+            if any(value is not None for value in values):
+                header = excel_header(values)
+                break
+        if header is None:
+            return
+        
+        batch = []
+        for values in rows:
+            if not any(value is not None for value in values):
+                continue
+            values = list(values[:len(header)])
+            values.extend([None] * (len(header) - len(values)))
+            batch.append(values)
+            if len(batch) >= batch_size:
+                yield pd.DataFrame(batch, columns=header)
+                batch = []
+        if batch:
+            yield pd.DataFrame(batch, columns=header)
+    finally:
+        workbook.close()
+
+def concat_excel_batches(batches):
+    """Unir los lotes de ``iter_excel_batches`` columna a columna: (DataFrame, lotes)
+
+    Cada lote se descarta al copiar sus columnas y cada columna se une y se
+    libera por separado, así que no se mantienen a la vez la lista de lotes
+    y el DataFrame completo (como con ``pd.concat``). El análisis necesita
+    el DataFrame entero: la lectura es en streaming, el resultado no.
+    """
+    header = None
+    parts = None
+    n_batches = 0
+    for batch in batches:
+        if header is None:
+            header = list(batch.columns)
+            parts = [[] for _ in header]
+        for i in range(len(header)):
+            parts[i].append(batch.iloc[:, i].to_numpy())
+        n_batches += 1
+    if header is None:
+        return pd.DataFrame(), 0
+    
+    columns = []
+    for name, chunks in zip(header, parts):
+        # Un lote puede inferir otro tipo (p. ej. solo vacíos): se unen como object
+        if len({chunk.dtype for chunk in chunks}) > 1:
+            chunks = [chunk.astype(object) for chunk in chunks]
+        columns.append(pd.Series(np.concatenate(chunks), name=name).infer_objects())
+        parts[len(columns) - 1] = None
+    return pd.concat(columns, axis=1, copy=False), n_batches
+
+def process_excel_file(file_path, sheet_name=None):
     """Procesar archivo Excel"""
     try:
-        # Intentar leer la primera hoja
-        df = pd.read_excel(file_path, engine='openpyxl')
-        return df
-    except Exception as e:
-        print(f"⚠️ Error con openpyxl, intentando con xlrd: {e}")
-        try:
-            df = pd.read_excel(file_path, engine='xlrd')
+        if file_path.endswith('.xlsx'):
+            # Lectura en streaming por lotes (primera hoja si no se indica otra)
+            df, n_batches = concat_excel_batches(iter_excel_batches(
+                file_path, sheet_name=sheet_name, batch_size=app.config['EXCEL_BATCH_ROWS']))
+            upload_log.info("✅ Excel leído en %s lotes", n_batches)
             return df
-        except Exception as e2:
-            print(f"❌ Error procesando Excel: {e2}")
-            return None
+    except KeyError as e:
+        upload_log.error("❌ %s", e.args[0])
+        return None
+    except Exception as e:
+        upload_log.warning("⚠️ Error con openpyxl, intentando con xlrd: %s", e)
+    
+    try:
+        df = pd.read_excel(file_path, engine='xlrd', sheet_name=sheet_name or 0)
+        return df
+    except Exception as e2:
+        upload_log.error("❌ Error procesando Excel: %s", e2)
+        return None
 
 def normalize_dataframe_columns(df):
     """Normalizar columnas del DataFrame para compatibilidad"""
@@ -1188,11 +1530,11 @@ def normalize_dataframe_columns(df):
         # Limpiar datos nulos
         df_normalized = df_normalized.fillna('')
         
-        print(f"✅ Columnas normalizadas: {list(df_normalized.columns)}")
+        upload_log.info("✅ Columnas normalizadas: %s", list(df_normalized.columns))
         return df_normalized
         
     except Exception as e:
-        print(f"⚠️ Error normalizando columnas: {e}")
+        upload_log.warning("⚠️ Error normalizando columnas: %s", e)
         return df
 
 def calculate_priority_for_uploaded_data(df):
@@ -1235,42 +1577,61 @@ def calculate_priority_for_uploaded_data(df):
         return priority_scores
         
     except Exception as e:
-        print(f"⚠️ Error calculando prioridad: {e}")
+        upload_log.warning("⚠️ Error calculando prioridad: %s", e)
         return [50] * len(df)
 
-def perform_custom_analysis(df, analysis_id):
+def perform_custom_analysis(df, analysis_id, fast_preview=False, dataset_key=None, trace=None):
     """Realizar análisis personalizado con IA"""
+    trace = trace or new_stage_trace()
     try:
-        print(f"🤖 Iniciando análisis de IA para dataset: {analysis_id}")
+        if fast_preview and len(df) >= app.config['FAST_PREVIEW_MIN_ROWS']:
+            return perform_fast_preview(df, analysis_id, trace=trace)
+        
+        upload_log.info("🤖 Iniciando análisis de IA para dataset: %s", analysis_id)
+        dataset_key = dataset_key or ('upload', analysis_id)
         
         # Análisis básico
         total_records = len(df)
         
         # Detectar columnas relevantes
-        text_columns = df.select_dtypes(include=['object']).columns.tolist()
-        numeric_columns = df.select_dtypes(include=[np.number]).columns.tolist()
-        date_columns = df.select_dtypes(include=['datetime64']).columns.tolist()
-        
-        # Análisis de IA para categorización
-        categories_analysis = analyze_categories_with_ai(df, text_columns)
-        
-        # Análisis de urgencia con IA
-        urgency_analysis = analyze_urgency_with_ai(df, text_columns)
-        
-        # Análisis de sentimientos
-        sentiment_analysis = analyze_sentiment_with_ai(df, text_columns)
-        
-        # Análisis de priorización
-        priority_analysis = calculate_priority_with_ai(df, categories_analysis, urgency_analysis, sentiment_analysis)
-        
-        # Análisis temporal
-        temporal_analysis = analyze_temporal_patterns(df, date_columns)
+        with trace.measure('detect_columns'):
+            text_columns = df.select_dtypes(include=['object']).columns.tolist()
+            numeric_columns = df.select_dtypes(include=[np.number]).columns.tolist()
+            date_columns = df.select_dtypes(include=['datetime64']).columns.tolist()
+        
+        # Grafo de etapas: las independientes se ejecutan en paralelo,
+        # con un único presupuesto de inferencia para todas ellas
+        deadline = inference_deadline()
+        ai_stages = ('categories', 'urgency', 'sentiment')
+        stages = [
+            # Análisis de IA para categorización, urgencia y sentimientos
+            AnalysisStage('categories', lambda: analyze_categories_with_ai(df, text_columns, deadline)),
+            AnalysisStage('urgency', lambda: analyze_urgency_with_ai(df, text_columns)),
+            AnalysisStage('sentiment', lambda: analyze_sentiment_with_ai(df, text_columns, deadline)),
+            # Análisis de priorización
+            AnalysisStage('priority',
+                          lambda c, u, s: calculate_priority_with_ai(df, c, u, s),
+                          depends_on=ai_stages),
+            # Análisis temporal
+            AnalysisStage('temporal', lambda: analyze_temporal_patterns(df, date_columns)),
+            # Generar insights automáticos
+            AnalysisStage('insights',
+                          lambda c, u, s: generate_ai_insights(df, c, u, s),
+                          depends_on=ai_stages),
+        ]
+        stage_results = run_stage_graph(stages, max_workers=app.config['ANALYSIS_MAX_WORKERS'], trace=trace)
         
-        # Análisis de calidad de datos
-        data_quality = analyze_data_quality(df)
+        categories_analysis = stage_results['categories']
+        urgency_analysis = stage_results['urgency']
+        sentiment_analysis = stage_results['sentiment']
+        priority_analysis, priority_scores = stage_results['priority']
+        temporal_analysis = stage_results['temporal']
+        insights = stage_results['insights']
         
-        # Generar insights automáticos
-        insights = generate_ai_insights(df, categories_analysis, urgency_analysis, sentiment_analysis)
+        # Análisis de calidad de datos (incluye 'Prioridad_IA'); df se comparte con
+        # custom_analyses y otros hilos, así que la columna va en una copia
+        with trace.measure('quality'):
+            data_quality = analyze_data_quality(df.assign(Prioridad_IA=priority_scores), profile_key=dataset_key)
         
         analysis_result = {
             'total_records': total_records,
@@ -1286,43 +1647,297 @@ def perform_custom_analysis(df, analysis_id):
             'date_columns': date_columns,
             'analysis_id': analysis_id,
             'created_at': datetime.now().isoformat(),
-            'ai_accuracy': calculate_ai_accuracy(categories_analysis, urgency_analysis, sentiment_analysis)
+            'ai_accuracy': calculate_ai_accuracy(categories_analysis, urgency_analysis, sentiment_analysis),
+            # Serie por fila; quien llama la guarda aparte porque no es serializable a JSON
+            'priority_scores': priority_scores
         }
         
-        print(f"✅ Análisis de IA completado: {analysis_result['ai_accuracy']}% precisión")
+        upload_log.info("✅ Análisis de IA completado: %s%% precisión", analysis_result['ai_accuracy'])
         return analysis_result
         
     except Exception as e:
-        print(f"❌ Error en análisis personalizado: {e}")
+        upload_log.error("❌ Error en análisis personalizado: %s", e)
         return None
 
-def analyze_categories_with_ai(df, text_columns):
+def perform_fast_preview(df, analysis_id, trace=None):
+    """Vista previa rápida: análisis sobre una muestra estratificada con intervalos de confianza
+
+    Cada análisis se ejecuta una sola vez por estrato y todos los conteos
+    (categorías, urgencia, sentimiento, prioridad, calidad y patrones
+    temporales) se combinan con los pesos de estrato N_h / n_h.
+    """
+    trace = trace or new_stage_trace()
+    with trace.measure('sample'):
+        strata_column = choose_strata_column(df)
+        sample, sample_strata, population_sizes = stratified_sample(
+            df, strata_column, app.config['FAST_PREVIEW_SAMPLE_SIZE']
+        )
+    upload_log.info("⚡ Vista previa sobre %s de %s registros (estratos: %s)", len(sample), len(df), strata_column or 'ninguno')
+    
+    with trace.measure('detect_columns'):
+        text_columns = sample.select_dtypes(include=['object']).columns.tolist()
+        numeric_columns = sample.select_dtypes(include=[np.number]).columns.tolist()
+        date_columns = sample.select_dtypes(include=['datetime64']).columns.tolist()
+    
+    strata = sample_strata.astype(str).to_numpy()
+    sample_sizes = {str(stratum): int(size) for stratum, size in sample_strata.value_counts().items()}
+    deadline = inference_deadline()
+    
+    # Conteos por estrato de cada métrica: {(grupo, nombre): {estrato: conteo}}
+    metric_counts = {}
+    def add_counts(group, counts, stratum):
+        for name, count in counts.items():
+            metric_counts.setdefault((group, name), {})[stratum] = int(count)
+    
+    def estimate_group(group):
+        return {name: estimate_total(counts, sample_sizes, population_sizes)
+                for (metric_group, name), counts in metric_counts.items() if metric_group == group}
+    
+    category_confidences = []
+    sentiment_source = 'keywords'
+    with trace.measure('strata_estimates'):
+        for stratum, rows in sample.groupby(strata, sort=False):
+            categories = analyze_categories_with_ai(rows, text_columns, deadline)
+            urgency = analyze_urgency_with_ai(rows, text_columns)
+            sentiment = analyze_sentiment_with_ai(rows, text_columns, deadline)
+            if categories.get('source') == 'model':
+                category_confidences.append((categories['confidence'], len(rows)))
+            if sentiment.get('source') == 'model':
+                sentiment_source = 'model'
+            
+            add_counts('categories', categories['detected_categories'], stratum)
+            add_counts('urgency', {name: urgency[name] for name in ('urgent_cases', 'high_urgent_cases')}, stratum)
+            add_counts('sentiment', {name: sentiment[name] for name in ('positive_cases', 'negative_cases')}, stratum)
+            # Los duplicados solo pueden darse dentro de un estrato (la columna de estratos es parte de la fila)
+            add_counts('data_quality', {'missing_cells': rows.isna().sum().sum(),
+                                        'duplicate_rows': rows.duplicated().sum()}, stratum)
+            if date_columns:
+                dates = pd.to_datetime(rows[date_columns[0]], errors='coerce')
+                add_counts('monthly', dates.dt.to_period('M').value_counts(), stratum)
+                add_counts('weekly', dates.dt.day_name().value_counts(), stratum)
+        
+        estimates = {group: estimate_group(group) for group in ('categories', 'urgency', 'sentiment', 'data_quality')}
+    
+    total_records = len(df)
+    
+    categories = {name: est['estimate'] for name, est in estimates['categories'].items() if est['estimate'] > 0}
+    if category_confidences:
+        weights = sum(rows for _, rows in category_confidences)
+        category_confidence = round(sum(conf * rows for conf, rows in category_confidences) / weights, 2)
+    else:
+        category_confidence = min(95, max(60, len(categories) * 15))
+    categories_analysis = {
+        'detected_categories': categories,
+        'total_categories': len(categories),
+        'confidence': category_confidence,
+        'source': 'model' if category_confidences else 'keywords'
+    }
+    
+    urgent_cases = estimates['urgency']['urgent_cases']['estimate']
+    urgency_percentage = round(urgent_cases / total_records * 100, 2) if total_records > 0 else 0
+    urgency_analysis = {
+        'urgent_cases': urgent_cases,
+        'high_urgent_cases': estimates['urgency']['high_urgent_cases']['estimate'],
+        'urgency_percentage': urgency_percentage,
+        'confidence': min(95, max(70, urgency_percentage + 20))
+    }
+    
+    positive = estimates['sentiment']['positive_cases']['estimate']
+    negative = estimates['sentiment']['negative_cases']['estimate']
+    sentiment_score = round((positive - negative) / (positive + negative) * 100, 2) if positive + negative > 0 else 0
+    sentiment_analysis = {
+        'positive_cases': positive,
+        'negative_cases': negative,
+        'sentiment_score': sentiment_score,
+        'confidence': min(95, max(60, abs(sentiment_score) + 40)),
+        'source': sentiment_source
+    }
+    
+    # Prioridad por fila de la muestra a partir de los análisis estimados, ponderada por estrato
+    with trace.measure('priority'):
+        _, priority = calculate_priority_with_ai(sample, categories_analysis, urgency_analysis, sentiment_analysis)
+        levels = {
+            'high_priority': priority >= 80,
+            'medium_priority': (priority >= 50) & (priority < 80),
+            'low_priority': priority < 50
+        }
+        for name, mask in levels.items():
+            for stratum, count in mask.groupby(strata).sum().items():
+                add_counts('priority', {name: count}, str(stratum))
+        estimates['priority'] = estimate_group('priority')
+        row_weights = pd.Series(strata).map(lambda s: population_sizes[s] / sample_sizes[s]).to_numpy()
+        priority_analysis = {name: est['estimate'] for name, est in estimates['priority'].items()}
+        priority_analysis['average_priority'] = round(float(np.average(priority, weights=row_weights)), 2) if len(sample) else 0
+    
+    # Calidad: las celdas totales son exactas (incluye la columna 'Prioridad_IA' del análisis completo)
+    total_cells = total_records * (len(df.columns) + 1)
+    missing_cells = estimates['data_quality']['missing_cells']['estimate']
+    duplicate_rows = estimates['data_quality']['duplicate_rows']['estimate']
+    data_quality = {
+        'total_cells': total_cells,
+        'missing_cells': missing_cells,
+        'duplicate_rows': duplicate_rows,
+        'quality_score': round((total_cells - missing_cells - duplicate_rows) / total_cells * 100, 2) if total_cells > 0 else 0,
+        'completeness': round((1 - missing_cells / total_cells) * 100, 2) if total_cells > 0 else 0
+    }
+    
+    if date_columns:
+        monthly_counts = {name: est['estimate'] for name, est in estimate_group('monthly').items()}
+        temporal_analysis = {
+            'monthly_patterns': monthly_counts,
+            'weekly_patterns': {name: est['estimate'] for name, est in estimate_group('weekly').items()},
+            'total_periods': len(monthly_counts),
+            'peak_month': max(monthly_counts, key=monthly_counts.get) if monthly_counts else None
+        }
+    else:
+        temporal_analysis = analyze_temporal_patterns(sample, date_columns)
+    
+    result = {
+        'total_records': total_records,
+        'categories_analysis': categories_analysis,
+        'urgency_analysis': urgency_analysis,
+        'sentiment_analysis': sentiment_analysis,
+        'priority_analysis': priority_analysis,
+        'temporal_analysis': temporal_analysis,
+        'data_quality': data_quality,
+        'insights': generate_ai_insights(df, categories_analysis, urgency_analysis, sentiment_analysis),
+        'text_columns': text_columns,
+        'numeric_columns': numeric_columns,
+        'date_columns': date_columns,
+        'analysis_id': analysis_id,
+        'created_at': datetime.now().isoformat(),
+        'ai_accuracy': calculate_ai_accuracy(categories_analysis, urgency_analysis, sentiment_analysis),
+        'approximate': True,
+        'analysis_status': 'preview',
+        'sample_size': len(sample),
+        'strata_column': strata_column,
+        'confidence_level': 0.95,
+        'estimates': estimates
+    }
+    
+    upload_log.info("✅ Vista previa lista para %s, refinando en segundo plano", analysis_id)
+    return result
+
+def refine_analysis_in_background(df, analysis_id):
+    """Reemplazar la vista previa por el análisis exacto en un hilo aparte"""
+    def refine():
+        result = perform_custom_analysis(df, analysis_id)
+        if result is None:
+            upload_log.error("❌ No se pudo refinar el análisis %s, se conserva la vista previa", analysis_id)
+            return
+        if analysis_id in custom_analyses:
+            custom_analyses[analysis_id]['priority_scores'] = result.pop('priority_scores', None)
+            custom_analyses[analysis_id]['analysis'] = result
+            upload_log.info("✅ Análisis exacto disponible para %s", analysis_id)
+    
+    thread = threading.Thread(target=refine, name=f'refine-{analysis_id}', daemon=True)
+    thread.start()
+    return thread
+
+def count_keyword_matches(series, keyword_groups):
+    """Contar filas que contienen alguna palabra clave de cada grupo"""
+    patterns = {name: '|'.join(keywords) for name, keywords in keyword_groups.items()}
+    return count_pattern_matches(series, patterns,
+                                 min_rows=app.config['TEXT_SHARD_MIN_ROWS'],
+                                 workers=app.config['TEXT_SHARD_WORKERS'])
+
+_inference_client = None
+
+def get_inference_client():
+    """Cliente del servicio de inferencia (None si no está configurado)"""
+    global _inference_client
+    url = app.config['INFERENCE_SERVICE_URL']
+    if not url:
+        return None
+    if _inference_client is None or _inference_client.base_url != url.rstrip('/'):
+        # Importado al primer uso: requests no se carga si el servicio no está configurado
+        from inference_client import InferenceClient
+        _inference_client = InferenceClient(url,
+                                            timeout=app.config['INFERENCE_TIMEOUT'],
+                                            batch_size=app.config['INFERENCE_BATCH_SIZE'])
+    return _inference_client
+
+def model_text_counts(series):
+    """Frecuencia de cada texto no vacío (None si hay demasiados textos distintos)"""
+    texts = series.dropna().astype(str).str.strip()
+    counts = texts[texts != ''].value_counts()
+    if len(counts) > app.config['INFERENCE_MAX_TEXTS']:
+        return None
+    return counts
+
+def inference_deadline():
+    """Instante (time.monotonic) hasta el que un análisis puede usar el servicio de inferencia"""
+    return time.monotonic() + app.config['INFERENCE_ANALYSIS_BUDGET']
+
+def classify_column_with_model(series, labels, deadline=None):
+    """Filas por categoría según el servicio de inferencia: (conteos, confianza media) o None"""
+    client = get_inference_client()
+    counts = model_text_counts(series) if client else None
+    if counts is None:
+        return None
+    from inference_client import InferenceServiceError
+    try:
+        results = client.classify(counts.index.tolist(), labels, deadline=deadline)
+    except InferenceServiceError as e:
+        upload_log.warning("⚠️ %s; se usan palabras clave", e)
+        return None
+    
+    categories = {}
+    confidences = []
+    for result, rows in zip(results, counts.to_numpy()):
+        if result['categoria'] in labels:
+            categories[result['categoria']] = categories.get(result['categoria'], 0) + int(rows)
+            confidences.append(result['confianza'])
+    return categories, (float(np.mean(confidences)) if confidences else 0.0)
+
+def sentiment_column_with_model(series, deadline=None):
+    """Filas positivas (4-5 estrellas) y negativas (1-2) según el servicio, o None"""
+    client = get_inference_client()
+    counts = model_text_counts(series) if client else None
+    if counts is None:
+        return None
+    from inference_client import InferenceServiceError
+    try:
+        results = client.sentiment(counts.index.tolist(), deadline=deadline)
+    except InferenceServiceError as e:
+        upload_log.warning("⚠️ %s; se usan palabras clave", e)
+        return None
+    
+    stars = np.array([result['estrellas'] for result in results])
+    rows = counts.to_numpy()
+    return {'positive': int(rows[stars >= 4].sum()), 'negative': int(rows[(stars >= 1) & (stars <= 2)].sum())}
+
+def analyze_categories_with_ai(df, text_columns, deadline=None):
     """Análisis de categorización con IA"""
     try:
         categories = {}
-        category_keywords = {
-            'Salud': ['salud', 'médico', 'hospital', 'enfermedad', 'medicina', 'cuidado', 'health', 'medical'],
-            'Educación': ['educación', 'escuela', 'colegio', 'universidad', 'estudiante', 'profesor', 'education', 'school'],
-            'Seguridad': ['seguridad', 'policía', 'delito', 'robo', 'violencia', 'safety', 'police', 'crime'],
-            'Medio Ambiente': ['medio ambiente', 'contaminación', 'basura', 'aire', 'agua', 'environment', 'pollution'],
-            'Transporte': ['transporte', 'tráfico', 'carretera', 'autobús', 'taxi', 'transport', 'traffic'],
-            'Servicios Públicos': ['servicio', 'público', 'agua', 'luz', 'gas', 'public', 'service', 'utility']
-        }
+        model_confidences = []
         
         for col in text_columns:
             if col.lower() in ['comentario', 'descripción', 'descripcion', 'texto', 'mensaje']:
-                for category, keywords in category_keywords.items():
-                    count = df[col].astype(str).str.lower().str.contains('|'.join(keywords), na=False).sum()
+                model_result = classify_column_with_model(df[col], list(CATEGORY_KEYWORDS), deadline)
+                if model_result is not None:
+                    counts, confidence = model_result
+                    model_confidences.append(confidence)
+                else:
+                    counts = count_keyword_matches(df[col], CATEGORY_KEYWORDS)
+                for category, count in counts.items():
                     if count > 0:
                         categories[category] = categories.get(category, 0) + count
         
+        if model_confidences:
+            confidence = round(float(np.mean(model_confidences)) * 100, 2)
+        else:
+            confidence = min(95, max(60, len(categories) * 15))
+        
         return {
             'detected_categories': categories,
             'total_categories': len(categories),
-            'confidence': min(95, max(60, len(categories) * 15))
+            'confidence': confidence,
+            'source': 'model' if model_confidences else 'keywords'
         }
     except Exception as e:
-        print(f"Error en análisis de categorías: {e}")
+        upload_log.error("Error en análisis de categorías: %s", e)
         return {'detected_categories': {}, 'total_categories': 0, 'confidence': 0}
 
 def analyze_urgency_with_ai(df, text_columns):
@@ -1342,8 +1957,12 @@ def analyze_urgency_with_ai(df, text_columns):
         
         for col in text_columns:
             if col.lower() in ['comentario', 'descripción', 'descripcion', 'texto', 'mensaje', 'urgencia']:
-                urgent_cases += df[col].astype(str).str.lower().str.contains('|'.join(urgent_keywords), na=False).sum()
-                high_urgent_cases += df[col].astype(str).str.lower().str.contains('|'.join(high_urgency_keywords), na=False).sum()
+                counts = count_keyword_matches(df[col], {
+                    'urgent': urgent_keywords,
+                    'high_urgent': high_urgency_keywords
+                })
+                urgent_cases += counts['urgent']
+                high_urgent_cases += counts['high_urgent']
         
         urgency_percentage = (urgent_cases / len(df)) * 100 if len(df) > 0 else 0
         
@@ -1354,10 +1973,10 @@ def analyze_urgency_with_ai(df, text_columns):
             'confidence': min(95, max(70, urgency_percentage + 20))
         }
     except Exception as e:
-        print(f"Error en análisis de urgencia: {e}")
+        upload_log.error("Error en análisis de urgencia: %s", e)
         return {'urgent_cases': 0, 'high_urgent_cases': 0, 'urgency_percentage': 0, 'confidence': 0}
 
-def analyze_sentiment_with_ai(df, text_columns):
+def analyze_sentiment_with_ai(df, text_columns, deadline=None):
     """Análisis de sentimientos con IA"""
     try:
         positive_keywords = [
@@ -1372,11 +1991,20 @@ def analyze_sentiment_with_ai(df, text_columns):
         
         positive_cases = 0
         negative_cases = 0
+        source = 'keywords'
         
         for col in text_columns:
             if col.lower() in ['comentario', 'descripción', 'descripcion', 'texto', 'mensaje']:
-                positive_cases += df[col].astype(str).str.lower().str.contains('|'.join(positive_keywords), na=False).sum()
-                negative_cases += df[col].astype(str).str.lower().str.contains('|'.join(negative_keywords), na=False).sum()
+                counts = sentiment_column_with_model(df[col], deadline)
+                if counts is not None:
+                    source = 'model'
+                else:
+                    counts = count_keyword_matches(df[col], {
+                        'positive': positive_keywords,
+                        'negative': negative_keywords
+                    })
+                positive_cases += counts['positive']
+                negative_cases += counts['negative']
         
         total_sentiment_cases = positive_cases + negative_cases
         sentiment_score = ((positive_cases - negative_cases) / total_sentiment_cases * 100) if total_sentiment_cases > 0 else 0
@@ -1385,46 +2013,52 @@ def analyze_sentiment_with_ai(df, text_columns):
             'positive_cases': positive_cases,
             'negative_cases': negative_cases,
             'sentiment_score': round(sentiment_score, 2),
-            'confidence': min(95, max(60, abs(sentiment_score) + 40))
+            'confidence': min(95, max(60, abs(sentiment_score) + 40)),
+            'source': source
         }
     except Exception as e:
-        print(f"Error en análisis de sentimientos: {e}")
+        upload_log.error("Error en análisis de sentimientos: %s", e)
         return {'positive_cases': 0, 'negative_cases': 0, 'sentiment_score': 0, 'confidence': 0}
 
 def calculate_priority_with_ai(df, categories_analysis, urgency_analysis, sentiment_analysis):
-    """Calcular priorización con IA"""
+    """Calcular priorización con IA: (estadísticas, Serie de prioridad por fila)
+
+    No modifica ``df`` (otras etapas lo leen en paralelo); la Serie se
+    devuelve aparte en lugar de agregarse como columna 'Prioridad_IA'.
+    """
     try:
-        # Crear columna de prioridad basada en múltiples factores
-        df['Prioridad_IA'] = 50  # Puntuación base
+        # Prioridad basada en múltiples factores
+        priority = pd.Series(50, index=df.index)  # Puntuación base
         
         # Factor de urgencia
         if urgency_analysis['urgent_cases'] > 0:
-            df['Prioridad_IA'] += 30
+            priority += 30
         
         # Factor de sentimiento negativo
         if sentiment_analysis['sentiment_score'] < -20:
-            df['Prioridad_IA'] += 20
+            priority += 20
         
         # Factor de categoría crítica
         critical_categories = ['Salud', 'Seguridad']
         for category in critical_categories:
             if category in categories_analysis['detected_categories']:
-                df['Prioridad_IA'] += 15
+                priority += 15
         
         # Normalizar prioridad entre 0-100
-        df['Prioridad_IA'] = df['Prioridad_IA'].clip(0, 100)
+        priority = priority.clip(0, 100)
         
         priority_stats = {
-            'high_priority': (df['Prioridad_IA'] >= 80).sum(),
-            'medium_priority': ((df['Prioridad_IA'] >= 50) & (df['Prioridad_IA'] < 80)).sum(),
-            'low_priority': (df['Prioridad_IA'] < 50).sum(),
-            'average_priority': round(df['Prioridad_IA'].mean(), 2)
+            'high_priority': int((priority >= 80).sum()),
+            'medium_priority': int(((priority >= 50) & (priority < 80)).sum()),
+            'low_priority': int((priority < 50).sum()),
+            'average_priority': round(float(priority.mean()), 2)
         }
         
-        return priority_stats
+        return priority_stats, priority
     except Exception as e:
-        print(f"Error en cálculo de prioridad: {e}")
-        return {'high_priority': 0, 'medium_priority': 0, 'low_priority': 0, 'average_priority': 0}
+        upload_log.error("Error en cálculo de prioridad: %s", e)
+        return ({'high_priority': 0, 'medium_priority': 0, 'low_priority': 0, 'average_priority': 0},
+                pd.Series(50, index=df.index))
 
 def analyze_temporal_patterns(df, date_columns):
     """Análisis de patrones temporales"""
@@ -1432,14 +2066,14 @@ def analyze_temporal_patterns(df, date_columns):
         if not date_columns:
             return {'patterns': 'No hay columnas de fecha', 'trends': []}
         
-        date_col = date_columns[0]
-        df[date_col] = pd.to_datetime(df[date_col], errors='coerce')
+        # Conversión local: esta etapa corre en paralelo y no debe escribir en df
+        dates = pd.to_datetime(df[date_columns[0]], errors='coerce')
         
         # Análisis por mes
-        monthly_counts = df.groupby(df[date_col].dt.to_period('M')).size()
+        monthly_counts = df.groupby(dates.dt.to_period('M')).size()
         
         # Análisis por día de la semana
-        weekly_counts = df.groupby(df[date_col].dt.day_name()).size()
+        weekly_counts = df.groupby(dates.dt.day_name()).size()
         
         return {
             'monthly_patterns': monthly_counts.to_dict(),
@@ -1448,15 +2082,16 @@ def analyze_temporal_patterns(df, date_columns):
             'peak_month': monthly_counts.idxmax() if not monthly_counts.empty else None
         }
     except Exception as e:
-        print(f"Error en análisis temporal: {e}")
+        upload_log.error("Error en análisis temporal: %s", e)
         return {'patterns': 'Error en análisis temporal', 'trends': []}
 
-def analyze_data_quality(df):
+def analyze_data_quality(df, profile_key=None):
     """Análisis de calidad de datos"""
     try:
+        profile = get_dataset_profile(df, profile_key)
         total_cells = df.size
-        missing_cells = df.isnull().sum().sum()
-        duplicate_rows = df.duplicated().sum()
+        missing_cells = profile.missing_cells
+        duplicate_rows = profile.duplicate_rows
         
         quality_score = ((total_cells - missing_cells - duplicate_rows) / total_cells * 100) if total_cells > 0 else 0
         
@@ -1468,7 +2103,7 @@ def analyze_data_quality(df):
             'completeness': round((1 - missing_cells / total_cells) * 100, 2) if total_cells > 0 else 0
         }
     except Exception as e:
-        print(f"Error en análisis de calidad: {e}")
+        upload_log.error("Error en análisis de calidad: %s", e)
         return {'quality_score': 0, 'completeness': 0}
 
 def generate_ai_insights(df, categories_analysis, urgency_analysis, sentiment_analysis):
@@ -1499,7 +2134,7 @@ def generate_ai_insights(df, categories_analysis, urgency_analysis, sentiment_an
         
         return insights
     except Exception as e:
-        print(f"Error generando insights: {e}")
+        upload_log.error("Error generando insights: %s", e)
         return ["Error generando insights automáticos"]
 
 def calculate_ai_accuracy(categories_analysis, urgency_analysis, sentiment_analysis):
@@ -1526,7 +2161,7 @@ def calculate_custom_metrics(df, analysis):
         data_quality = analysis.get('data_quality', {})
         
         # Métricas básicas
-        metrics = {
+        custom_metrics = {
             'total_casos': total_casos,
             'casos_urgentes': urgency_analysis.get('urgent_cases', 0),
             'porcentaje_urgentes': urgency_analysis.get('urgency_percentage', 0),
@@ -1542,7 +2177,7 @@ def calculate_custom_metrics(df, analysis):
             'categorias_detectadas': analysis.get('categories_analysis', {}).get('total_categories', 0)
         }
         
-        return metrics
+        return custom_metrics
         
     except Exception as e:
         print(f"❌ Error calculando métricas personalizadas: {e}")
@@ -1566,6 +2201,7 @@ def detect_dashboard_problems():
             return problems
         
         df = analyzer.df
+        profile = get_dataset_profile(df, analyzer.profile_key)
         
         # Problema 1: Datos insuficientes
         if len(df) < 10:
@@ -1643,8 +2279,7 @@ def detect_dashboard_problems():
         # Problema 6: Datos antiguos
         if 'Fecha del reporte' in df.columns:
             try:
-                df['Fecha_dt'] = pd.to_datetime(df['Fecha del reporte'], errors='coerce')
-                latest_date = df['Fecha_dt'].max()
+                latest_date = pd.to_datetime(df['Fecha del reporte'], errors='coerce').max()
                 if pd.notna(latest_date):
                     days_old = (datetime.now() - latest_date).days
                     if days_old > 30:
@@ -1660,7 +2295,7 @@ def detect_dashboard_problems():
                 pass
         
         # Problema 7: Calidad de datos
-        missing_data = df.isnull().sum().sum()
+        missing_data = profile.missing_cells
         total_cells = df.size
         missing_percentage = (missing_data / total_cells) * 100
         
@@ -1675,7 +2310,7 @@ def detect_dashboard_problems():
             })
         
         # Problema 8: Casos duplicados
-        duplicates = df.duplicated().sum()
+        duplicates = profile.duplicate_rows
         if duplicates > 0:
             duplicate_percentage = (duplicates / len(df)) * 100
             problems.append({
@@ -2051,6 +2686,113 @@ def calculate_total_budget(action_plan):
         'formatted_total': f"${total_budget:,}"
     }
 
+# Rutas que el calentamiento recorre antes de marcar el worker como listo
+WARMUP_ROUTES = [
+    '/',
+    '/api/metrics',
+    '/api/category-distribution',
+    '/api/urgency-distribution',
+    '/api/priority-cases?limit=20',
+    '/api/temporal-trends',
+    '/api/dashboard-problems',
+    # Primer parseo de fechas y filtros sobre el DataFrame
+    '/api/filtered-metrics?fecha_inicio=2024-01-01&fecha_fin=2024-12-31',
+]
+
+# Marca en el entorno WSGI de las peticiones del calentamiento (excluidas de las métricas)
+WARMUP_ENVIRON_KEY = 'reportes.warm_up'
+
+warmup_state = {'status': 'pending' if app.config['WARMUP_ON_START'] else 'ready',
+                'duration_s': None, 'failed_routes': []}
+
+def warm_up():
+    """Precalcular métricas, distribuciones, prioridades y reporte de problemas
+
+    Cada ruta de ``WARMUP_ROUTES`` se ejecuta una vez con el cliente de
+    pruebas de Flask, de modo que los agregados sin filtros quedan en la
+    caché del analizador y los caminos de pandas ya se ejecutaron. Una ruta
+    que falla no impide que el worker quede listo.
+    """
+    warmup_state['status'] = 'warming'
+    started = datetime.now()
+    failed = []
+    try:
+        with app.test_client() as client:
+            for route in WARMUP_ROUTES:
+                try:
+                    if client.get(route, environ_base={WARMUP_ENVIRON_KEY: True}).status_code >= 500:
+                        failed.append(route)
+                except Exception as e:
+                    print(f"⚠️ Calentamiento de {route} falló: {e}")
+                    failed.append(route)
+    finally:
+        warmup_state['failed_routes'] = failed
+        warmup_state['duration_s'] = round((datetime.now() - started).total_seconds(), 3)
+        warmup_state['status'] = 'ready'
+    print(f"🔥 Calentamiento completado en {warmup_state['duration_s']} s")
+
+def start_warm_up():
+    """Calentar en segundo plano si WARMUP_ON_START está activo
+
+    Lo llaman los puntos de entrada del servidor (``__main__`` y el hook
+    ``post_worker_init`` de gunicorn.conf.py), no la importación del
+    módulo: scripts, pruebas y consolas que importan ``app`` no disparan
+    peticiones. El worker arranca y /health/live responde mientras se calienta.
+    """
+    if not app.config['WARMUP_ON_START']:
+        return None
+    thread = threading.Thread(target=warm_up, name='warm-up', daemon=True)
+    thread.start()
+    return thread
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """Métricas en formato de texto de Prometheus"""
+    metrics.set('dashboard_dataset_rows', len(analyzer.df) if analyzer.df is not None else 0)
+    metrics.set('custom_analyses_stored', len(custom_analyses))
+    # La caché de perfiles lleva sus propios contadores (data_profiling)
+    profile_stats = profile_cache_stats()
+    for result, count in profile_stats.items():
+        metrics.set('cache_requests_total', count, {'cache': 'dataset_profile', 'result': result})
+    if sum(profile_stats.values()):
+        metrics.set('cache_hit_ratio', round(profile_stats['hit'] / sum(profile_stats.values()), 4),
+                    {'cache': 'dataset_profile'})
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/admin/profiles')
+def admin_list_profiles():
+    """Perfiles de peticiones guardados (requiere X-Profile-Token)"""
+    if not has_profiling_token():
+        return jsonify({'error': 'No autorizado'}), 403
+    return jsonify({'max_profiles': profile_store.max_profiles, 'profiles': profile_store.list()})
+
+@app.route('/admin/profiles/<request_id>')
+def admin_get_profile(request_id):
+    """Perfil completo de una petición (requiere X-Profile-Token)"""
+    if not has_profiling_token():
+        return jsonify({'error': 'No autorizado'}), 403
+    profile = profile_store.get(request_id)
+    if profile is None:
+        return jsonify({'error': 'Perfil no encontrado'}), 404
+    return jsonify(profile)
+
+@app.route('/health/live')
+def health_live():
+    """El proceso responde (no depende de los datos)"""
+    return jsonify({'status': 'alive'})
+
+@app.route('/health/ready')
+def health_ready():
+    """Listo para recibir tráfico: datos cargados y calentamiento terminado"""
+    ready = warmup_state['status'] == 'ready' and analyzer.df is not None
+    body = {
+        'status': 'ready' if ready else warmup_state['status'],
+        'warmup_seconds': warmup_state['duration_s'],
+        'failed_routes': warmup_state['failed_routes'],
+        'data_version': analyzer.data_version
+    }
+    return jsonify(body), (200 if ready else 503)
+
 if __name__ == '__main__':
     import os
     port = int(os.environ.get('PORT', 5000))
@@ -2059,4 +2801,5 @@ if __name__ == '__main__':
     print("🤖 Modelo de IA: HuggingFace Transformers")
     print("📈 Visualizaciones: Plotly + Flask")
     
+    start_warm_up()
     app.run(debug=False, host='0.0.0.0', port=port)
@@ -0,0 +1,43 @@
+"""
+📝 Logger con niveles y muestreo para las rutas de la aplicación web
+Los mensajes de depuración e información de las rutas frecuentes se
+muestrean; las advertencias y los errores siempre se escriben
+"""
+
+import logging
+import os
+import random
+import sys
+
+# Nivel mínimo de los mensajes (DEBUG, INFO, WARNING, ERROR)
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+
+# Fracción de mensajes por debajo de WARNING que se escriben en las rutas frecuentes
+LOG_SAMPLE_RATE = float(os.environ.get('LOG_SAMPLE_RATE', 0.1))
+
+
+class SamplingFilter(logging.Filter):
+    """Deja pasar una fracción ``rate`` de los mensajes por debajo de WARNING"""
+
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        return record.levelno >= logging.WARNING or self.rate >= 1 or random.random() < self.rate
+
+
+def get_logger(name, level=LOG_LEVEL, sample_rate=1.0):
+    """Logger a stdout con nivel y muestreo (se configura una sola vez por nombre)"""
+    logger = logging.getLogger(name)
+    if not logger.handlers:
+        handler = logging.StreamHandler(sys.stdout)
+        handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(message)s'))
+        logger.addHandler(handler)
+        logger.propagate = False
+    logger.setLevel(level)
+    for existing in [f for f in logger.filters if isinstance(f, SamplingFilter)]:
+        logger.removeFilter(existing)
+    if sample_rate < 1:
+        logger.addFilter(SamplingFilter(sample_rate))
+    return logger
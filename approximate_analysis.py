@@ -0,0 +1,89 @@
+"""
+🎯 Análisis aproximado por muestreo estratificado
+Muestra estratificada de un dataset grande y estimación de totales con
+intervalos de confianza para la vista previa rápida del análisis
+"""
+
+import math
+
+import numpy as np
+import pandas as pd
+
+# Columnas candidatas para estratificar, en orden de preferencia
+STRATA_CANDIDATES = ['Categoría del problema', 'Ciudad', 'Nivel de urgencia']
+
+# Máximo de estratos distintos para que una columna sea usable
+MAX_STRATA = 50
+
+# Valor z para intervalos de confianza del 95%
+Z_95 = 1.96
+
+
+def choose_strata_column(df):
+    """Elegir la columna de estratificación (None si ninguna es adecuada)"""
+    for column in STRATA_CANDIDATES:
+        if column in df.columns and 1 < df[column].nunique(dropna=False) <= MAX_STRATA:
+            return column
+    return None
+
+
+def stratified_sample(df, strata_column, sample_size, seed=42):
+    """Muestra estratificada con asignación proporcional
+
+    Cada estrato aporta al menos 2 filas (o todas si tiene menos) para poder
+    estimar su varianza. Devuelve ``(muestra, estratos_muestra, tamaños_estrato)``:
+    la muestra, la etiqueta de estrato de cada fila muestreada y un diccionario
+    ``{estrato: filas en la población}``.
+    """
+    n_rows = len(df)
+    if strata_column is None:
+        labels = pd.Series('__todos__', index=df.index)
+    else:
+        labels = df[strata_column].astype(str)
+
+    codes, uniques = pd.factorize(labels)
+    fraction = min(1.0, sample_size / n_rows) if n_rows else 1.0
+    rng = np.random.default_rng(seed)
+
+    order = np.argsort(codes, kind='stable')
+    sizes = np.bincount(codes, minlength=len(uniques))
+    starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+
+    chosen = []
+    for code, (start, size) in enumerate(zip(starts, sizes)):
+        n_h = min(size, max(2, int(round(size * fraction))))
+        members = order[start:start + size]
+        chosen.append(np.sort(rng.choice(members, size=n_h, replace=False)))
+
+    positions = np.sort(np.concatenate(chosen)) if chosen else np.empty(0, dtype=int)
+    sample = df.iloc[positions].reset_index(drop=True)
+    sample_strata = pd.Series(np.asarray(uniques)[codes[positions]], name='estrato')
+    population_sizes = {str(label): int(size) for label, size in zip(uniques, sizes)}
+    return sample, sample_strata, population_sizes
+
+
+def estimate_total(stratum_counts, sample_sizes, population_sizes, z=Z_95):
+    """Estimar un conteo poblacional a partir de conteos por estrato
+
+    Usa el estimador estratificado ``sum(N_h * p_h)`` con corrección por
+    población finita. ``p_h`` se acota a 1 para la varianza cuando una fila
+    puede contar más de una vez (varias columnas de texto).
+    """
+    estimate = 0.0
+    variance = 0.0
+    for stratum, n_h in sample_sizes.items():
+        if n_h <= 0:
+            continue
+        N_h = population_sizes[stratum]
+        p_h = stratum_counts.get(stratum, 0) / n_h
+        estimate += N_h * p_h
+        if 1 < n_h < N_h:
+            p_var = min(p_h, 1.0)
+            variance += N_h ** 2 * (1 - n_h / N_h) * p_var * (1 - p_var) / (n_h - 1)
+
+    margin = z * math.sqrt(variance)
+    return {
+        'estimate': int(round(estimate)),
+        'ci_low': max(0, int(math.floor(estimate - margin))),
+        'ci_high': int(math.ceil(estimate + margin))
+    }
@@ -0,0 +1,271 @@
+"""
+Backend de inferencia ONNX Runtime (CPU) con cuantización dinámica int8
+Exporta el clasificador zero-shot y el analizador de sentimientos a ONNX y
+ofrece objetos compatibles con los pipelines de HuggingFace usados en el análisis
+
+Uso:
+    python backend_onnx.py exportar
+    python backend_onnx.py validar --limite 1000
+"""
+
+import argparse
+import inspect
+import os
+import types
+
+import numpy as np
+
+# Modelos por tarea (los mismos que usa senasoft_data_cleaningFinal.py)
+MODELOS = {
+    'zero-shot-classification': 'facebook/bart-large-mnli',
+    'sentiment-analysis': 'nlptown/bert-base-multilingual-uncased-sentiment'
+}
+
+DIRECTORIO_ONNX = os.environ.get('DIRECTORIO_ONNX', 'modelos_onnx')
+
+ARCHIVO_FP32 = 'modelo.onnx'
+ARCHIVO_INT8 = 'modelo_int8.onnx'
+
+# Longitud máxima en tokens al tokenizar para ONNX
+MAX_TOKENS = 512
+
+
+def directorio_modelo(tarea, base=DIRECTORIO_ONNX):
+    """
+    Directorio donde se guarda el modelo ONNX de una tarea
+    """
+    return os.path.join(base, tarea)
+
+
+def exportar_modelo_onnx(modelo_id, directorio, opset=14, cuantizar=True):
+    """
+    Exporta un modelo de clasificación de secuencias a ONNX (y su versión int8)
+
+    Guarda en ``directorio`` el modelo fp32, el cuantizado dinámicamente a
+    int8 (pesos de las capas lineales), el tokenizador y la configuración.
+    """
+    import torch
+    from transformers import AutoTokenizer, AutoModelForSequenceClassification
+
+    os.makedirs(directorio, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(modelo_id)
+    modelo = AutoModelForSequenceClassification.from_pretrained(modelo_id)
+    modelo.eval()
+
+    # Un par de textos incluye token_type_ids en los modelos que lo usan
+    ejemplo = tokenizer(["Comentario de ejemplo"], ["Este texto trata sobre Salud."], return_tensors='pt')
+    nombres = list(ejemplo.keys())
+
+    class SoloLogits(torch.nn.Module):
+        def __init__(self, modelo):
+            super().__init__()
+            self.modelo = modelo
+
+        def forward(self, *entradas):
+            return self.modelo(**dict(zip(nombres, entradas))).logits
+
+    opciones = {}
+    if 'dynamo' in inspect.signature(torch.onnx.export).parameters:
+        opciones['dynamo'] = False
+
+    ruta_fp32 = os.path.join(directorio, ARCHIVO_FP32)
+    with torch.no_grad():
+        torch.onnx.export(
+            SoloLogits(modelo),
+            tuple(ejemplo[n] for n in nombres),
+            ruta_fp32,
+            input_names=nombres,
+            output_names=['logits'],
+            dynamic_axes={**{n: {0: 'lote', 1: 'secuencia'} for n in nombres}, 'logits': {0: 'lote'}},
+            opset_version=opset,
+            **opciones
+        )
+
+    tokenizer.save_pretrained(directorio)
+    modelo.config.save_pretrained(directorio)
+
+    if cuantizar:
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+        quantize_dynamic(ruta_fp32, os.path.join(directorio, ARCHIVO_INT8), weight_type=QuantType.QInt8)
+
+    return directorio
+
+
+def _softmax(x, eje=-1):
+    x = x - x.max(axis=eje, keepdims=True)
+    e = np.exp(x)
+    return e / e.sum(axis=eje, keepdims=True)
+
+
+class _PipelineONNX:
+    """
+    Base común: sesión de ONNX Runtime, tokenizador y configuración
+    """
+
+    def __init__(self, directorio, cuantizado=True, hilos=None):
+        import onnxruntime as ort
+        from transformers import AutoConfig, AutoTokenizer
+
+        archivo = ARCHIVO_INT8 if cuantizado else ARCHIVO_FP32
+        opciones = ort.SessionOptions()
+        if hilos:
+            opciones.intra_op_num_threads = hilos
+        self.sesion = ort.InferenceSession(os.path.join(directorio, archivo), opciones,
+                                           providers=['CPUExecutionProvider'])
+        self.entradas = {e.name for e in self.sesion.get_inputs()}
+        self.tokenizer = AutoTokenizer.from_pretrained(directorio)
+        config = AutoConfig.from_pretrained(directorio)
+        sufijo = 'onnx-int8' if cuantizado else 'onnx'
+        # Identificador distinto al de PyTorch para no mezclar resultados en caché
+        self.model = types.SimpleNamespace(
+            name_or_path=f"{config._name_or_path or directorio}@{sufijo}",
+            config=config
+        )
+
+    def _logits(self, *textos):
+        codificado = self.tokenizer(*textos, padding=True, truncation=True,
+                                    max_length=MAX_TOKENS, return_tensors='np')
+        feed = {k: v.astype(np.int64) for k, v in codificado.items() if k in self.entradas}
+        return self.sesion.run(['logits'], feed)[0]
+
+
+class PipelineClasificacionONNX(_PipelineONNX):
+    """
+    Equivalente ONNX del pipeline "zero-shot-classification" (una etiqueta por texto)
+    """
+
+    def __init__(self, directorio, cuantizado=True, hilos=None):
+        super().__init__(directorio, cuantizado, hilos)
+        etiquetas = {k.lower(): v for k, v in self.model.config.label2id.items()}
+        self.id_implicacion = next(v for k, v in etiquetas.items() if k.startswith('entail'))
+        self.id_contradiccion = next(v for k, v in etiquetas.items() if k.startswith('contradict'))
+
+    def __call__(self, textos, candidate_labels, hypothesis_template="This example is {}.", batch_size=8):
+        individual = isinstance(textos, str)
+        textos = [textos] if individual else list(textos)
+        etiquetas = list(candidate_labels)
+        hipotesis = [hypothesis_template.format(e) for e in etiquetas]
+
+        # Pares (texto, hipótesis) aplanados y procesados en lotes de batch_size
+        premisas = [t for t in textos for _ in etiquetas]
+        pares_hipotesis = hipotesis * len(textos)
+        logits = np.concatenate([
+            self._logits(premisas[i:i + batch_size], pares_hipotesis[i:i + batch_size])
+            for i in range(0, len(premisas), max(1, batch_size))
+        ]).reshape(len(textos), len(etiquetas), -1)
+
+        if len(etiquetas) == 1:
+            puntajes = _softmax(logits[..., [self.id_contradiccion, self.id_implicacion]])[..., 1]
+        else:
+            puntajes = _softmax(logits[..., self.id_implicacion], eje=1)
+
+        salidas = []
+        for texto, fila in zip(textos, puntajes):
+            orden = np.argsort(-fila)
+            salidas.append({
+                'sequence': texto,
+                'labels': [etiquetas[i] for i in orden],
+                'scores': [float(fila[i]) for i in orden]
+            })
+        return salidas[0] if individual else salidas
+
+
+class PipelineSentimientoONNX(_PipelineONNX):
+    """
+    Equivalente ONNX del pipeline "sentiment-analysis"
+    """
+
+    def __call__(self, textos, batch_size=8, truncation=True):
+        # Siempre se trunca a MAX_TOKENS; truncation se acepta como en el pipeline de HuggingFace
+        textos = [textos] if isinstance(textos, str) else list(textos)
+        salidas = []
+        for i in range(0, len(textos), max(1, batch_size)):
+            probabilidades = _softmax(self._logits(textos[i:i + batch_size]))
+            for fila in probabilidades:
+                indice = int(fila.argmax())
+                salidas.append({'label': self.model.config.id2label[indice], 'score': float(fila[indice])})
+        return salidas
+
+
+PIPELINES_ONNX = {
+    'zero-shot-classification': PipelineClasificacionONNX,
+    'sentiment-analysis': PipelineSentimientoONNX
+}
+
+
+def cargar_pipeline_onnx(tarea, directorio=None, cuantizado=True, hilos=None):
+    """
+    Carga el pipeline ONNX de una tarea desde su directorio exportado
+    """
+    return PIPELINES_ONNX[tarea](directorio or directorio_modelo(tarea), cuantizado=cuantizado, hilos=hilos)
+
+
+def validar_backend(pipeline_pt, pipeline_onnx, comentarios, tarea, tamano_lote=16):
+    """
+    Compara las salidas de PyTorch y ONNX sobre los mismos comentarios
+
+    Devuelve el porcentaje de acuerdo en la etiqueta principal y la diferencia
+    media absoluta de la confianza (clasificación) o de las estrellas (sentimiento).
+    """
+    from inferencia_ia import clasificar_comentarios_lote, analizar_sentimientos_columna
+
+    if tarea == 'zero-shot-classification':
+        pt = clasificar_comentarios_lote(pipeline_pt, comentarios, tamano_lote=tamano_lote)
+        ox = clasificar_comentarios_lote(pipeline_onnx, comentarios, tamano_lote=tamano_lote)
+        etiqueta, valor = 'Categoria_IA', 'Confianza_IA'
+    else:
+        pt = analizar_sentimientos_columna(pipeline_pt, comentarios, tamano_lote=tamano_lote)
+        ox = analizar_sentimientos_columna(pipeline_onnx, comentarios, tamano_lote=tamano_lote)
+        etiqueta, valor = 'Estrellas', 'Estrellas'
+
+    return {
+        'tarea': tarea,
+        'filas': len(pt),
+        'acuerdo': round(float((pt[etiqueta] == ox[etiqueta]).mean()) * 100, 2),
+        'diferencia_media': round(float((pt[valor].astype(float) - ox[valor].astype(float)).abs().mean()), 4)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backend ONNX Runtime para los modelos de análisis")
+    parser.add_argument('accion', choices=['exportar', 'validar'])
+    parser.add_argument('--tarea', choices=list(MODELOS), action='append',
+                        help="Tarea a procesar (por defecto, todas)")
+    parser.add_argument('--modelo', help="Modelo o ruta local (solo con una --tarea)")
+    parser.add_argument('--directorio', default=DIRECTORIO_ONNX)
+    parser.add_argument('--dataset', default='dataset.csv')
+    parser.add_argument('--limite', type=int, default=1000, help="Filas del dataset a validar (0 = todas)")
+    parser.add_argument('--fp32', action='store_true', help="Usar el modelo ONNX sin cuantizar")
+    args = parser.parse_args()
+
+    from modelos_ia import resolver_modelo
+
+    tareas = args.tarea or list(MODELOS)
+    if args.modelo and len(tareas) != 1:
+        parser.error("--modelo requiere exactamente una --tarea")
+
+    for tarea in tareas:
+        modelo_id = args.modelo or resolver_modelo(tarea)
+        directorio = directorio_modelo(tarea, args.directorio)
+
+        if args.accion == 'exportar':
+            print(f"📦 Exportando {modelo_id} ({tarea}) a {directorio}...")
+            exportar_modelo_onnx(modelo_id, directorio)
+            print("   ✓ Modelo ONNX fp32 e int8 guardados")
+            continue
+
+        import pandas as pd
+        from transformers import pipeline
+
+        df = pd.read_csv(args.dataset)
+        comentarios = df['Comentario'] if args.limite <= 0 else df['Comentario'].head(args.limite)
+        print(f"🔍 Validando {tarea} sobre {len(comentarios)} comentarios...")
+        pipeline_pt = pipeline(tarea, model=modelo_id, device=-1)
+        pipeline_onnx = cargar_pipeline_onnx(tarea, directorio, cuantizado=not args.fp32)
+        reporte = validar_backend(pipeline_pt, pipeline_onnx, comentarios, tarea)
+        print(f"   📈 Acuerdo con PyTorch: {reporte['acuerdo']}%")
+        print(f"   📊 Diferencia media: {reporte['diferencia_media']}")
+
+
+if __name__ == '__main__':
+    main()
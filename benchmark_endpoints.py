@@ -0,0 +1,300 @@
+"""
+🏁 Benchmark de los endpoints de la API sobre datasets sintéticos
+Mide latencia (p50/p95), throughput y RSS pico de cada ruta /api (dashboard
+con y sin filtros, carga y rutas de un análisis cargado), de /metrics y de las
+rutas de salud, para varios tamaños de dataset; no mide las páginas HTML ni
+/admin/profiles. Los datasets salen de generador_reportes.
+Cada tamaño se ejecuta en un proceso aparte (RSS pico independiente) con el
+cliente de pruebas de Flask, sin servidor ni red
+
+Uso:
+    python benchmark_endpoints.py --sizes 10000,100000 --output benchmark.json
+    python benchmark_endpoints.py --compare benchmark_main.json --output benchmark_rama.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+# Tamaños por defecto (filas)
+DEFAULT_SIZES = (10000, 100000, 1000000, 10000000)
+
+# Peticiones medidas por ruta (tras una petición en frío)
+BENCHMARK_REPEATS = int(os.environ.get('BENCHMARK_REPEATS', 20))
+
+# Cargas medidas por tamaño y tamaño máximo que se sube (la carga de 10M filas tarda horas)
+UPLOAD_REPEATS = int(os.environ.get('BENCHMARK_UPLOAD_REPEATS', 3))
+UPLOAD_MAX_ROWS = int(os.environ.get('BENCHMARK_UPLOAD_MAX_ROWS', 1000000))
+
+# Filtros de las rutas filtradas (dentro del rango 2020-2025 que aceptan)
+FILTERS = 'categoria=Salud&urgencia=Urgente&fecha_inicio=2024-03-01&fecha_fin=2024-09-30'
+
+DASHBOARD_ROUTES = [
+    '/api/metrics',
+    '/api/category-distribution',
+    '/api/urgency-distribution',
+    '/api/priority-cases?limit=20',
+    '/api/temporal-trends',
+    '/api/dashboard-problems',
+    f'/api/filtered-data?{FILTERS}',
+    f'/api/filtered-metrics?{FILTERS}',
+    f'/api/filtered-priority-cases?{FILTERS}',
+    f'/api/filtered-category-distribution?{FILTERS}',
+    f'/api/filtered-urgency-distribution?{FILTERS}',
+    f'/api/filtered-temporal-trends?{FILTERS}',
+    '/metrics',
+    '/health/live',
+    '/health/ready',
+]
+
+# Rutas de un análisis cargado ({id} se sustituye por el ID del análisis):
+# (método, ruta, cuerpo JSON)
+ANALYSIS_ROUTES = [
+    ('GET', '/api/custom-metrics/{id}', None),
+    ('GET', '/api/analysis-status/{id}', None),
+    ('POST', '/api/generate-report', {'analysis_id': '{id}', 'report_type': 'full'}),
+]
+
+
+def percentile(values, q):
+    """Percentil ``q`` (0-100) con interpolación lineal"""
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    position = (len(ordered) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def peak_rss_mb():
+    """RSS pico del proceso en MB (None si no se puede medir)"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reporta KB; macOS, bytes
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def summarize_latencies(latencies_ms, rows, cold_ms=None, status=None):
+    """p50/p95/media en ms, peticiones por segundo y filas por segundo"""
+    total_s = sum(latencies_ms) / 1000
+    requests_per_s = len(latencies_ms) / total_s if total_s > 0 else None
+    return {
+        'repeats': len(latencies_ms),
+        'status': status,
+        'cold_ms': round(cold_ms, 3) if cold_ms is not None else None,
+        'p50_ms': round(percentile(latencies_ms, 50), 3),
+        'p95_ms': round(percentile(latencies_ms, 95), 3),
+        'mean_ms': round(total_s * 1000 / len(latencies_ms), 3),
+        'requests_per_s': round(requests_per_s, 2) if requests_per_s else None,
+        'rows_per_s': round(requests_per_s * rows) if requests_per_s else None
+    }
+
+
+def time_request(client, route, repeats, rows, method='GET', body=None):
+    """Medir una ruta: una petición en frío y ``repeats`` en caliente"""
+    started = time.perf_counter()
+    response = client.open(route, method=method, json=body)
+    cold_ms = (time.perf_counter() - started) * 1000
+    latencies = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        response = client.open(route, method=method, json=body)
+        latencies.append((time.perf_counter() - started) * 1000)
+    return summarize_latencies(latencies, rows, cold_ms, response.status_code)
+
+
+def time_upload(client, file_path, repeats, rows):
+    """Medir el pipeline de carga (guardar, leer, normalizar, analizar)"""
+    latencies = []
+    analysis_id = None
+    status = None
+    for _ in range(repeats):
+        with open(file_path, 'rb') as f:
+            started = time.perf_counter()
+            response = client.post('/api/upload-dataset', data={'file': (f, os.path.basename(file_path))},
+                                   content_type='multipart/form-data')
+            latencies.append((time.perf_counter() - started) * 1000)
+        status = response.status_code
+        if status == 200:
+            analysis_id = response.get_json()['analysis_id']
+    result = summarize_latencies(latencies, rows, status=status)
+
+    # Una carga adicional con desglose por etapa (tracemalloc activo: no se cuenta en la latencia)
+    with open(file_path, 'rb') as f:
+        response = client.post('/api/upload-dataset?timings=true',
+                               data={'file': (f, os.path.basename(file_path))},
+                               content_type='multipart/form-data')
+    if response.status_code == 200:
+        result['timings'] = response.get_json().get('timings')
+    return result, analysis_id
+
+
+def run_size(rows, repeats, upload_repeats, upload_max_rows, upload_format, workdir):
+    """Benchmark de un tamaño de dataset en el proceso actual"""
+    os.environ['WARMUP_ON_START'] = 'false'
+    import numpy as np
+    import app as web
+    from generador_reportes import escribir_reportes, generar_dataframe, MAX_FILAS_EXCEL
+
+    web.app.config['UPLOAD_FOLDER'] = workdir
+    # El límite de 50 MB de producción impediría subir los datasets grandes
+    web.app.config['MAX_CONTENT_LENGTH'] = None
+    result = {'rows': rows, 'routes': {}}
+
+    started = time.perf_counter()
+    dataset = generar_dataframe(rows, semilla=rows)
+    # En los datos procesados la prioridad la asigna el modelo; aquí, aleatoria y reproducible
+    dataset['Prioridad'] = np.random.default_rng(rows).integers(20, 100, rows)
+    web.analyzer.set_data(dataset)
+    result['generate_s'] = round(time.perf_counter() - started, 3)
+    result['rss_after_generate_mb'] = peak_rss_mb()
+
+    client = web.app.test_client()
+    for route in DASHBOARD_ROUTES:
+        print(f"⏱️  {rows} filas: GET {route}")
+        result['routes'][f'GET {route}'] = time_request(client, route, repeats, rows)
+
+    if rows > upload_max_rows or (upload_format == 'xlsx' and rows > MAX_FILAS_EXCEL):
+        result['upload'] = {'skipped': f'más de {upload_max_rows} filas' if rows > upload_max_rows
+                            else 'Excel admite como máximo 1048575 filas'}
+    else:
+        file_path = os.path.join(workdir, f'benchmark_{rows}.{upload_format}')
+        # Archivo con el esquema y los sesgos de los reportes reales
+        escribir_reportes(file_path, rows, semilla=rows)
+        result['upload_file_mb'] = round(os.path.getsize(file_path) / (1024 * 1024), 2)
+        print(f"⏱️  {rows} filas: POST /api/upload-dataset")
+        result['upload'], analysis_id = time_upload(client, file_path, upload_repeats, rows)
+        if analysis_id:
+            for method, route, body in ANALYSIS_ROUTES:
+                if body is not None:
+                    body = {key: value.format(id=analysis_id) for key, value in body.items()}
+                result['routes'][f'{method} {route}'] = time_request(client, route.format(id=analysis_id),
+                                                                     repeats, rows, method, body)
+
+    result['peak_rss_mb'] = peak_rss_mb()
+    return result
+
+
+def run_size_subprocess(rows, args, workdir):
+    """Ejecutar un tamaño en un proceso nuevo y leer su resultado"""
+    result_path = os.path.join(workdir, f'result_{rows}.json')
+    command = [sys.executable, os.path.abspath(__file__), '--worker', '--sizes', str(rows),
+               '--repeats', str(args.repeats), '--upload-repeats', str(args.upload_repeats),
+               '--upload-max-rows', str(args.upload_max_rows), '--upload-format', args.upload_format,
+               '--result-file', result_path]
+    completed = subprocess.run(command, cwd=os.path.dirname(os.path.abspath(__file__)),
+                               stdout=None if args.verbose else subprocess.DEVNULL)
+    if completed.returncode != 0 or not os.path.exists(result_path):
+        return {'rows': rows, 'error': f'el proceso terminó con código {completed.returncode}'}
+    with open(result_path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def git_revision():
+    """Rama y commit actuales (None fuera de un repositorio git)"""
+    def git(*command):
+        try:
+            return subprocess.run(['git', *command], capture_output=True, text=True,
+                                  cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+        except OSError:
+            return None
+    return git('rev-parse', '--abbrev-ref', 'HEAD'), git('rev-parse', '--short', 'HEAD')
+
+
+def compare_reports(baseline, current):
+    """Cociente de p50 (actual / referencia) por tamaño y ruta"""
+    comparison = {}
+    for size, result in current['sizes'].items():
+        base = baseline.get('sizes', {}).get(size)
+        if not base:
+            continue
+        pairs = [(route, base['routes'].get(route), stats) for route, stats in result.get('routes', {}).items()]
+        pairs.append(('POST /api/upload-dataset', base.get('upload'), result.get('upload')))
+        for route, before, after in pairs:
+            if before and after and before.get('p50_ms') and after.get('p50_ms'):
+                comparison.setdefault(size, {})[route] = round(after['p50_ms'] / before['p50_ms'], 3)
+    return comparison
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de los endpoints de la API")
+    parser.add_argument('--sizes', default=','.join(str(size) for size in DEFAULT_SIZES),
+                        help="Tamaños de dataset separados por comas")
+    parser.add_argument('--repeats', type=int, default=BENCHMARK_REPEATS)
+    parser.add_argument('--upload-repeats', type=int, default=UPLOAD_REPEATS)
+    parser.add_argument('--upload-max-rows', type=int, default=UPLOAD_MAX_ROWS)
+    parser.add_argument('--upload-format', choices=['csv', 'xlsx'], default='csv')
+    parser.add_argument('--output', default='benchmark_results.json')
+    parser.add_argument('--label', help="Nombre del reporte (por defecto, la rama de git)")
+    parser.add_argument('--compare', help="Reporte JSON de referencia para comparar p50")
+    parser.add_argument('--verbose', action='store_true', help="Mostrar la salida de la aplicación")
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--result-file', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.sizes.split(',') if size.strip()]
+
+    if args.worker:
+        with tempfile.TemporaryDirectory(prefix='benchmark_') as workdir:
+            result = run_size(sizes[0], args.repeats, args.upload_repeats, args.upload_max_rows,
+                              args.upload_format, workdir)
+        with open(args.result_file, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False)
+        return
+
+    branch, commit = git_revision()
+    report = {
+        'label': args.label or branch,
+        'git_branch': branch,
+        'git_commit': commit,
+        'created_at': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'config': {'repeats': args.repeats, 'upload_repeats': args.upload_repeats,
+                   'upload_max_rows': args.upload_max_rows, 'upload_format': args.upload_format,
+                   'filters': FILTERS},
+        'sizes': {}
+    }
+
+    with tempfile.TemporaryDirectory(prefix='benchmark_') as workdir:
+        for rows in sizes:
+            print(f"🏁 Benchmark con {rows} filas...")
+            started = time.perf_counter()
+            result = run_size_subprocess(rows, args, workdir)
+            report['sizes'][str(rows)] = result
+            if 'error' in result:
+                print(f"❌ {rows} filas: {result['error']}")
+                continue
+            slowest = max(result['routes'].items(), key=lambda item: item[1]['p50_ms'])
+            upload = result.get('upload', {})
+            print(f"   ✓ {time.perf_counter() - started:.1f} s, RSS pico {result['peak_rss_mb']} MB, "
+                  f"ruta más lenta {slowest[0]} (p50 {slowest[1]['p50_ms']} ms), "
+                  f"carga p50 {upload.get('p50_ms', upload.get('skipped'))}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        report['compared_to'] = baseline.get('label')
+        report['p50_ratio'] = compare_reports(baseline, report)
+        for size, ratios in report['p50_ratio'].items():
+            regressions = {route: ratio for route, ratio in ratios.items() if ratio > 1.1}
+            print(f"📊 {size} filas vs {baseline.get('label')}: "
+                  f"{len(regressions)} rutas más de 10% más lentas {regressions or ''}")
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"📄 Reporte guardado: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
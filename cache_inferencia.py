@@ -0,0 +1,147 @@
+"""
+Caché persistente de inferencia en disco local (SQLite)
+Clave: (modelo, tarea, conjunto de etiquetas, hash del texto normalizado)
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import unicodedata
+
+RUTA_CACHE = os.environ.get('RUTA_CACHE_INFERENCIA', os.path.join('cache_inferencia', 'inferencia.sqlite3'))
+
+# Límite de parámetros por consulta en SQLite
+_MAX_PARAMETROS = 900
+
+
+def normalizar_texto(texto):
+    """
+    Normaliza un texto para la clave de caché (Unicode NFC y espacios)
+    """
+    texto = unicodedata.normalize('NFC', str(texto))
+    return re.sub(r'\s+', ' ', texto).strip()
+
+
+def hash_texto(texto):
+    """
+    Hash SHA-256 del texto normalizado
+    """
+    return hashlib.sha256(normalizar_texto(texto).encode('utf-8')).hexdigest()
+
+
+def identificador_modelo(pipeline_ia):
+    """
+    Identificador del modelo de un pipeline (nombre o ruta local)
+    """
+    modelo = getattr(pipeline_ia, 'model', None)
+    nombre = getattr(modelo, 'name_or_path', None) or getattr(getattr(modelo, 'config', None), '_name_or_path', None)
+    return nombre or type(pipeline_ia).__name__
+
+
+def clave_etiquetas(etiquetas):
+    """
+    Representación estable del conjunto de etiquetas ('' si la tarea no usa etiquetas)
+    """
+    return json.dumps(sorted(etiquetas), ensure_ascii=False) if etiquetas else ''
+
+
+class CacheInferencia:
+    """
+    Resultados de inferencia guardados en SQLite, compartibles entre ejecuciones
+    """
+
+    def __init__(self, ruta=RUTA_CACHE):
+        self.ruta = ruta
+        directorio = os.path.dirname(ruta)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+        with self._conectar() as conexion:
+            conexion.execute("PRAGMA journal_mode=WAL")
+            conexion.execute("""
+                CREATE TABLE IF NOT EXISTS inferencias (
+                    modelo TEXT NOT NULL,
+                    tarea TEXT NOT NULL,
+                    etiquetas TEXT NOT NULL,
+                    hash_texto TEXT NOT NULL,
+                    resultado TEXT NOT NULL,
+                    PRIMARY KEY (modelo, tarea, etiquetas, hash_texto)
+                )
+            """)
+
+    def _conectar(self):
+        return sqlite3.connect(self.ruta, timeout=30)
+
+    def obtener(self, modelo, tarea, etiquetas, hashes):
+        """
+        Resultados guardados para los hashes dados: {hash: resultado}
+        """
+        hashes = list(dict.fromkeys(hashes))
+        encontrados = {}
+        etiquetas = clave_etiquetas(etiquetas)
+        with self._conectar() as conexion:
+            for inicio in range(0, len(hashes), _MAX_PARAMETROS):
+                bloque = hashes[inicio:inicio + _MAX_PARAMETROS]
+                filas = conexion.execute(
+                    "SELECT hash_texto, resultado FROM inferencias "
+                    "WHERE modelo = ? AND tarea = ? AND etiquetas = ? "
+                    f"AND hash_texto IN ({','.join('?' * len(bloque))})",
+                    [modelo, tarea, etiquetas, *bloque]
+                ).fetchall()
+                encontrados.update((h, json.loads(r)) for h, r in filas)
+        return encontrados
+
+    def guardar(self, modelo, tarea, etiquetas, resultados):
+        """
+        Guarda resultados {hash: resultado} (serializables a JSON)
+        """
+        if not resultados:
+            return
+        etiquetas = clave_etiquetas(etiquetas)
+        with self._conectar() as conexion:
+            conexion.executemany(
+                "INSERT OR REPLACE INTO inferencias VALUES (?, ?, ?, ?, ?)",
+                [(modelo, tarea, etiquetas, h, json.dumps(r, ensure_ascii=False)) for h, r in resultados.items()]
+            )
+
+    def tamano(self):
+        """
+        Número de resultados guardados
+        """
+        with self._conectar() as conexion:
+            return conexion.execute("SELECT COUNT(*) FROM inferencias").fetchone()[0]
+
+
+def inferir_unicos(textos, inferir, cache=None, modelo='', tarea='', etiquetas=None, es_valido=None):
+    """
+    Ejecuta ``inferir`` solo sobre los textos únicos que no están en caché
+
+    ``textos`` es una lista de textos; ``inferir`` recibe una lista de textos
+    únicos y devuelve un resultado por texto. Los resultados se reparten a todas
+    las filas con el mismo texto normalizado. Solo se guardan en caché los
+    resultados para los que ``es_valido`` devuelve True (por defecto, todos).
+    Devuelve ``(resultados_por_fila, estadisticas)``.
+    """
+    hashes = [hash_texto(t) for t in textos]
+    unicos = {}
+    for h, t in zip(hashes, textos):
+        unicos.setdefault(h, t)
+
+    resultados = cache.obtener(modelo, tarea, etiquetas, list(unicos)) if cache else {}
+    pendientes = [h for h in unicos if h not in resultados]
+
+    if pendientes:
+        nuevos = dict(zip(pendientes, inferir([unicos[h] for h in pendientes])))
+        resultados.update(nuevos)
+        if cache:
+            cache.guardar(modelo, tarea, etiquetas,
+                          {h: r for h, r in nuevos.items() if es_valido is None or es_valido(r)})
+
+    estadisticas = {
+        'filas': len(textos),
+        'unicos': len(unicos),
+        'en_cache': len(unicos) - len(pendientes),
+        'inferidos': len(pendientes)
+    }
+    return [resultados[h] for h in hashes], estadisticas
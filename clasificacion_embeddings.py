@@ -0,0 +1,150 @@
+"""
+Clasificación por similitud de embeddings (alternativa rápida al zero-shot)
+Cada comentario se codifica una sola vez con un codificador de oraciones y se
+compara con los embeddings de las etiquetas, calculados una vez y guardados
+"""
+
+import inspect
+import types
+
+import numpy as np
+
+from inferencia_ia import (longitudes_tokens, lotes_por_longitud, CATEGORIAS_PROBLEMA,
+                          PLANTILLA_HIPOTESIS, TAMANO_LOTE)
+
+# Temperatura inicial del softmax sobre similitudes coseno (se ajusta con calibrar)
+TEMPERATURA_INICIAL = 0.05
+
+# Temperaturas candidatas para la calibración
+TEMPERATURAS = np.geomspace(0.005, 1.0, 60)
+
+# Longitud máxima en tokens al codificar
+MAX_TOKENS = 512
+
+
+def softmax_temperatura(similitudes, temperatura):
+    """
+    Probabilidad por etiqueta: softmax de las similitudes divididas por la temperatura
+    """
+    x = similitudes / temperatura
+    x = x - x.max(axis=1, keepdims=True)
+    e = np.exp(x)
+    return e / e.sum(axis=1, keepdims=True)
+
+
+class ClasificadorEmbeddings:
+    """
+    Clasificador por similitud coseno entre comentario y etiqueta
+
+    Se usa en lugar del pipeline zero-shot en ``clasificar_comentarios_lote``
+    (mismo formato ``(etiqueta, confianza)``, deduplicación y caché). La
+    confianza es un softmax con temperatura sobre las similitudes, de modo que
+    las probabilidades suman 1 entre etiquetas como en el zero-shot.
+    """
+
+    def __init__(self, modelo=None, temperatura=TEMPERATURA_INICIAL):
+        import torch
+        from transformers import AutoModel, AutoTokenizer
+        from modelos_ia import resolver_modelo
+
+        self.torch = torch
+        self.nombre_modelo = modelo or resolver_modelo('feature-extraction')
+        self.tokenizer = AutoTokenizer.from_pretrained(self.nombre_modelo)
+        self.codificador = AutoModel.from_pretrained(self.nombre_modelo)
+        self.codificador.eval()
+        # Algunos codificadores (p. ej. DistilBERT) no aceptan token_type_ids
+        self._parametros_modelo = set(inspect.signature(self.codificador.forward).parameters)
+        self.max_tokens = min(MAX_TOKENS, getattr(self.tokenizer, 'model_max_length', MAX_TOKENS) or MAX_TOKENS)
+        self.temperatura = temperatura
+        self._etiquetas_cache = {}
+
+    @property
+    def model(self):
+        # La temperatura cambia la confianza: forma parte del identificador de caché
+        return types.SimpleNamespace(name_or_path=f"{self.nombre_modelo}@embeddings-t{self.temperatura:.4f}")
+
+    def codificar(self, textos, tamano_lote=TAMANO_LOTE):
+        """
+        Embeddings normalizados (promedio de tokens) de cada texto
+        """
+        textos = list(textos)
+        if not textos:
+            return np.zeros((0, self.codificador.config.hidden_size), dtype=np.float32)
+
+        embeddings = [None] * len(textos)
+        for lote in lotes_por_longitud(longitudes_tokens(self, textos), tamano_lote):
+            entradas = self.tokenizer([textos[i] for i in lote], padding=True, truncation=True,
+                                      max_length=self.max_tokens, return_tensors='pt')
+            if 'token_type_ids' not in self._parametros_modelo:
+                entradas.pop('token_type_ids', None)
+            with self.torch.no_grad():
+                ocultos = self.codificador(**entradas).last_hidden_state
+            mascara = entradas['attention_mask'].unsqueeze(-1).to(ocultos.dtype)
+            promedio = (ocultos * mascara).sum(dim=1) / mascara.sum(dim=1).clamp(min=1)
+            promedio = self.torch.nn.functional.normalize(promedio, dim=1)
+            for i, vector in zip(lote, promedio.numpy()):
+                embeddings[i] = vector
+        return np.vstack(embeddings)
+
+    def embeddings_etiquetas(self, etiquetas, plantilla=PLANTILLA_HIPOTESIS):
+        """
+        Embeddings de las hipótesis de cada etiqueta (calculados una vez)
+        """
+        clave = (tuple(etiquetas), plantilla)
+        if clave not in self._etiquetas_cache:
+            self._etiquetas_cache[clave] = self.codificar([plantilla.format(e) for e in etiquetas])
+        return self._etiquetas_cache[clave]
+
+    def similitudes(self, textos, etiquetas=CATEGORIAS_PROBLEMA, plantilla=PLANTILLA_HIPOTESIS,
+                    tamano_lote=TAMANO_LOTE):
+        """
+        Matriz de similitud coseno (textos × etiquetas)
+        """
+        return self.codificar(textos, tamano_lote) @ self.embeddings_etiquetas(etiquetas, plantilla).T
+
+    def clasificar_textos(self, textos, etiquetas=CATEGORIAS_PROBLEMA, plantilla=PLANTILLA_HIPOTESIS,
+                          tamano_lote=TAMANO_LOTE):
+        """
+        [(etiqueta, confianza), ...] de cada texto
+        """
+        etiquetas = list(etiquetas)
+        if not textos:
+            return []
+        probabilidades = softmax_temperatura(self.similitudes(textos, etiquetas, plantilla, tamano_lote),
+                                             self.temperatura)
+        ganadores = probabilidades.argmax(axis=1)
+        return [(etiquetas[g], float(p[g])) for g, p in zip(ganadores, probabilidades)]
+
+    def calibrar(self, textos, etiquetas_reales=None, confianzas_referencia=None,
+                 etiquetas=CATEGORIAS_PROBLEMA, plantilla=PLANTILLA_HIPOTESIS, tamano_lote=TAMANO_LOTE):
+        """
+        Ajusta la temperatura para que la confianza sea comparable con el zero-shot
+
+        Con ``etiquetas_reales`` se elige la temperatura que minimiza la
+        log-verosimilitud negativa de la etiqueta correcta (confianza
+        calibrada). Con ``confianzas_referencia`` (p. ej. las ``Confianza_IA``
+        del zero-shot para los mismos textos) se elige la que iguala la
+        confianza media. La temperatura no cambia la etiqueta ganadora.
+        Devuelve la temperatura elegida.
+        """
+        etiquetas = list(etiquetas)
+        similitudes = self.similitudes(list(textos), etiquetas, plantilla, tamano_lote)
+
+        if etiquetas_reales is not None:
+            indices = np.array([etiquetas.index(e) if e in etiquetas else -1 for e in etiquetas_reales])
+            conocidas = indices >= 0
+            if not conocidas.any():
+                raise ValueError("Ninguna etiqueta real coincide con las etiquetas del clasificador")
+            perdidas = [
+                -np.mean(np.log(softmax_temperatura(similitudes[conocidas], t)[np.arange(conocidas.sum()),
+                                                                              indices[conocidas]] + 1e-12))
+                for t in TEMPERATURAS
+            ]
+        elif confianzas_referencia is not None:
+            objetivo = float(np.mean(confianzas_referencia))
+            perdidas = [abs(softmax_temperatura(similitudes, t).max(axis=1).mean() - objetivo) for t in TEMPERATURAS]
+        else:
+            raise ValueError("calibrar necesita etiquetas_reales o confianzas_referencia")
+
+        self.temperatura = float(TEMPERATURAS[int(np.argmin(perdidas))])
+        return self.temperatura
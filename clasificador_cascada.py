@@ -0,0 +1,124 @@
+"""
+Clasificación en cascada de comentarios
+Nivel 1: léxico de palabras clave; nivel 2: modelo zero-shot solo para
+los comentarios ambiguos
+"""
+
+import numpy as np
+import pandas as pd
+
+from inferencia_ia import (clasificar_comentarios_lote, comentarios_validos,
+                           CATEGORIAS_PROBLEMA, PLANTILLA_HIPOTESIS, TAMANO_LOTE)
+from keyword_lexicon import CATEGORY_KEYWORDS
+
+# Variantes frecuentes en los reportes que se suman al léxico compartido
+VARIANTES_CATEGORIA = {
+    'Educación': ['biblioteca'],
+    'Seguridad': ['policial', 'peligro'],
+    'Medio Ambiente': ['río', 'reciclaje']
+}
+PALABRAS_CATEGORIA = {
+    categoria: palabras + VARIANTES_CATEGORIA.get(categoria, [])
+    for categoria, palabras in CATEGORY_KEYWORDS.items()
+}
+
+# Margen mínimo entre la primera y la segunda opción para aceptar el nivel de palabras clave
+MARGEN_CASCADA = 0.5
+
+# Coincidencias de palabras clave necesarias para llegar a confianza 1: con
+# menos, la confianza se reduce en proporción, de modo que una sola palabra
+# suelta (confianza 1/3) no basta para saltarse el modelo zero-shot
+ACIERTOS_CONFIANZA_PLENA = 3
+
+NIVEL_PALABRAS = 'palabras_clave'
+NIVEL_ZERO_SHOT = 'zero_shot'
+
+
+def margen_puntajes(puntajes, total_minimo=0):
+    """
+    Etiqueta ganadora, confianza y margen (primera - segunda) de una matriz de puntajes
+
+    Los puntajes de cada fila se dividen por su suma, o por ``total_minimo``
+    si es mayor (así pocas coincidencias dan confianza baja); las filas sin
+    puntaje tienen confianza y margen 0.
+    """
+    totales = np.maximum(puntajes.sum(axis=1, keepdims=True), total_minimo)
+    proporciones = np.divide(puntajes, totales, out=np.zeros_like(puntajes, dtype=float), where=totales > 0)
+    ordenados = np.sort(proporciones, axis=1)
+    segunda = ordenados[:, -2] if proporciones.shape[1] > 1 else 0.0
+    return proporciones.argmax(axis=1), ordenados[:, -1], ordenados[:, -1] - segunda
+
+
+def puntajes_palabras_clave(comentarios, etiquetas, lexico=PALABRAS_CATEGORIA):
+    """
+    Número de palabras clave de cada etiqueta presentes en cada comentario
+    """
+    texto = comentarios.astype(str).str.lower()
+    columnas = []
+    for etiqueta in etiquetas:
+        palabras = lexico.get(etiqueta, [])
+        conteo = sum((texto.str.contains(p, regex=False) for p in palabras), pd.Series(0, index=texto.index))
+        columnas.append(conteo.to_numpy(dtype=float))
+    return np.column_stack(columnas) if columnas else np.zeros((len(texto), 0))
+
+
+def clasificar_en_cascada(comentarios, clasificador=None, etiquetas=CATEGORIAS_PROBLEMA,
+                          margen=MARGEN_CASCADA, plantilla=PLANTILLA_HIPOTESIS, tamano_lote=TAMANO_LOTE,
+                          cache=None, obtener_clasificador=None):
+    """
+    Clasifica comentarios resolviendo primero los casos claros con niveles baratos
+
+    Un comentario se acepta en el nivel de palabras clave cuando la diferencia
+    entre la confianza de la primera y la segunda etiqueta es al menos
+    ``margen``; la confianza se escala por el número de coincidencias (ver
+    ``ACIERTOS_CONFIANZA_PLENA``) para ser comparable con la del zero-shot.
+    El resto pasa al modelo zero-shot; sin ``clasificador`` los ambiguos se
+    quedan con la etiqueta de palabras clave. ``obtener_clasificador()`` (p. ej.
+    ``lambda: registro['clasificador']``) permite cargar el modelo solo cuando
+    quedan comentarios ambiguos. Devuelve ``(resultado, reporte)``: un DataFrame con
+    ``Categoria_IA``, ``Confianza_IA`` y ``Nivel_IA``, y la fracción de filas
+    resuelta por cada nivel.
+    """
+    comentarios = pd.Series(comentarios)
+    etiquetas = list(etiquetas)
+    resultado = pd.DataFrame({
+        'Categoria_IA': "No clasificado",
+        'Confianza_IA': 0.0,
+        'Nivel_IA': None
+    }, index=comentarios.index)
+
+    validos = comentarios_validos(comentarios)
+    pendientes = comentarios[validos]
+
+    if not pendientes.empty:
+        ganadores, confianzas, margenes = margen_puntajes(puntajes_palabras_clave(pendientes, etiquetas),
+                                                          ACIERTOS_CONFIANZA_PLENA)
+        aceptados = margenes >= margen
+        if not aceptados.all() and clasificador is None and obtener_clasificador is not None:
+            clasificador = obtener_clasificador()
+        # Sin modelo zero-shot, las palabras clave etiquetan todo lo que tenga puntaje
+        if clasificador is None:
+            aceptados |= confianzas > 0
+        indices = pendientes.index[aceptados]
+        resultado.loc[indices, 'Categoria_IA'] = [etiquetas[i] for i in ganadores[aceptados]]
+        resultado.loc[indices, 'Confianza_IA'] = confianzas[aceptados]
+        resultado.loc[indices, 'Nivel_IA'] = NIVEL_PALABRAS
+        pendientes = pendientes[~aceptados]
+
+    if clasificador is not None and not pendientes.empty:
+        zero_shot = clasificar_comentarios_lote(clasificador, pendientes, etiquetas=etiquetas,
+                                                plantilla=plantilla, tamano_lote=tamano_lote, cache=cache)
+        resultado.loc[pendientes.index, ['Categoria_IA', 'Confianza_IA']] = zero_shot[['Categoria_IA', 'Confianza_IA']]
+        resultado.loc[pendientes.index, 'Nivel_IA'] = NIVEL_ZERO_SHOT
+
+    total = int(validos.sum())
+    conteos = resultado.loc[validos, 'Nivel_IA'].value_counts()
+    reporte = {
+        'filas': total,
+        'niveles': {
+            nivel: round(float(conteos.get(nivel, 0)) / total * 100, 2) if total else 0.0
+            for nivel in (NIVEL_PALABRAS, NIVEL_ZERO_SHOT)
+        },
+        'sin_resolver': int(resultado.loc[validos, 'Nivel_IA'].isna().sum())
+    }
+    return resultado, reporte
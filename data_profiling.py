@@ -0,0 +1,130 @@
+"""
+🧮 Perfilado de datasets para calidad de datos
+Huellas de 64 bits por fila y conteo de nulos por columna, calculados una vez
+por versión del dataset y actualizados de forma incremental al agregar filas
+"""
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# Número máximo de perfiles en caché (uno por versión de dataset)
+MAX_CACHED_PROFILES = 32
+
+_profiles = OrderedDict()
+_profiles_lock = threading.Lock()
+# Consultas a la caché de perfiles por resultado
+_cache_stats = {'hit': 0, 'miss': 0}
+
+# Filas de cada bloque perfilado (inicial o agregado) cuya huella se guarda para
+# comprobar, antes de reutilizar el perfil, que df sigue siendo el mismo dataset
+SAMPLED_ROWS = 64
+
+
+def row_fingerprints(df):
+    """Huella de 64 bits de cada fila (independiente del índice)"""
+    if df.empty:
+        return np.empty(0, dtype=np.uint64)
+    return pd.util.hash_pandas_object(df, index=False).to_numpy(dtype=np.uint64)
+
+
+def _sample_positions(n_rows, size=SAMPLED_ROWS):
+    """Hasta ``size`` posiciones repartidas en n_rows filas (incluye la primera y la última)"""
+    if n_rows == 0:
+        return np.empty(0, dtype=np.int64)
+    return np.unique(np.linspace(0, n_rows - 1, min(size, n_rows)).astype(np.int64))
+
+
+class DatasetProfile:
+    """Perfil de un dataset: huellas de filas únicas y nulos por columna
+
+    Las filas duplicadas se detectan por huella, por lo que una colisión de
+    64 bits contaría como duplicado; en la práctica es despreciable. Guarda
+    además la huella de una muestra de filas de cada bloque perfilado para
+    reconocer el dataset sin volver a recorrerlo entero.
+    """
+
+    def __init__(self, df):
+        self.columns = list(df.columns)
+        self.row_count = 0
+        self.null_counts = pd.Series(0, index=df.columns, dtype='int64')
+        self.unique_fingerprints = np.empty(0, dtype=np.uint64)
+        self.sample_positions = np.empty(0, dtype=np.int64)
+        self.sample_fingerprints = np.empty(0, dtype=np.uint64)
+        self.append(df)
+
+    def append(self, new_rows):
+        """Actualizar el perfil con filas agregadas al final del dataset"""
+        if list(new_rows.columns) != self.columns:
+            raise ValueError("Las filas agregadas no tienen las mismas columnas que el perfil")
+
+        self.null_counts = self.null_counts.add(new_rows.isnull().sum(), fill_value=0).astype('int64')
+        fingerprints = row_fingerprints(new_rows)
+        positions = _sample_positions(len(new_rows))
+        self.sample_positions = np.concatenate([self.sample_positions, positions + self.row_count])
+        self.sample_fingerprints = np.concatenate([self.sample_fingerprints, fingerprints[positions]])
+        self.unique_fingerprints = np.union1d(self.unique_fingerprints, fingerprints)
+        self.row_count += len(new_rows)
+        return self
+
+    @property
+    def missing_cells(self):
+        return int(self.null_counts.sum())
+
+    @property
+    def duplicate_rows(self):
+        return self.row_count - len(self.unique_fingerprints)
+
+    def matches(self, df):
+        """Indica si el perfil describe un prefijo de df
+
+        Exige las mismas columnas, al menos las filas perfiladas y la misma
+        huella en las filas muestreadas: otro archivo con el mismo encabezado
+        no reutiliza el perfil.
+        """
+        if list(df.columns) != self.columns or len(df) < self.row_count:
+            return False
+        return np.array_equal(row_fingerprints(df.iloc[self.sample_positions]), self.sample_fingerprints)
+
+
+def get_dataset_profile(df, key=None):
+    """Obtener el perfil de df, reutilizando el guardado para la misma versión
+
+    ``key`` identifica la versión del dataset (por ejemplo el ID de análisis).
+    Si el perfil en caché tiene menos filas que df, se actualiza solo con las
+    filas nuevas; si cambiaron las columnas, se eliminaron filas o las filas
+    muestreadas no coinciden, se recalcula.
+    Sin ``key`` el perfil se calcula sin guardarlo.
+    """
+    if key is None:
+        return DatasetProfile(df)
+
+    with _profiles_lock:
+        profile = _profiles.get(key)
+        if profile is not None and profile.matches(df):
+            _cache_stats['hit'] += 1
+            if len(df) > profile.row_count:
+                profile.append(df.iloc[profile.row_count:])
+            _profiles.move_to_end(key)
+            return profile
+
+        _cache_stats['miss'] += 1
+        profile = DatasetProfile(df)
+        _profiles[key] = profile
+        while len(_profiles) > MAX_CACHED_PROFILES:
+            _profiles.popitem(last=False)
+        return profile
+
+
+def profile_cache_stats():
+    """Aciertos y fallos de la caché de perfiles: {'hit': n, 'miss': n}"""
+    with _profiles_lock:
+        return dict(_cache_stats)
+
+
+def invalidate_dataset_profile(key):
+    """Descartar el perfil guardado para una versión de dataset"""
+    with _profiles_lock:
+        _profiles.pop(key, None)
@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+Generador determinista de reportes ciudadanos sintéticos
+Produce datasets del tamaño que se quiera con el esquema real (Edad, Género,
+Comentario, Atención previa del gobierno, ...) y sesgos configurables:
+distribuciones de categoría, ciudad y urgencia, plantillas de comentarios con
+duplicación controlada, rango de fechas y tasas de nulos y filas duplicadas.
+Se genera y escribe por bloques, así que la memoria no crece con el tamaño
+
+Uso:
+    python generador_reportes.py --registros 1000000 --salida reportes_1m.csv
+    python generador_reportes.py --registros 200000 --salida reportes.xlsx --semilla 7 \\
+        --categorias "Salud=0.4,Seguridad=0.3,Educación=0.2,Medio Ambiente=0.1" --tasa-duplicados 0.02
+    python generador_reportes.py --registros 10000000 --salida reportes.parquet --config perfil.json
+"""
+
+import argparse
+import copy
+import gzip
+import json
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# Filas por bloque: fija, para que la salida dependa solo de la semilla
+TAMANO_BLOQUE = 100000
+
+# Filas de datos que admite una hoja de Excel (la primera es el encabezado)
+MAX_FILAS_EXCEL = 1048575
+
+COLUMNAS = [
+    'ID', 'Nombre', 'Edad', 'Género', 'Ciudad', 'Comentario', 'Categoría del problema',
+    'Nivel de urgencia', 'Fecha del reporte', 'Acceso a internet', 'Atención previa del gobierno',
+    'Zona rural'
+]
+
+# Perfil por defecto, calibrado con dataset.csv (nulos, edades, fechas) y con
+# ciudades sesgadas hacia las más pobladas
+CONFIG_POR_DEFECTO = {
+    'categorias': {'Seguridad': 0.28, 'Salud': 0.27, 'Educación': 0.24, 'Medio Ambiente': 0.21},
+    'ciudades': {
+        'Bogotá': 0.30, 'Medellín': 0.15, 'Cali': 0.13, 'Barranquilla': 0.10, 'Cartagena': 0.08,
+        'Bucaramanga': 0.06, 'Cúcuta': 0.06, 'Pereira': 0.05, 'Santa Marta': 0.04, 'Manizales': 0.03
+    },
+    'generos': {'F': 0.34, 'M': 0.33, 'Otro': 0.33},
+    'nombres': ['Valentina', 'Laura', 'Sofía', 'María', 'Ana', 'Juan', 'Pedro', 'Carlos', 'Camilo', 'Jorge'],
+    # Probabilidad de "Urgente" por categoría (las que falten usan 'urgencia')
+    'urgencia': 0.5,
+    'urgencia_por_categoria': {},
+    'edad': {'media': 47.5, 'desviacion': 19, 'minimo': 15, 'maximo': 80},
+    'tasas': {'Acceso a internet': 0.51, 'Atención previa del gobierno': 0.495, 'Zona rural': 0.49},
+    'fechas': {'desde': '2023-01-01', 'hasta': '2024-12-01'},
+    'nulos': {'Edad': 0.068, 'Género': 0.046, 'Ciudad': 0.014, 'Comentario': 0.064},
+    # Fracción de filas que repiten una fila anterior del bloque (con otro ID)
+    'tasa_duplicados': 0.0,
+    'comentarios': {
+        # Fracción de comentarios que son la frase base sin variación
+        'duplicacion': 0.9,
+        # Fracción de comentarios tomados de otra categoría
+        'ruido_categoria': 0.2,
+        'plantillas': {
+            'Seguridad': ['las calles están muy oscuras y peligrosas.', 'queremos más presencia policial.',
+                          'hay robos frecuentes en el barrio.'],
+            'Salud': ['faltan médicos en el centro de salud.', 'falta agua potable en varias casas.',
+                      'no hay medicamentos en el hospital.'],
+            'Educación': ['no hay suficientes escuelas públicas.', 'necesitamos más acceso a internet en la zona.',
+                          'no tenemos centros culturales ni bibliotecas.'],
+            'Medio Ambiente': ['las basuras no se recogen a tiempo.', 'la contaminación del río está aumentando.',
+                               'hay problemas con la recolección de basura.']
+        },
+        # Complementos para las variantes (la variante agrega también un barrio)
+        'complementos': ['desde hace semanas', 'y nadie responde', 'es un problema de todos los días',
+                         'afecta a los niños', 'ya lo reportamos antes', 'cada vez es peor'],
+        'barrios': 500
+    }
+}
+
+
+def _combinar(base, cambios):
+    """Combinar diccionarios anidados (los valores de ``cambios`` tienen prioridad)"""
+    resultado = copy.deepcopy(base)
+    for clave, valor in cambios.items():
+        if isinstance(valor, dict) and isinstance(resultado.get(clave), dict) and clave not in (
+                'categorias', 'ciudades', 'generos', 'plantillas'):
+            resultado[clave] = _combinar(resultado[clave], valor)
+        else:
+            resultado[clave] = copy.deepcopy(valor)
+    return resultado
+
+
+def cargar_config(ruta=None, **cambios):
+    """Perfil de generación: el por defecto, un JSON parcial y cambios puntuales"""
+    config = CONFIG_POR_DEFECTO
+    if ruta:
+        with open(ruta, encoding='utf-8') as f:
+            config = _combinar(config, json.load(f))
+    return _combinar(config, {clave: valor for clave, valor in cambios.items() if valor is not None})
+
+
+def _pesos(distribucion):
+    """Valores y probabilidades normalizadas de un diccionario {valor: peso}"""
+    valores = list(distribucion)
+    pesos = np.array([distribucion[v] for v in valores], dtype=float)
+    if len(valores) == 0 or pesos.sum() <= 0:
+        raise ValueError(f"Distribución vacía o sin pesos positivos: {distribucion}")
+    return np.array(valores, dtype=object), pesos / pesos.sum()
+
+
+def _elegir(rng, distribucion, n):
+    valores, probabilidades = _pesos(distribucion)
+    return valores[rng.choice(len(valores), size=n, p=probabilidades)]
+
+
+def _comentarios(rng, categorias, config):
+    """Comentario por fila: frase base de la categoría, con ruido y variantes"""
+    n = len(categorias)
+    opciones = config['comentarios']
+    plantillas = opciones['plantillas']
+    todas = list(plantillas)
+
+    # Con probabilidad 'ruido_categoria' el comentario sale de otra categoría
+    origen = np.where(rng.random(n) < opciones['ruido_categoria'],
+                      np.array(todas, dtype=object)[rng.integers(0, len(todas), n)], categorias)
+    frases = np.empty(n, dtype=object)
+    for categoria in pd.unique(origen):
+        filas = np.flatnonzero(origen == categoria)
+        lista = np.array(plantillas.get(categoria) or [f'problema de {str(categoria).lower()}.'], dtype=object)
+        frases[filas] = lista[rng.integers(0, len(lista), len(filas))]
+
+    # Variantes casi únicas: frase + complemento + barrio
+    variantes = np.flatnonzero(rng.random(n) >= opciones['duplicacion'])
+    if len(variantes):
+        complementos = np.array(opciones['complementos'] or [''], dtype=object)
+        elegidos = complementos[rng.integers(0, len(complementos), len(variantes))]
+        barrios = rng.integers(1, max(1, opciones['barrios']) + 1, len(variantes))
+        frases[variantes] = [f"{frase.rstrip('.')} {complemento}, barrio {barrio}.".replace('  ', ' ')
+                             for frase, complemento, barrio in zip(frases[variantes], elegidos, barrios)]
+    return frases
+
+
+def generar_bloque(rng, inicio_id, n, config):
+    """DataFrame de ``n`` reportes con IDs desde ``inicio_id``"""
+    categorias = _elegir(rng, config['categorias'], n)
+
+    # Urgencia con probabilidad por categoría
+    probabilidad_urgente = np.full(n, float(config['urgencia']))
+    for categoria, probabilidad in config['urgencia_por_categoria'].items():
+        probabilidad_urgente[categorias == categoria] = probabilidad
+    urgencia = np.where(rng.random(n) < probabilidad_urgente, 'Urgente', 'No urgente').astype(object)
+
+    edad_config = config['edad']
+    edades = np.clip(np.round(rng.normal(edad_config['media'], edad_config['desviacion'], n)),
+                     edad_config['minimo'], edad_config['maximo'])
+
+    desde = pd.Timestamp(config['fechas']['desde'])
+    dias = (pd.Timestamp(config['fechas']['hasta']) - desde).days
+    if dias < 0:
+        raise ValueError(f"Rango de fechas inválido: {config['fechas']}")
+    fechas = (desde + pd.to_timedelta(rng.integers(0, dias + 1, n), unit='D')).strftime('%Y-%m-%d')
+
+    nombres = np.array(config['nombres'], dtype=object)
+    df = pd.DataFrame({
+        'ID': np.arange(inicio_id, inicio_id + n),
+        'Nombre': nombres[rng.integers(0, len(nombres), n)],
+        'Edad': edades,
+        'Género': _elegir(rng, config['generos'], n),
+        'Ciudad': _elegir(rng, config['ciudades'], n),
+        'Comentario': _comentarios(rng, categorias, config),
+        'Categoría del problema': categorias,
+        'Nivel de urgencia': urgencia,
+        'Fecha del reporte': np.asarray(fechas, dtype=object),
+        **{columna: (rng.random(n) < tasa).astype(np.int64) for columna, tasa in config['tasas'].items()}
+    })
+
+    # Nulos por columna
+    for columna, tasa in config['nulos'].items():
+        if tasa > 0 and columna in df.columns:
+            df.loc[rng.random(n) < tasa, columna] = np.nan
+
+    # Filas duplicadas: copian una fila anterior del bloque, conservando su propio ID
+    tasa_duplicados = config['tasa_duplicados']
+    if tasa_duplicados > 0 and n > 1:
+        duplicadas = np.flatnonzero(rng.random(n) < tasa_duplicados)
+        duplicadas = duplicadas[duplicadas > 0]
+        if len(duplicadas):
+            originales = (rng.random(len(duplicadas)) * duplicadas).astype(np.int64)
+            for columna in df.columns.drop('ID'):
+                valores = df[columna].to_numpy(copy=True)
+                valores[duplicadas] = valores[originales]
+                df[columna] = valores
+
+    return df[[c for c in COLUMNAS if c in df.columns]]
+
+
+def generar_bloques(n_registros, config=None, semilla=0):
+    """Bloques de hasta TAMANO_BLOQUE reportes; misma semilla, mismos datos"""
+    config = config or cargar_config()
+    semillas = np.random.SeedSequence(semilla)
+    generados = 0
+    while generados < n_registros:
+        n = min(TAMANO_BLOQUE, n_registros - generados)
+        # Un generador independiente por bloque: el bloque k no depende de cuántos hay
+        rng = np.random.default_rng(semillas.spawn(1)[0])
+        yield generar_bloque(rng, generados + 1, n, config)
+        generados += n
+
+
+def generar_dataframe(n_registros, config=None, semilla=0):
+    """Dataset completo en memoria (para tamaños pequeños y pruebas)"""
+    return pd.concat(list(generar_bloques(n_registros, config, semilla)), ignore_index=True)
+
+
+def _formato(salida, formato=None):
+    if formato:
+        return formato
+    if salida.endswith(('.csv', '.csv.gz')):
+        return 'csv'
+    if salida.endswith('.xlsx'):
+        return 'xlsx'
+    if salida.endswith('.parquet'):
+        return 'parquet'
+    raise ValueError(f"No se reconoce el formato de {salida} (use .csv, .csv.gz, .xlsx o .parquet)")
+
+
+def escribir_reportes(salida, n_registros, config=None, semilla=0, formato=None):
+    """Generar y escribir ``n_registros`` reportes en streaming; devuelve filas escritas"""
+    formato = _formato(salida, formato)
+    bloques = generar_bloques(n_registros, config, semilla)
+    escritas = 0
+
+    if formato == 'csv':
+        abrir = gzip.open if salida.endswith('.gz') else open
+        with abrir(salida, 'wt', encoding='utf-8', newline='') as f:
+            for bloque in bloques:
+                bloque.to_csv(f, index=False, header=escritas == 0)
+                escritas += len(bloque)
+
+    elif formato == 'xlsx':
+        from openpyxl import Workbook
+
+        if n_registros > MAX_FILAS_EXCEL:
+            raise ValueError(f"Excel admite como máximo {MAX_FILAS_EXCEL} filas de datos; use .csv o .parquet")
+        libro = Workbook(write_only=True)
+        hoja = libro.create_sheet()
+        hoja.append(COLUMNAS)
+        for bloque in bloques:
+            for fila in bloque.astype(object).where(bloque.notna(), None).itertuples(index=False):
+                hoja.append([valor.item() if isinstance(valor, np.generic) else valor for valor in fila])
+            escritas += len(bloque)
+        libro.save(salida)
+
+    elif formato == 'parquet':
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("La salida .parquet requiere pyarrow (pip install pyarrow)")
+        escritor = None
+        try:
+            for bloque in bloques:
+                tabla = pa.Table.from_pandas(bloque, preserve_index=False)
+                if escritor is None:
+                    escritor = pq.ParquetWriter(salida, tabla.schema)
+                escritor.write_table(tabla)
+                escritas += len(bloque)
+        finally:
+            if escritor is not None:
+                escritor.close()
+
+    else:
+        raise ValueError(f"Formato no soportado: {formato}")
+
+    return escritas
+
+
+def _distribucion(texto):
+    """'Salud=0.4,Seguridad=0.6' -> {'Salud': 0.4, 'Seguridad': 0.6}"""
+    if texto is None:
+        return None
+    distribucion = {}
+    for parte in texto.split(','):
+        nombre, _, peso = parte.partition('=')
+        distribucion[nombre.strip()] = float(peso) if peso else 1.0
+    return distribucion
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generador determinista de reportes ciudadanos sintéticos")
+    parser.add_argument('--registros', type=int, required=True)
+    parser.add_argument('--salida', required=True, help="Archivo .csv, .csv.gz, .xlsx o .parquet")
+    parser.add_argument('--formato', choices=['csv', 'xlsx', 'parquet'],
+                        help="Formato de salida (por defecto, según la extensión)")
+    parser.add_argument('--semilla', type=int, default=0)
+    parser.add_argument('--config', help="JSON con el perfil (parcial) de generación")
+    parser.add_argument('--categorias', help="Distribución de categorías: 'Salud=0.4,Seguridad=0.6'")
+    parser.add_argument('--ciudades', help="Distribución de ciudades: 'Bogotá=3,Cali=1'")
+    parser.add_argument('--urgencia', type=float, help="Probabilidad de 'Urgente'")
+    parser.add_argument('--desde', help="Primera fecha de reporte (AAAA-MM-DD)")
+    parser.add_argument('--hasta', help="Última fecha de reporte (AAAA-MM-DD)")
+    parser.add_argument('--tasa-nulos', type=float,
+                        help="Tasa de nulos para Edad, Género, Ciudad y Comentario")
+    parser.add_argument('--tasa-duplicados', type=float, help="Fracción de filas duplicadas")
+    parser.add_argument('--duplicacion-comentarios', type=float,
+                        help="Fracción de comentarios idénticos a su frase base (0 = casi todos únicos)")
+    args = parser.parse_args()
+
+    config = cargar_config(
+        args.config,
+        categorias=_distribucion(args.categorias),
+        ciudades=_distribucion(args.ciudades),
+        urgencia=args.urgencia,
+        tasa_duplicados=args.tasa_duplicados,
+        fechas={k: v for k, v in (('desde', args.desde), ('hasta', args.hasta)) if v} or None,
+        nulos=({c: args.tasa_nulos for c in CONFIG_POR_DEFECTO['nulos']}
+               if args.tasa_nulos is not None else None),
+        comentarios=({'duplicacion': args.duplicacion_comentarios}
+                     if args.duplicacion_comentarios is not None else None)
+    )
+
+    print(f"🔄 Generando {args.registros} reportes (semilla {args.semilla}) en {args.salida}...")
+    inicio = time.perf_counter()
+    try:
+        escritas = escribir_reportes(args.salida, args.registros, config, args.semilla, args.formato)
+    except (ValueError, ImportError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    duracion = time.perf_counter() - inicio
+    print(f"✅ {escritas} reportes escritos en {duracion:.1f} s ({escritas / max(duracion, 1e-9):.0f} filas/s)")
+
+
+if __name__ == '__main__':
+    main()
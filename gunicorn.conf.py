@@ -0,0 +1,11 @@
+"""
+⚙️ Configuración de gunicorn
+gunicorn lee este archivo automáticamente desde el directorio de trabajo
+(Procfile, railway.toml y Dockerfile arrancan desde la raíz del proyecto)
+"""
+
+
+def post_worker_init(worker):
+    """Calentar las cachés de cada worker una vez cargada la aplicación"""
+    from app import start_warm_up
+    start_warm_up()
@@ -0,0 +1,39 @@
+"""
+📊 Histograma acumulativo con cubos fijos
+Compartido por las métricas de la web (web_metrics) y por el agrupador de
+lotes del servicio de inferencia, sin que uno dependa del otro
+"""
+
+import bisect
+import threading
+
+
+class Histograma:
+    """
+    Histograma acumulativo con cubos fijos (estilo Prometheus), seguro entre hilos
+    """
+
+    def __init__(self, cubos):
+        self.cubos = tuple(cubos)
+        self.conteos = [0] * (len(self.cubos) + 1)
+        self.suma = 0.0
+        self.total = 0
+        self._lock = threading.Lock()
+
+    def observar(self, valor):
+        with self._lock:
+            self.conteos[bisect.bisect_left(self.cubos, valor)] += 1
+            self.suma += valor
+            self.total += 1
+
+    def resumen(self):
+        """
+        Conteos acumulados por límite superior, suma y total de observaciones
+        """
+        with self._lock:
+            acumulado = 0
+            cubos = {}
+            for limite, conteo in zip(list(self.cubos) + ['+Inf'], self.conteos):
+                acumulado += conteo
+                cubos[str(limite)] = acumulado
+            return {'cubos': cubos, 'suma': self.suma, 'total': self.total}
@@ -0,0 +1,117 @@
+"""
+⏱️ Perfil de tiempo de importación de la aplicación web
+Importa el módulo en un proceso nuevo con ``python -X importtime`` y reporta
+el tiempo por módulo, el total y los módulos opcionales pesados que se
+cargaron al arrancar
+
+Uso:
+    python import_profile.py
+    python import_profile.py --budget-ms 1500 --json perfil_importacion.json
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+# Presupuesto de importación de la app (ms); 0 = sin límite
+IMPORT_BUDGET_MS = float(os.environ.get('IMPORT_BUDGET_MS', 0))
+
+# Módulos que solo debe cargar la funcionalidad que los usa
+DEFERRED_MODULES = ('plotly', 'openpyxl', 'xlrd', 'requests', 'torch', 'transformers')
+
+
+def parse_importtime(output):
+    """Entradas de ``-X importtime``: [{'module', 'self_ms', 'cumulative_ms', 'depth'}, ...]"""
+    entries = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len('import time:'):].split('|')
+            entries.append({
+                'module': name.strip(),
+                'self_ms': int(self_us) / 1000,
+                'cumulative_ms': int(cumulative_us) / 1000,
+                # Dos espacios por nivel de anidamiento
+                'depth': (len(name) - len(name.lstrip(' ')) - 1) // 2
+            })
+        except ValueError:
+            continue
+    return entries
+
+
+def profile_imports(module='app', python=None, cwd=None):
+    """Importar ``module`` en un proceso nuevo y devolver sus entradas de importación"""
+    result = subprocess.run(
+        [python or sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=cwd, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"No se pudo importar {module}: {result.stderr.strip().splitlines()[-1:]}")
+    return parse_importtime(result.stderr)
+
+
+def direct_imports(entries, module):
+    """Entradas importadas directamente por ``module`` (un nivel por debajo)"""
+    end = next((i for i in range(len(entries) - 1, -1, -1)
+                if entries[i]['module'] == module and entries[i]['depth'] == 0), None)
+    if end is None:
+        return []
+    # Las dependencias aparecen antes que el módulo que las importa
+    start = end
+    while start > 0 and entries[start - 1]['depth'] > 0:
+        start -= 1
+    return [e for e in entries[start:end] if e['depth'] == 1]
+
+
+def build_report(entries, module='app', top=15):
+    """Total, importaciones directas más lentas y módulos diferidos cargados al arrancar"""
+    total = next((e['cumulative_ms'] for e in reversed(entries) if e['module'] == module), None)
+    top_level = sorted(direct_imports(entries, module), key=lambda e: e['cumulative_ms'], reverse=True)
+    loaded = {e['module'].split('.')[0] for e in entries}
+    return {
+        'module': module,
+        'total_ms': round(total, 1) if total is not None else None,
+        'modules_imported': len(entries),
+        'top_level': [{'module': e['module'], 'cumulative_ms': round(e['cumulative_ms'], 1)}
+                      for e in top_level[:top]],
+        'deferred_loaded_at_startup': [name for name in DEFERRED_MODULES if name in loaded]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Perfil de tiempo de importación de la app")
+    parser.add_argument('--module', default='app')
+    parser.add_argument('--top', type=int, default=15)
+    parser.add_argument('--runs', type=int, default=3, help="Importaciones a medir (se reporta la mediana)")
+    parser.add_argument('--budget-ms', type=float, default=IMPORT_BUDGET_MS,
+                        help="Falla (código 1) si la importación supera este tiempo")
+    parser.add_argument('--json', help="Archivo JSON para guardar el reporte")
+    args = parser.parse_args()
+
+    reports = [build_report(profile_imports(args.module), args.module, args.top) for _ in range(max(1, args.runs))]
+    reports.sort(key=lambda r: r['total_ms'] or 0)
+    report = reports[len(reports) // 2]
+    report['runs_ms'] = [r['total_ms'] for r in reports]
+
+    print(f"⏱️  import {report['module']}: {report['total_ms']} ms "
+          f"(mediana de {len(reports)}, {report['modules_imported']} módulos)")
+    for entry in report['top_level']:
+        print(f"   {entry['cumulative_ms']:>9.1f} ms  {entry['module']}")
+    if report['deferred_loaded_at_startup']:
+        print(f"⚠️ Módulos diferidos cargados al arrancar: {', '.join(report['deferred_loaded_at_startup'])}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"📄 Reporte guardado: {args.json}")
+
+    if args.budget_ms and (report['total_ms'] or 0) > args.budget_ms:
+        print(f"❌ Presupuesto de importación superado: {report['total_ms']} ms > {args.budget_ms} ms")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""
+🤖 Cliente del servicio local de inferencia (servidor_inferencia.py)
+Envía los textos en micro-lotes con timeout, sin repetir textos iguales, para
+que los workers web usen los modelos sin cargarlos en cada proceso
+"""
+
+import threading
+import time
+
+import requests
+
+
+class InferenceServiceError(Exception):
+    """El servicio de inferencia no respondió o devolvió un error"""
+
+
+class InferenceClient:
+    """Cliente HTTP del servicio de inferencia
+
+    Cada llamada deduplica los textos, los envía en peticiones de hasta
+    ``batch_size`` textos y reparte los resultados en el orden de entrada.
+    ``timeout`` (segundos) aplica a cada petición; ``deadline`` (instante de
+    ``time.monotonic()``) limita la llamada completa: ninguna petición
+    espera más allá de él y, si se agota, se lanza InferenceServiceError.
+    """
+
+    def __init__(self, base_url, timeout=10.0, batch_size=64):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.batch_size = max(1, batch_size)
+        # Una sesión por hilo: las etapas del análisis llaman en paralelo
+        self._local = threading.local()
+
+    def _session(self):
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = requests.Session()
+        return session
+
+    def _post(self, path, payload, timeout=None):
+        try:
+            response = self._session().post(f"{self.base_url}{path}", json=payload,
+                                            timeout=timeout or self.timeout)
+        except requests.RequestException as e:
+            raise InferenceServiceError(f"Servicio de inferencia no disponible: {e}") from e
+        if response.status_code != 200:
+            try:
+                message = response.json().get('error', response.text)
+            except ValueError:
+                message = response.text
+            raise InferenceServiceError(f"{path} respondió {response.status_code}: {message}")
+        return response.json()['resultados']
+
+    def _batched(self, path, texts, deadline=None, **extra):
+        unique = list(dict.fromkeys(texts))
+        results = {}
+        for start in range(0, len(unique), self.batch_size):
+            timeout = self.timeout
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise InferenceServiceError(
+                        f"Presupuesto de inferencia agotado tras {start} de {len(unique)} textos")
+                timeout = min(timeout, remaining)
+            batch = unique[start:start + self.batch_size]
+            results.update(zip(batch, self._post(path, {'textos': batch, **extra}, timeout)))
+        return [results[text] for text in texts]
+
+    def is_available(self):
+        """Comprobar que el servicio responde"""
+        try:
+            response = self._session().get(f"{self.base_url}/salud", timeout=min(self.timeout, 2.0))
+            return response.status_code == 200
+        except requests.RequestException:
+            return False
+
+    def classify(self, texts, labels=None, deadline=None):
+        """Clasificación zero-shot: ``[{'categoria', 'confianza'}, ...]``"""
+        extra = {'etiquetas': list(labels)} if labels else {}
+        return self._batched('/clasificar', list(texts), deadline, **extra)
+
+    def sentiment(self, texts, deadline=None):
+        """Sentimiento: ``[{'sentimiento', 'estrellas'}, ...]``"""
+        return self._batched('/sentimiento', list(texts), deadline)
+
+    def summarize(self, texts, max_length=150, min_length=50, deadline=None):
+        """Resumen de cada texto"""
+        return self._batched('/resumir', list(texts), deadline, max_length=max_length, min_length=min_length)
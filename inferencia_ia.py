@@ -0,0 +1,213 @@
+"""
+Inferencia por lotes con los pipelines de HuggingFace
+Clasificación zero-shot y sentimientos de columnas completas de comentarios
+"""
+
+import numpy as np
+import pandas as pd
+
+from cache_inferencia import inferir_unicos, identificador_modelo
+
+# Categorías del problema
+CATEGORIAS_PROBLEMA = ["Educación", "Salud", "Medio Ambiente", "Seguridad"]
+PLANTILLA_HIPOTESIS = "Este texto trata sobre {}."
+
+# Comentarios por lote en cada pasada del modelo
+TAMANO_LOTE = 16
+
+SIN_COMENTARIO = 'Sin comentario'
+
+
+def longitudes_tokens(pipeline_ia, textos):
+    """
+    Longitud en tokens de cada texto (o en caracteres si no hay tokenizador)
+    """
+    tokenizer = getattr(pipeline_ia, 'tokenizer', None)
+    if tokenizer is None or not textos:
+        return np.array([len(t) for t in textos])
+    ids = tokenizer(list(textos), add_special_tokens=False, truncation=False)['input_ids']
+    return np.array([len(x) for x in ids])
+
+
+def lotes_por_longitud(longitudes, tamano_lote):
+    """
+    Posiciones ordenadas por longitud y agrupadas en lotes
+
+    Cada lote contiene textos de longitud parecida, de modo que el relleno
+    (padding) dinámico de cada pasada es mínimo.
+    """
+    orden = np.argsort(longitudes, kind='stable')
+    return [orden[i:i + tamano_lote] for i in range(0, len(orden), tamano_lote)]
+
+
+def _clasificar_textos(clasificador, textos, etiquetas, plantilla, tamano_lote):
+    """
+    Clasifica textos en lotes ordenados por longitud: [(etiqueta, confianza), ...]
+    """
+    # Un clasificador repartido en procesos (InferenciaParalela) arma sus propios lotes
+    if hasattr(clasificador, 'clasificar_textos'):
+        return clasificador.clasificar_textos(textos, etiquetas, plantilla, tamano_lote)
+
+    salida_textos = [("Error", 0.0)] * len(textos)
+
+    for lote in lotes_por_longitud(longitudes_tokens(clasificador, textos), tamano_lote):
+        try:
+            salidas = clasificador(
+                [textos[i] for i in lote],
+                candidate_labels=list(etiquetas),
+                hypothesis_template=plantilla,
+                # El pipeline agrupa pares (texto, hipótesis): uno por etiqueta
+                batch_size=len(lote) * len(etiquetas)
+            )
+            if isinstance(salidas, dict):
+                salidas = [salidas]
+            for i, salida in zip(lote, salidas):
+                salida_textos[i] = (salida['labels'][0], float(salida['scores'][0]))
+        except Exception as e:
+            print(f"   ✗ Error en lote de clasificación: {e}")
+
+    return salida_textos
+
+
+def comentarios_validos(comentarios):
+    """
+    Máscara de comentarios con texto (excluye vacíos y 'Sin comentario')
+    """
+    return comentarios.notna() & (comentarios.astype(str).str.strip() != '') & (comentarios != SIN_COMENTARIO)
+
+
+def clasificar_comentarios_lote(clasificador, comentarios, etiquetas=CATEGORIAS_PROBLEMA,
+                                plantilla=PLANTILLA_HIPOTESIS, tamano_lote=TAMANO_LOTE, cache=None, informar=True):
+    """
+    Clasifica una columna completa de comentarios con Zero-Shot Classification
+
+    Solo se envían al modelo los textos únicos que no estén en ``cache``
+    (``CacheInferencia`` opcional); el resultado se reparte a todas las filas
+    con el mismo texto. Los textos se ordenan por longitud en tokens y se
+    procesan en lotes de ``tamano_lote``; cada lote se rellena solo hasta su
+    texto más largo. Devuelve un DataFrame con el mismo índice que
+    ``comentarios`` y las columnas ``Categoria_IA`` y ``Confianza_IA``. Los
+    comentarios vacíos quedan como "No clasificado" y los lotes que fallan
+    como "Error", igual que ``clasificar_comentario``. Con ``informar`` se
+    imprimen las estadísticas de textos únicos y caché.
+    """
+    comentarios = pd.Series(comentarios)
+    resultado = pd.DataFrame({
+        'Categoria_IA': "No clasificado",
+        'Confianza_IA': 0.0
+    }, index=comentarios.index)
+
+    validos = comentarios_validos(comentarios)
+    if not clasificador or not validos.any():
+        return resultado
+
+    por_fila, estadisticas = inferir_unicos(
+        comentarios[validos].astype(str).tolist(),
+        lambda textos: _clasificar_textos(clasificador, textos, etiquetas, plantilla, tamano_lote),
+        cache=cache,
+        modelo=identificador_modelo(clasificador),
+        tarea=f'zero-shot-classification|{plantilla}',
+        etiquetas=etiquetas,
+        es_valido=lambda r: r[0] != "Error"
+    )
+    if informar:
+        print(f"   ✓ {estadisticas['filas']} comentarios, {estadisticas['unicos']} únicos, "
+              f"{estadisticas['en_cache']} en caché, {estadisticas['inferidos']} inferidos")
+
+    resultado.loc[validos, 'Categoria_IA'] = [r[0] for r in por_fila]
+    resultado.loc[validos, 'Confianza_IA'] = [float(r[1]) for r in por_fila]
+    return resultado
+
+
+# Estrellas equivalentes para modelos de sentimiento de tres clases
+ESTRELLAS_POR_ETIQUETA = {'negative': 1, 'neutral': 3, 'positive': 5}
+
+
+def estrellas_desde_etiqueta(etiqueta):
+    """
+    Estrellas (1-5) de la etiqueta de un modelo de sentimiento
+
+    Acepta etiquetas '1 star' ... '5 stars' y negative / neutral / positive.
+    """
+    primera = str(etiqueta).split()[0]
+    if primera.isdigit():
+        return int(primera)
+    return ESTRELLAS_POR_ETIQUETA[primera.lower()]
+
+
+def estrellas_a_sentimiento(estrellas):
+    """
+    Convierte 1-5 estrellas en Negativo / Neutral / Positivo
+    """
+    if estrellas <= 2:
+        return "Negativo"
+    elif estrellas == 3:
+        return "Neutral"
+    return "Positivo"
+
+
+def sentimientos_desde_estrellas(estrellas):
+    """
+    Versión vectorizada de ``estrellas_a_sentimiento`` (0 estrellas = "Error")
+    """
+    estrellas = np.asarray(estrellas)
+    return np.select([estrellas <= 0, estrellas <= 2, estrellas == 3],
+                     ["Error", "Negativo", "Neutral"], default="Positivo")
+
+
+def _estrellas_textos(sentiment_analyzer, textos, tamano_lote):
+    """
+    Estrellas (1-5) de cada texto en lotes ordenados por longitud; 0 si falla el lote
+
+    Cada lote agrupa textos de longitud parecida en tokens y se rellena solo
+    hasta el más largo; los textos que superan el máximo del modelo se
+    truncan en tokens (no en caracteres).
+    """
+    if hasattr(sentiment_analyzer, 'estrellas_textos'):
+        return sentiment_analyzer.estrellas_textos(textos, tamano_lote)
+
+    estrellas = [0] * len(textos)
+    for lote in lotes_por_longitud(longitudes_tokens(sentiment_analyzer, textos), tamano_lote):
+        try:
+            salidas = sentiment_analyzer([textos[i] for i in lote], batch_size=len(lote), truncation=True)
+            for i, salida in zip(lote, salidas):
+                estrellas[i] = estrellas_desde_etiqueta(salida['label'])
+        except Exception as e:
+            print(f"   ✗ Error en lote de sentimientos: {e}")
+    return estrellas
+
+
+def analizar_sentimientos_columna(sentiment_analyzer, comentarios, tamano_lote=TAMANO_LOTE, cache=None,
+                                  informar=True):
+    """
+    Analiza el sentimiento (1-5 estrellas) de una columna de comentarios
+
+    Igual que en la clasificación, solo se infieren los textos únicos que no
+    estén en caché, en lotes por longitud (ver ``_estrellas_textos``).
+    Devuelve un DataFrame con ``Sentimiento`` y ``Estrellas`` (enteros) para
+    toda la columna; los comentarios vacíos quedan como "Neutral" (3) y los
+    errores como "Error" (0).
+    """
+    comentarios = pd.Series(comentarios)
+    resultado = pd.DataFrame({'Sentimiento': "Neutral", 'Estrellas': 3}, index=comentarios.index)
+
+    validos = comentarios_validos(comentarios)
+    if not sentiment_analyzer or not validos.any():
+        return resultado
+
+    por_fila, estadisticas = inferir_unicos(
+        comentarios[validos].astype(str).tolist(),
+        lambda textos: _estrellas_textos(sentiment_analyzer, textos, tamano_lote),
+        cache=cache,
+        modelo=identificador_modelo(sentiment_analyzer),
+        tarea='sentiment-analysis',
+        es_valido=lambda estrellas: estrellas > 0
+    )
+    if informar:
+        print(f"   ✓ {estadisticas['filas']} comentarios, {estadisticas['unicos']} únicos, "
+              f"{estadisticas['en_cache']} en caché, {estadisticas['inferidos']} inferidos")
+
+    estrellas = np.fromiter(por_fila, dtype=np.int64, count=len(por_fila))
+    resultado.loc[validos, 'Estrellas'] = estrellas
+    resultado.loc[validos, 'Sentimiento'] = sentimientos_desde_estrellas(estrellas)
+    return resultado
@@ -0,0 +1,180 @@
+"""
+Inferencia repartida en varios procesos, cada uno con su copia del modelo
+Cada proceso fija sus hilos de torch (``torch.set_num_threads``) para no
+competir por los núcleos; los comentarios se reparten en fragmentos y los
+resultados se recogen en el orden original
+"""
+
+import math
+import multiprocessing
+import os
+import time
+import types
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# Fragmentos por proceso: más de uno para equilibrar la carga entre procesos
+FRAGMENTOS_POR_TRABAJADOR = 4
+
+# Modelo cargado en cada proceso trabajador
+_pipeline_trabajador = None
+
+
+def _inicializar_trabajador(tarea, modelo, hilos, backend):
+    """
+    Fija los hilos de torch / ONNX Runtime y carga el modelo en el proceso
+    """
+    global _pipeline_trabajador
+    # Antes de importar torch, para que las librerías de álgebra respeten el límite
+    os.environ['OMP_NUM_THREADS'] = str(hilos)
+    os.environ['MKL_NUM_THREADS'] = str(hilos)
+
+    import torch
+    torch.set_num_threads(hilos)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass  # Ya fijado en este proceso
+
+    if backend == 'onnx':
+        from backend_onnx import cargar_pipeline_onnx
+        _pipeline_trabajador = cargar_pipeline_onnx(tarea, modelo, hilos=hilos)
+    else:
+        from modelos_ia import cargar_pipeline
+        _pipeline_trabajador = cargar_pipeline(tarea, modelo)
+
+
+def _identificador_trabajador():
+    from cache_inferencia import identificador_modelo
+    return identificador_modelo(_pipeline_trabajador)
+
+
+def _clasificar_fragmento(textos, etiquetas, plantilla, tamano_lote):
+    from inferencia_ia import _clasificar_textos
+    return _clasificar_textos(_pipeline_trabajador, textos, etiquetas, plantilla, tamano_lote)
+
+
+def _estrellas_fragmento(textos, tamano_lote):
+    from inferencia_ia import _estrellas_textos
+    return _estrellas_textos(_pipeline_trabajador, textos, tamano_lote)
+
+
+def _resumir_fragmento(textos, tamano_lote, max_length, min_length):
+    from resumen_categorias import _resumir_textos
+    return _resumir_textos(_pipeline_trabajador, textos, tamano_lote, max_length, min_length)
+
+
+def combinaciones_hilos(nucleos=None):
+    """
+    Combinaciones (procesos, hilos por proceso) que usan como máximo ``nucleos``
+    """
+    nucleos = nucleos or os.cpu_count() or 1
+    combinaciones = []
+    trabajadores = 1
+    while trabajadores <= nucleos:
+        combinaciones.append((trabajadores, max(1, nucleos // trabajadores)))
+        trabajadores *= 2
+    if combinaciones[-1][0] != nucleos:
+        combinaciones.append((nucleos, 1))
+    return combinaciones
+
+
+class InferenciaParalela:
+    """
+    Pool de procesos con un modelo por proceso, usable en lugar de un pipeline
+
+    ``clasificar_comentarios_lote``, ``analizar_sentimientos_columna`` y
+    ``resumir_grupos`` lo detectan y le entregan los textos únicos pendientes; aquí se ordenan por
+    longitud, se reparten en fragmentos entre los procesos y los resultados
+    vuelven en el orden de entrada.
+    """
+
+    def __init__(self, tarea, modelo=None, trabajadores=None, hilos=None, backend='pytorch'):
+        from modelos_ia import resolver_modelo
+
+        self.tarea = tarea
+        self.trabajadores = max(1, trabajadores or os.cpu_count() or 1)
+        self.hilos = max(1, hilos or (os.cpu_count() or 1) // self.trabajadores)
+        modelo = modelo if backend == 'onnx' else modelo or resolver_modelo(tarea)
+        self.pool = ProcessPoolExecutor(
+            max_workers=self.trabajadores,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_inicializar_trabajador,
+            initargs=(tarea, modelo, self.hilos, backend)
+        )
+        # Mismo identificador que el pipeline en un solo proceso, para compartir la caché
+        self.model = types.SimpleNamespace(name_or_path=self.pool.submit(_identificador_trabajador).result())
+
+    def _repartir(self, funcion, textos, *argumentos):
+        if not textos:
+            return []
+        orden = np.argsort([len(t) for t in textos], kind='stable')
+        fragmentos = self.trabajadores * FRAGMENTOS_POR_TRABAJADOR
+        tamano = max(1, math.ceil(len(textos) / fragmentos))
+        grupos = [orden[i:i + tamano] for i in range(0, len(orden), tamano)]
+
+        futuros = [self.pool.submit(funcion, [textos[i] for i in grupo], *argumentos) for grupo in grupos]
+        resultados = [None] * len(textos)
+        for grupo, futuro in zip(grupos, futuros):
+            for i, resultado in zip(grupo, futuro.result()):
+                resultados[i] = resultado
+        return resultados
+
+    def clasificar_textos(self, textos, etiquetas, plantilla, tamano_lote):
+        """
+        [(etiqueta, confianza), ...] de cada texto, calculado en los procesos
+        """
+        return self._repartir(_clasificar_fragmento, list(textos), list(etiquetas), plantilla, tamano_lote)
+
+    def estrellas_textos(self, textos, tamano_lote):
+        """
+        Estrellas (1-5) de cada texto, calculadas en los procesos
+        """
+        return self._repartir(_estrellas_fragmento, list(textos), tamano_lote)
+
+    def resumir_textos(self, textos, tamano_lote, max_length, min_length):
+        """
+        Resumen de cada texto, calculado en los procesos
+        """
+        return self._repartir(_resumir_fragmento, list(textos), tamano_lote, max_length, min_length)
+
+    def cerrar(self):
+        """
+        Detiene los procesos trabajadores
+        """
+        self.pool.shutdown(wait=True)
+
+
+def autoajustar(tarea, textos, modelo=None, nucleos=None, tamano_lote=16, backend='pytorch'):
+    """
+    Elige la combinación procesos × hilos con mayor rendimiento en esta máquina
+
+    Prueba cada combinación de ``combinaciones_hilos`` sobre ``textos`` (una
+    pasada de calentamiento y una medida) y devuelve
+    ``(mejor, mediciones)``, con ``mejor = (procesos, hilos)``.
+    """
+    from inferencia_ia import CATEGORIAS_PROBLEMA, PLANTILLA_HIPOTESIS
+
+    textos = [str(t) for t in textos]
+    mediciones = []
+    for trabajadores, hilos in combinaciones_hilos(nucleos):
+        paralela = InferenciaParalela(tarea, modelo, trabajadores, hilos, backend)
+        try:
+            if tarea == 'zero-shot-classification':
+                medir = lambda: paralela.clasificar_textos(textos, CATEGORIAS_PROBLEMA, PLANTILLA_HIPOTESIS, tamano_lote)
+            else:
+                medir = lambda: paralela.estrellas_textos(textos, tamano_lote)
+            medir()  # Calentamiento: todos los procesos cargan el modelo
+            inicio = time.perf_counter()
+            medir()
+            duracion = time.perf_counter() - inicio
+        finally:
+            paralela.cerrar()
+
+        filas_por_segundo = round(len(textos) / duracion, 2) if duracion > 0 else 0.0
+        print(f"   ⏱️  {trabajadores} procesos × {hilos} hilos: {filas_por_segundo} filas/s")
+        mediciones.append({'procesos': trabajadores, 'hilos': hilos, 'filas_por_segundo': filas_por_segundo})
+
+    mejor = max(mediciones, key=lambda m: m['filas_por_segundo'])
+    return (mejor['procesos'], mejor['hilos']), mediciones
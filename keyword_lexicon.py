@@ -0,0 +1,15 @@
+"""
+📚 Léxico de palabras clave por categoría
+Compartido por el análisis de categorías de la web (app.py) y por la
+clasificación en cascada del pipeline de limpieza
+"""
+
+# Palabras clave de cada categoría de problema (coincidencia por subcadena, en minúsculas)
+CATEGORY_KEYWORDS = {
+    'Salud': ['salud', 'médico', 'hospital', 'enfermedad', 'medicina', 'cuidado', 'health', 'medical'],
+    'Educación': ['educación', 'escuela', 'colegio', 'universidad', 'estudiante', 'profesor', 'education', 'school'],
+    'Seguridad': ['seguridad', 'policía', 'delito', 'robo', 'violencia', 'safety', 'police', 'crime'],
+    'Medio Ambiente': ['medio ambiente', 'contaminación', 'basura', 'aire', 'agua', 'environment', 'pollution'],
+    'Transporte': ['transporte', 'tráfico', 'carretera', 'autobús', 'taxi', 'transport', 'traffic'],
+    'Servicios Públicos': ['servicio', 'público', 'agua', 'luz', 'gas', 'public', 'service', 'utility']
+}
@@ -0,0 +1,308 @@
+"""
+Selección de modelos de IA y benchmark de precisión / latencia
+Cada tarea tiene un modelo grande (por defecto) y una alternativa pequeña o
+destilada; los modelos se pueden guardar en un directorio local y cargarse sin red
+
+Uso:
+    python modelos_ia.py descargar --perfil pequeno
+    python modelos_ia.py benchmark --limite 500
+"""
+
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+# Opciones por tarea: 'grande' son los modelos originales del análisis
+OPCIONES_MODELOS = {
+    'zero-shot-classification': {
+        'grande': 'facebook/bart-large-mnli',
+        'pequeno': 'MoritzLaurer/multilingual-MiniLMv2-L6-mnli-xnli'
+    },
+    'sentiment-analysis': {
+        'grande': 'nlptown/bert-base-multilingual-uncased-sentiment',
+        'pequeno': 'lxyuan/distilbert-base-multilingual-cased-sentiments-student'
+    },
+    # No hay un resumidor multilingüe más pequeño que el grande (mT5 XLSum pesa más):
+    # la alternativa pequeña es específica de español, el idioma de los comentarios
+    'summarization': {
+        'grande': 'facebook/bart-large-cnn',
+        'pequeno': 'mrm8488/bert2bert_shared-spanish-finetuned-summarization'
+    },
+    # Codificador de oraciones para la clasificación por similitud (clasificacion_embeddings.py)
+    'feature-extraction': {
+        'grande': 'sentence-transformers/paraphrase-multilingual-mpnet-base-v2',
+        'pequeno': 'sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2'
+    }
+}
+
+# Variable de entorno para forzar un modelo (id o ruta local) por tarea
+VARIABLES_MODELO = {
+    'zero-shot-classification': 'MODELO_CLASIFICACION',
+    'sentiment-analysis': 'MODELO_SENTIMIENTO',
+    'summarization': 'MODELO_RESUMEN',
+    'feature-extraction': 'MODELO_EMBEDDINGS'
+}
+
+PERFIL_MODELOS = os.environ.get('PERFIL_MODELOS', 'grande')
+
+# Directorio con copias locales de los modelos (uno por subdirectorio)
+DIRECTORIO_MODELOS = os.environ.get('DIRECTORIO_MODELOS', 'modelos_locales')
+
+# Comentarios por entrada de resumen en el benchmark
+COMENTARIOS_POR_RESUMEN = 20
+
+
+def directorio_local(modelo_id, base=DIRECTORIO_MODELOS):
+    """
+    Subdirectorio local de un modelo ('org/modelo' -> 'org--modelo')
+    """
+    return os.path.join(base, modelo_id.replace('/', '--'))
+
+
+def modelo_de_perfil(tarea, perfil, base=DIRECTORIO_MODELOS):
+    """
+    Modelo de un perfil (``grande`` o ``pequeno``): su copia local si existe, o el id del hub
+    """
+    if perfil not in OPCIONES_MODELOS[tarea]:
+        raise ValueError(f"Perfil de modelos desconocido: {perfil}")
+
+    modelo_id = OPCIONES_MODELOS[tarea][perfil]
+    local = directorio_local(modelo_id, base)
+    return local if os.path.isdir(local) else modelo_id
+
+
+def resolver_modelo(tarea, perfil=None, base=DIRECTORIO_MODELOS):
+    """
+    Modelo a cargar para una tarea: variable de entorno o modelo del perfil
+
+    Si la variable de entorno de la tarea apunta a un id o a una ruta, se usa
+    tal cual; si no, se usa el perfil dado o ``PERFIL_MODELOS``.
+    """
+    forzado = os.environ.get(VARIABLES_MODELO[tarea])
+    if forzado:
+        return forzado
+    return modelo_de_perfil(tarea, perfil or PERFIL_MODELOS, base)
+
+
+def cargar_pipeline(tarea, modelo=None, perfil=None, base=DIRECTORIO_MODELOS):
+    """
+    Carga el pipeline de HuggingFace de una tarea en CPU
+
+    Una ruta local se carga sin consultar la red; para impedir cualquier
+    descarga también con ids del hub, definir ``HF_HUB_OFFLINE=1``.
+    """
+    from transformers import pipeline
+
+    return pipeline(tarea, model=modelo or resolver_modelo(tarea, perfil, base), device=-1)
+
+
+def descargar_modelos(perfil, base=DIRECTORIO_MODELOS, tareas=None):
+    """
+    Guarda en ``base`` una copia local de los modelos de un perfil
+    """
+    from transformers import pipeline
+
+    guardados = {}
+    for tarea in tareas or list(OPCIONES_MODELOS):
+        modelo_id = OPCIONES_MODELOS[tarea][perfil]
+        destino = directorio_local(modelo_id, base)
+        pipeline(tarea, model=modelo_id, device=-1).save_pretrained(destino)
+        guardados[tarea] = destino
+    return guardados
+
+
+def rss_maximo_mb():
+    """
+    Memoria residente máxima del proceso en MB (None si no está disponible)
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    import sys
+    maximo = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reporta KB y macOS bytes
+    return round(maximo / (1024 * 1024) if sys.platform == 'darwin' else maximo / 1024, 1)
+
+
+def rss_actual_mb():
+    """
+    Memoria residente actual del proceso en MB (None si no está disponible)
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            paginas = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return round(paginas * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024), 1)
+
+
+def _textos_resumen(comentarios):
+    """
+    Bloques de comentarios unidos y truncados a la entrada de BART
+    """
+    return [
+        " ".join(comentarios[i:i + COMENTARIOS_POR_RESUMEN])[:1024]
+        for i in range(0, len(comentarios), COMENTARIOS_POR_RESUMEN)
+    ]
+
+
+def medir_modelo(tarea, modelo, dataset='dataset.csv', limite=500, tamano_lote=16):
+    """
+    Mide un modelo sobre los comentarios del dataset
+
+    Devuelve tiempo de carga, filas por segundo, latencia p50/p95 por lote,
+    RSS máximo y, para la clasificación, la precisión frente a
+    ``Categoría del problema``. Pensado para ejecutarse en un proceso propio,
+    de modo que el RSS máximo corresponda solo a este modelo.
+    """
+    import pandas as pd
+    from inferencia_ia import (comentarios_validos, lotes_por_longitud, longitudes_tokens,
+                               estrellas_desde_etiqueta, CATEGORIAS_PROBLEMA, PLANTILLA_HIPOTESIS)
+
+    df = pd.read_csv(dataset)
+    df = df[comentarios_validos(df['Comentario'])]
+    if limite > 0:
+        df = df.head(limite)
+    comentarios = df['Comentario'].astype(str).tolist()
+
+    inicio = time.perf_counter()
+    if tarea == 'feature-extraction':
+        from clasificacion_embeddings import ClasificadorEmbeddings
+        pipeline_ia = ClasificadorEmbeddings(modelo)
+    else:
+        pipeline_ia = cargar_pipeline(tarea, modelo)
+    tiempo_carga = time.perf_counter() - inicio
+
+    if tarea == 'feature-extraction':
+        # Clasificación por similitud con las etiquetas: comparable con el zero-shot
+        entradas = comentarios
+        lotes = lotes_por_longitud(longitudes_tokens(pipeline_ia, entradas), tamano_lote)
+        inferir = lambda textos: [c for c, _ in pipeline_ia.clasificar_textos(
+            textos, CATEGORIAS_PROBLEMA, PLANTILLA_HIPOTESIS, len(textos))]
+    elif tarea == 'summarization':
+        entradas = _textos_resumen(comentarios)
+        lotes = [[i] for i in range(len(entradas))]
+        inferir = lambda textos: [s['summary_text'] for s in pipeline_ia(
+            textos, max_length=150, min_length=50, do_sample=False)]
+    elif tarea == 'zero-shot-classification':
+        entradas = comentarios
+        lotes = lotes_por_longitud(longitudes_tokens(pipeline_ia, entradas), tamano_lote)
+        inferir = lambda textos: [s['labels'][0] for s in pipeline_ia(
+            textos, candidate_labels=CATEGORIAS_PROBLEMA, hypothesis_template=PLANTILLA_HIPOTESIS,
+            batch_size=len(textos) * len(CATEGORIAS_PROBLEMA))]
+    else:
+        entradas = comentarios
+        lotes = lotes_por_longitud(longitudes_tokens(pipeline_ia, entradas), tamano_lote)
+        inferir = lambda textos: [estrellas_desde_etiqueta(s['label']) for s in pipeline_ia(
+            textos, batch_size=len(textos), truncation=True)]
+
+    predicciones = [None] * len(entradas)
+    latencias = []
+    inicio = time.perf_counter()
+    for lote in lotes:
+        inicio_lote = time.perf_counter()
+        for i, prediccion in zip(lote, inferir([entradas[i] for i in lote])):
+            predicciones[i] = prediccion
+        latencias.append(time.perf_counter() - inicio_lote)
+    total = time.perf_counter() - inicio
+
+    precision = None
+    if tarea in ('zero-shot-classification', 'feature-extraction') and entradas:
+        precision = round(float(np.mean([p == r for p, r in zip(predicciones, df['Categoría del problema'])])) * 100, 2)
+
+    return {
+        'tarea': tarea,
+        'modelo': modelo,
+        'filas': len(entradas),
+        'tiempo_carga_s': round(tiempo_carga, 2),
+        'filas_por_segundo': round(len(entradas) / total, 2) if total > 0 else None,
+        'latencia_p50_ms': round(float(np.percentile(latencias, 50)) * 1000, 1) if latencias else None,
+        'latencia_p95_ms': round(float(np.percentile(latencias, 95)) * 1000, 1) if latencias else None,
+        'rss_maximo_mb': rss_maximo_mb(),
+        'precision': precision
+    }
+
+
+def benchmark(tareas=None, perfiles=None, modelos=None, dataset='dataset.csv', limite=500, tamano_lote=16,
+              base=DIRECTORIO_MODELOS):
+    """
+    Compara las opciones de modelo de cada tarea, cada una en un proceso nuevo
+
+    Los modelos de cada perfil se buscan en ``base`` (se usa el id del hub
+    si no hay copia local). ``modelos`` permite añadir ids o rutas locales
+    extra por tarea: ``{tarea: [modelo, ...]}``.
+    """
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    contexto = multiprocessing.get_context('spawn')
+    resultados = []
+    for tarea in tareas or list(OPCIONES_MODELOS):
+        candidatos = [modelo_de_perfil(tarea, perfil, base) for perfil in perfiles or list(OPCIONES_MODELOS[tarea])]
+        candidatos += (modelos or {}).get(tarea, [])
+        for modelo in dict.fromkeys(candidatos):
+            print(f"⏱️  {tarea}: {modelo}...")
+            try:
+                with ProcessPoolExecutor(max_workers=1, mp_context=contexto) as pool:
+                    resultado = pool.submit(medir_modelo, tarea, modelo, dataset, limite, tamano_lote).result()
+            except Exception as e:
+                print(f"   ✗ Error: {e}")
+                resultado = {'tarea': tarea, 'modelo': modelo, 'error': str(e)}
+            else:
+                print(f"   ✓ {resultado['filas_por_segundo']} filas/s, p95 {resultado['latencia_p95_ms']} ms, "
+                      f"RSS {resultado['rss_maximo_mb']} MB, precisión {resultado['precision']}")
+            resultados.append(resultado)
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Modelos de IA: copias locales y benchmark")
+    parser.add_argument('accion', choices=['descargar', 'benchmark'])
+    parser.add_argument('--tarea', choices=list(OPCIONES_MODELOS), action='append',
+                        help="Tarea a procesar (por defecto, todas)")
+    parser.add_argument('--perfil', choices=['grande', 'pequeno'], action='append',
+                        help="Perfil de modelos (por defecto, todos en el benchmark); el resumidor "
+                             "pequeño es solo para español, los demás pequeños son multilingües")
+    parser.add_argument('--modelo', action='append', default=[],
+                        help="Modelo o ruta local extra para el benchmark (solo con una --tarea)")
+    parser.add_argument('--directorio', default=DIRECTORIO_MODELOS,
+                        help="Directorio de las copias locales (destino al descargar, origen en el benchmark)")
+    parser.add_argument('--dataset', default='dataset.csv')
+    parser.add_argument('--limite', type=int, default=500, help="Comentarios a evaluar (0 = todos)")
+    parser.add_argument('--tamano-lote', type=int, default=16)
+    parser.add_argument('--salida', help="Archivo JSON para guardar el reporte")
+    args = parser.parse_args()
+
+    if args.modelo and (not args.tarea or len(args.tarea) != 1):
+        parser.error("--modelo requiere exactamente una --tarea")
+
+    if args.accion == 'descargar':
+        for perfil in args.perfil or ['grande']:
+            print(f"📥 Guardando modelos del perfil '{perfil}' en {args.directorio}...")
+            for tarea, destino in descargar_modelos(perfil, args.directorio, args.tarea).items():
+                print(f"   ✓ {tarea}: {destino}")
+        return
+
+    resultados = benchmark(
+        tareas=args.tarea,
+        perfiles=args.perfil,
+        modelos={args.tarea[0]: args.modelo} if args.modelo else None,
+        dataset=args.dataset,
+        limite=args.limite,
+        tamano_lote=args.tamano_lote,
+        base=args.directorio
+    )
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as f:
+            json.dump(resultados, f, ensure_ascii=False, indent=2)
+        print(f"📄 Reporte guardado: {args.salida}")
+    else:
+        print(json.dumps(resultados, ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    main()
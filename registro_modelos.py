@@ -0,0 +1,198 @@
+"""
+Registro de modelos con carga diferida e instrumentación
+Cada modelo se carga la primera vez que se usa; se mide el tiempo de carga,
+la memoria residente que añade y la latencia de su primera inferencia
+"""
+
+import gc
+import threading
+import time
+
+from modelos_ia import rss_actual_mb
+
+# Métodos por lotes de los modelos propios (InferenciaParalela, ClasificadorEmbeddings)
+METODOS_INFERENCIA = ('clasificar_textos', 'estrellas_textos', 'resumir_textos')
+
+# Texto para el calentamiento de los modelos
+TEXTO_CALENTAMIENTO = "No hay suficientes médicos en el centro de salud del barrio."
+
+
+class _ModeloMedido:
+    """
+    Envoltorio que delega en el modelo y mide su primera inferencia
+    """
+
+    def __init__(self, modelo, metricas):
+        self._modelo = modelo
+        self._metricas = metricas
+
+    def _medir(self, funcion, *args, **kwargs):
+        if self._metricas.get('primera_inferencia_ms') is not None:
+            return funcion(*args, **kwargs)
+        inicio = time.perf_counter()
+        resultado = funcion(*args, **kwargs)
+        self._metricas['primera_inferencia_ms'] = round((time.perf_counter() - inicio) * 1000, 1)
+        return resultado
+
+    def __call__(self, *args, **kwargs):
+        return self._medir(self._modelo, *args, **kwargs)
+
+    def __getattr__(self, nombre):
+        atributo = getattr(self._modelo, nombre)
+        if nombre in METODOS_INFERENCIA:
+            return lambda *args, **kwargs: self._medir(atributo, *args, **kwargs)
+        return atributo
+
+    def __bool__(self):
+        return True
+
+
+def _calentar_tarea(tarea, modelo):
+    """
+    Una inferencia mínima con el modelo de la tarea
+    """
+    from inferencia_ia import _clasificar_textos, _estrellas_textos, CATEGORIAS_PROBLEMA, PLANTILLA_HIPOTESIS
+
+    if tarea == 'summarization':
+        from resumen_categorias import _resumir_textos
+        _resumir_textos(modelo, [TEXTO_CALENTAMIENTO], 1, 30, 5)
+    elif tarea == 'sentiment-analysis':
+        _estrellas_textos(modelo, [TEXTO_CALENTAMIENTO], 1)
+    else:
+        _clasificar_textos(modelo, [TEXTO_CALENTAMIENTO], CATEGORIAS_PROBLEMA, PLANTILLA_HIPOTESIS, 1)
+
+
+class RegistroModelos:
+    """
+    Modelos por nombre, cargados al primer acceso (``registro['clasificador']``)
+
+    Se usa como el diccionario de modelos: un modelo que no se puede cargar
+    queda en None y su paso se omite. ``metricas()`` reporta, por modelo,
+    tiempo de carga, RSS añadido y latencia de la primera inferencia;
+    ``calentar()`` carga y ejecuta una inferencia por adelantado y
+    ``descargar()`` libera un modelo (se vuelve a cargar si se usa de nuevo).
+    """
+
+    def __init__(self):
+        self._fabricas = {}
+        self._modelos = {}
+        self._metricas = {}
+        self._locks = {}
+
+    def registrar(self, nombre, fabrica, tarea, descripcion=None):
+        """
+        Registra ``fabrica()`` (sin argumentos) como cargador del modelo ``nombre``
+        """
+        self._fabricas[nombre] = (fabrica, tarea, descripcion or nombre)
+        self._locks[nombre] = threading.Lock()
+        self._metricas[nombre] = {'tarea': tarea, 'cargado': False}
+
+    def __iter__(self):
+        return iter(self._fabricas)
+
+    def __len__(self):
+        return len(self._fabricas)
+
+    def __contains__(self, nombre):
+        return nombre in self._fabricas
+
+    def __getitem__(self, nombre):
+        return self.obtener(nombre)
+
+    def keys(self):
+        return list(self._fabricas)
+
+    def items(self):
+        return [(nombre, self.obtener(nombre)) for nombre in self._fabricas]
+
+    def values(self):
+        return [self.obtener(nombre) for nombre in self._fabricas]
+
+    def get(self, nombre, predeterminado=None):
+        return self.obtener(nombre) if nombre in self._fabricas else predeterminado
+
+    def cargado(self, nombre):
+        """
+        True si el modelo ya se intentó cargar (aunque haya fallado)
+        """
+        return nombre in self._modelos
+
+    def obtener(self, nombre):
+        """
+        Modelo ``nombre``, cargándolo si hace falta (None si falla la carga)
+        """
+        if nombre in self._modelos:
+            return self._modelos[nombre]
+
+        with self._locks[nombre]:
+            if nombre in self._modelos:
+                return self._modelos[nombre]
+
+            fabrica, tarea, descripcion = self._fabricas[nombre]
+            print(f"📥 Cargando {descripcion}...")
+            metricas = {'tarea': tarea, 'cargado': False, 'primera_inferencia_ms': None}
+            rss_inicial = rss_actual_mb()
+            inicio = time.perf_counter()
+            try:
+                modelo = fabrica()
+            except Exception as e:
+                print(f"   ✗ Error: {e}")
+                modelo = None
+                metricas['error'] = str(e)
+            metricas['tiempo_carga_s'] = round(time.perf_counter() - inicio, 2)
+            rss_final = rss_actual_mb()
+            metricas['rss_delta_mb'] = (round(rss_final - rss_inicial, 1)
+                                        if rss_inicial is not None and rss_final is not None else None)
+
+            if modelo is not None:
+                metricas['cargado'] = True
+                modelo = _ModeloMedido(modelo, metricas)
+                print(f"   ✓ Cargado en {metricas['tiempo_carga_s']} s (RSS +{metricas['rss_delta_mb']} MB)")
+            self._metricas[nombre] = metricas
+            self._modelos[nombre] = modelo
+            return modelo
+
+    def calentar(self, nombres=None):
+        """
+        Carga los modelos y ejecuta una inferencia mínima con cada uno
+        """
+        for nombre in nombres or list(self._fabricas):
+            modelo = self.obtener(nombre)
+            if modelo is None:
+                continue
+            try:
+                _calentar_tarea(self._fabricas[nombre][1], modelo)
+            except Exception as e:
+                print(f"   ⚠️  Calentamiento de {nombre} falló: {e}")
+
+    def descargar(self, nombre):
+        """
+        Libera un modelo cargado (detiene sus procesos si los tiene)
+        """
+        with self._locks[nombre]:
+            modelo = self._modelos.pop(nombre, None)
+            if modelo is None:
+                return
+            if hasattr(modelo, 'cerrar'):
+                modelo.cerrar()
+            rss_inicial = rss_actual_mb()
+            del modelo
+            gc.collect()
+            rss_final = rss_actual_mb()
+            self._metricas[nombre]['cargado'] = False
+            self._metricas[nombre]['rss_liberado_mb'] = (round(rss_inicial - rss_final, 1)
+                                                         if rss_inicial is not None and rss_final is not None
+                                                         else None)
+
+    def cerrar(self):
+        """
+        Descarga todos los modelos cargados
+        """
+        for nombre in list(self._modelos):
+            self.descargar(nombre)
+
+    def metricas(self):
+        """
+        Métricas de carga e inferencia de cada modelo
+        """
+        return {nombre: dict(metricas) for nombre, metricas in self._metricas.items()}
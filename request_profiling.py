@@ -0,0 +1,131 @@
+"""
+🔬 Perfilado de peticiones bajo demanda
+Envuelve una petición en cProfile y guarda un resumen (funciones con más
+tiempo acumulado y llamadas a pandas) bajo un ID de petición, en un almacén
+con un número máximo de perfiles
+"""
+
+import cProfile
+import pstats
+import threading
+import time
+from collections import OrderedDict
+
+# Funciones a conservar en cada resumen
+TOP_FUNCTIONS = 30
+
+# Perfiles guardados como máximo (se descartan los más antiguos)
+MAX_STORED_PROFILES = 20
+
+
+def _function_label(func):
+    filename, line, name = func
+    if filename == '~':
+        # Funciones implementadas en C (len, métodos de numpy, ...)
+        return name
+    return f"{filename}:{line}({name})"
+
+
+def _is_pandas(func):
+    filename = func[0].replace('\\', '/')
+    return '/pandas/' in filename
+
+
+def summarize_profile(profiler, top=TOP_FUNCTIONS):
+    """Resumen de un cProfile: totales, funciones más costosas y llamadas a pandas"""
+    stats = pstats.Stats(profiler)
+    rows = []
+    for func, (primitive_calls, calls, total_time, cumulative_time, _) in stats.stats.items():
+        rows.append({
+            'function': _function_label(func),
+            'calls': calls,
+            'primitive_calls': primitive_calls,
+            'total_ms': round(total_time * 1000, 3),
+            'cumulative_ms': round(cumulative_time * 1000, 3),
+            'pandas': _is_pandas(func)
+        })
+    rows.sort(key=lambda row: row['cumulative_ms'], reverse=True)
+    pandas_rows = [row for row in rows if row['pandas']]
+    return {
+        'total_calls': stats.total_calls,
+        'profiled_ms': round(stats.total_tt * 1000, 3),
+        'top_functions': rows[:top],
+        'pandas': {
+            'calls': sum(row['calls'] for row in pandas_rows),
+            # Tiempo propio: el acumulado contaría varias veces las llamadas anidadas
+            'total_ms': round(sum(row['total_ms'] for row in pandas_rows), 3),
+            'top_functions': pandas_rows[:top]
+        }
+    }
+
+
+class ProfileStore:
+    """Perfiles de peticiones por ID, con un máximo de ``max_profiles``"""
+
+    def __init__(self, max_profiles=MAX_STORED_PROFILES):
+        self.max_profiles = max_profiles
+        self._profiles = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, request_id, profile):
+        with self._lock:
+            self._profiles[request_id] = profile
+            self._profiles.move_to_end(request_id)
+            while len(self._profiles) > self.max_profiles:
+                self._profiles.popitem(last=False)
+
+    def get(self, request_id):
+        with self._lock:
+            return self._profiles.get(request_id)
+
+    def list(self):
+        """Resumen de los perfiles guardados, del más reciente al más antiguo"""
+        with self._lock:
+            profiles = list(self._profiles.values())
+        keys = ('request_id', 'method', 'path', 'route', 'status', 'duration_ms', 'created_at')
+        return [{key: profile.get(key) for key in keys} for profile in reversed(profiles)]
+
+    def clear(self):
+        with self._lock:
+            self._profiles.clear()
+
+
+class RequestProfiler:
+    """Perfilador de una petición
+
+    cProfile solo mide el hilo que atiende la petición (el trabajo enviado
+    a otros hilos aparece como espera) y no admite dos perfiladores activos
+    a la vez, así que solo se perfila una petición simultáneamente; las
+    demás se atienden sin perfil.
+    """
+
+    _active = threading.Lock()
+
+    def __init__(self):
+        self.profiler = None
+        self.started = None
+
+    def start(self):
+        """Iniciar el perfilado; False si ya hay otra petición perfilándose"""
+        if not RequestProfiler._active.acquire(blocking=False):
+            return False
+        try:
+            self.profiler = cProfile.Profile()
+            self.started = time.perf_counter()
+            self.profiler.enable()
+        except Exception as e:
+            print(f"⚠️ No se pudo iniciar el perfilado: {e}")
+            self.profiler = None
+            RequestProfiler._active.release()
+            return False
+        return True
+
+    def stop(self):
+        """Detener el perfilado y devolver (duración en ms, perfilador)"""
+        if self.profiler is None:
+            return None, None
+        self.profiler.disable()
+        duration_ms = round((time.perf_counter() - self.started) * 1000, 3)
+        profiler, self.profiler = self.profiler, None
+        RequestProfiler._active.release()
+        return duration_ms, profiler
@@ -0,0 +1,143 @@
+"""
+Resúmenes map-reduce de los comentarios de cada categoría
+Los comentarios únicos se agrupan en fragmentos que caben en la entrada del
+modelo, los fragmentos de todas las categorías se resumen en lotes y los
+resúmenes parciales se vuelven a resumir hasta quedar uno por categoría
+"""
+
+from collections import defaultdict
+
+from cache_inferencia import hash_texto, identificador_modelo, normalizar_texto
+from inferencia_ia import longitudes_tokens, lotes_por_longitud
+
+# Tokens máximos por fragmento (BART admite 1024 en la entrada)
+MAX_TOKENS_FRAGMENTO = 1024
+
+# Caracteres por fragmento si el modelo no tiene tokenizador
+MAX_CARACTERES_FRAGMENTO = 1024
+
+# Longitud de cada resumen, en tokens
+MAX_LENGTH_RESUMEN = 150
+MIN_LENGTH_RESUMEN = 50
+
+# Fragmentos por pasada del modelo
+TAMANO_LOTE_RESUMEN = 8
+
+# Rondas de reducción antes de unir los resúmenes parciales tal cual
+RONDAS_MAXIMAS = 4
+
+TAREA_CACHE = 'summarization-mapreduce'
+
+
+def presupuesto_fragmento(summarizer):
+    """
+    Longitud máxima de un fragmento: (tokens, usa_tokenizador)
+    """
+    tokenizer = getattr(summarizer, 'tokenizer', None)
+    if tokenizer is None:
+        return MAX_CARACTERES_FRAGMENTO, False
+    limite = getattr(tokenizer, 'model_max_length', MAX_TOKENS_FRAGMENTO) or MAX_TOKENS_FRAGMENTO
+    # Margen para los tokens especiales y los espacios entre comentarios
+    return min(MAX_TOKENS_FRAGMENTO, limite) - 8, True
+
+
+def fragmentar(textos, longitudes, presupuesto):
+    """
+    Agrupa textos consecutivos en fragmentos de hasta ``presupuesto`` de longitud
+
+    Un texto más largo que el presupuesto forma un fragmento propio (el
+    modelo lo trunca en tokens). Devuelve listas de textos.
+    """
+    fragmentos = []
+    actual, ocupado = [], 0
+    for texto, longitud in zip(textos, longitudes):
+        if actual and ocupado + longitud + 1 > presupuesto:
+            fragmentos.append(actual)
+            actual, ocupado = [], 0
+        actual.append(texto)
+        ocupado += longitud + 1
+    if actual:
+        fragmentos.append(actual)
+    return fragmentos
+
+
+def clave_grupo(comentarios):
+    """
+    Hash del conjunto de comentarios (independiente del orden y de repeticiones)
+    """
+    return hash_texto("\n".join(sorted({normalizar_texto(c) for c in comentarios})))
+
+
+def _resumir_textos(summarizer, textos, tamano_lote, max_length, min_length):
+    """
+    Resumen de cada texto, en lotes ordenados por longitud
+    """
+    # Un modelo repartido en procesos (InferenciaParalela) arma sus propios lotes
+    if hasattr(summarizer, 'resumir_textos'):
+        return summarizer.resumir_textos(textos, tamano_lote, max_length, min_length)
+
+    resumenes = [None] * len(textos)
+    for lote in lotes_por_longitud(longitudes_tokens(summarizer, textos), tamano_lote):
+        salidas = summarizer([textos[i] for i in lote], max_length=max_length, min_length=min_length,
+                             do_sample=False, truncation=True, batch_size=len(lote))
+        for i, salida in zip(lote, salidas):
+            resumenes[i] = salida['summary_text']
+    return resumenes
+
+
+def resumir_grupos(summarizer, grupos, tamano_lote=TAMANO_LOTE_RESUMEN, max_length=MAX_LENGTH_RESUMEN,
+                   min_length=MIN_LENGTH_RESUMEN, cache=None):
+    """
+    Resumen map-reduce de cada grupo de comentarios: {clave: resumen}
+
+    ``grupos`` es ``{clave: [comentarios]}``. Cada ronda fragmenta los textos
+    pendientes de todos los grupos y los resume juntos en lotes; un grupo
+    termina cuando su ronda produce un solo resumen. Los resúmenes se guardan
+    en ``cache`` por el hash del conjunto de comentarios del grupo, así que
+    regenerar un reporte con los mismos datos no vuelve a llamar al modelo.
+    Si el modelo falla, la excepción se propaga.
+    """
+    modelo = identificador_modelo(summarizer)
+    parametros = [f"max_length={max_length}", f"min_length={min_length}"]
+    hashes = {clave: clave_grupo(comentarios) for clave, comentarios in grupos.items()}
+
+    guardados = cache.obtener(modelo, TAREA_CACHE, parametros, list(hashes.values())) if cache else {}
+    resumenes = {clave: guardados[h] for clave, h in hashes.items() if h in guardados}
+
+    # Comentarios únicos, los más repetidos primero
+    pendientes = {}
+    for clave, comentarios in grupos.items():
+        if clave not in resumenes:
+            conteos = defaultdict(int)
+            for comentario in comentarios:
+                conteos[comentario] += 1
+            pendientes[clave] = sorted(conteos, key=lambda c: -conteos[c])
+
+    presupuesto, con_tokenizador = presupuesto_fragmento(summarizer)
+    ronda = 0
+    while pendientes:
+        ronda += 1
+        entradas, duenos = [], []
+        for clave, textos in pendientes.items():
+            longitudes = longitudes_tokens(summarizer, textos) if con_tokenizador else [len(t) for t in textos]
+            for fragmento in fragmentar(textos, longitudes, presupuesto):
+                entradas.append(" ".join(fragmento))
+                duenos.append(clave)
+
+        parciales = defaultdict(list)
+        for clave, resumen in zip(duenos, _resumir_textos(summarizer, entradas, tamano_lote, max_length, min_length)):
+            parciales[clave].append(resumen)
+
+        pendientes = {}
+        for clave, partes in parciales.items():
+            if len(partes) == 1:
+                resumenes[clave] = partes[0]
+            elif ronda >= RONDAS_MAXIMAS:
+                resumenes[clave] = " ".join(partes)
+            else:
+                pendientes[clave] = partes
+
+    if cache:
+        cache.guardar(modelo, TAREA_CACHE, parametros,
+                      {hashes[clave]: resumenes[clave] for clave in grupos if hashes[clave] not in guardados})
+    return resumenes
@@ -1,314 +1,648 @@
-import pandas as pd
-import numpy as np
-from transformers import pipeline, AutoTokenizer, AutoModelForSequenceClassification
-import torch
+"""
+Análisis con IA del dataset de reportes ciudadanos (HuggingFace Transformers)
+Pipeline por lotes: limpia, clasifica, analiza sentimientos y prioriza el
+dataset por bloques, guardando un checkpoint después de cada bloque para
+poder reanudar una ejecución interrumpida
+
+Uso:
+    python senasoft_data_cleaningFinal.py
+    python senasoft_data_cleaningFinal.py --tamano-bloque 2000 --cascada
+    python senasoft_data_cleaningFinal.py --modo-clasificacion embeddings
+    python senasoft_data_cleaningFinal.py --desde-cero
+"""
+
+import argparse
+import json
+import os
 import warnings
+
+import pandas as pd
+from inferencia_ia import (clasificar_comentarios_lote, analizar_sentimientos_columna,
+                           comentarios_validos, CATEGORIAS_PROBLEMA, SIN_COMENTARIO)
+from cache_inferencia import CacheInferencia
+from clasificador_cascada import clasificar_en_cascada, MARGEN_CASCADA
+from modelos_ia import cargar_pipeline, resolver_modelo, PERFIL_MODELOS
+from inferencia_paralela import InferenciaParalela, autoajustar
+from registro_modelos import RegistroModelos
+from resumen_categorias import resumir_grupos
 warnings.filterwarnings('ignore')
 
-print("="*60)
-print("ANÁLISIS CON IA - HUGGINGFACE TRANSFORMERS")
-print("="*60)
+# Filas por bloque: cada bloque se procesa, se agrega a la salida y se guarda el checkpoint
+TAMANO_BLOQUE = int(os.environ.get('TAMANO_BLOQUE', 1000))
+
+# Backend de inferencia para clasificador y sentimientos: 'pytorch' u 'onnx'
+# (modelos int8 exportados con: python backend_onnx.py exportar)
+BACKEND_INFERENCIA = os.environ.get('BACKEND_INFERENCIA', 'pytorch').lower()
+
+# Procesos de inferencia (cada uno con su copia del modelo) e hilos de torch por proceso
+TRABAJADORES_INFERENCIA = int(os.environ.get('TRABAJADORES_INFERENCIA', 1))
+HILOS_INFERENCIA = int(os.environ.get('HILOS_INFERENCIA', 0))
+
+# Comentarios usados para autoajustar procesos × hilos
+MUESTRA_AUTOAJUSTE = 256
+
+# Modo de clasificación: 'zero-shot' (una pasada por etiqueta) o 'embeddings'
+# (una pasada por comentario, similitud con embeddings de etiquetas guardados)
+MODO_CLASIFICACION = os.environ.get('MODO_CLASIFICACION', 'zero-shot').lower()
+
+# Comentarios etiquetados usados para calibrar la confianza del modo embeddings
+MUESTRA_CALIBRACION = 500
+
+# Columnas que procesar_bloque agrega a las del dataset
+COLUMNAS_PROCESADAS = ['Tiene_Internet', 'Atencion_Gobierno', 'Es_Zona_Rural', 'Categoria_IA',
+                       'Confianza_IA', 'Sentimiento_IA', 'Estrellas_IA', 'Prioridad']
 
 # ============================================
 # 1. CARGA DE MODELOS DE HUGGINGFACE
 # ============================================
 
-print("\n📥 Cargando modelos de IA (esto puede tardar un poco la primera vez)...\n")
+def cargar_pipeline_onnx_o_none(tarea, backend=BACKEND_INFERENCIA):
+    """
+    Carga el pipeline ONNX de la tarea, o None para usar PyTorch
+    """
+    if backend != 'onnx':
+        return None
+    try:
+        from backend_onnx import cargar_pipeline_onnx
+        pipeline_onnx = cargar_pipeline_onnx(tarea)
+        print("   ✓ Usando backend ONNX Runtime (int8)")
+        return pipeline_onnx
+    except Exception as e:
+        print(f"   ⚠️  Backend ONNX no disponible ({e}), usando PyTorch")
+        return None
 
-# Modelo 1: Clasificación de texto en español
-print("1. Cargando clasificador de texto...")
-try:
-    clasificador = pipeline(
-        "zero-shot-classification",
-        model="facebook/bart-large-mnli",
-        device=-1  # CPU, cambia a 0 si tienes GPU
-    )
-    print("   ✓ Clasificador cargado")
-except Exception as e:
-    print(f"   ✗ Error: {e}")
-    clasificador = None
-
-# Modelo 2: Resumen automático
-print("2. Cargando modelo de resumen...")
-try:
-    summarizer = pipeline(
-        "summarization",
-        
-        model="facebook/bart-large-cnn",
-        device=-1
-    )
-    print("   ✓ Modelo de resumen cargado")
-except Exception as e:
-    print(f"   ✗ Error: {e}")
-    summarizer = None
-
-# Modelo 3: Análisis de sentimientos en español
-print("3. Cargando analizador de sentimientos...")
-try:
-    sentiment_analyzer = pipeline(
-        "sentiment-analysis",
-        model="nlptown/bert-base-multilingual-uncased-sentiment",
-        device=-1
-    )
-    print("   ✓ Analizador de sentimientos cargado")
-except Exception as e:
-    print(f"   ✗ Error: {e}")
-    sentiment_analyzer = None
 
-print("\n✓ Modelos cargados exitosamente\n")
+def cargar_pipeline_paralelo(tarea, backend, trabajadores, hilos):
+    """
+    Pool de procesos para la tarea, cada uno con su modelo y ``hilos`` hilos
+    """
+    paralela = InferenciaParalela(tarea, trabajadores=trabajadores, hilos=hilos or None, backend=backend)
+    print(f"   ✓ {paralela.trabajadores} procesos × {paralela.hilos} hilos")
+    return paralela
 
-# ============================================
-# 2. CARGA Y LIMPIEZA DE DATOS
-# ============================================
 
-print("="*60)
-print("CARGA Y LIMPIEZA DE DATOS")
-print("="*60)
+def cargar_clasificador_embeddings(args):
+    """
+    Clasificador por similitud de embeddings, calibrado con el dataset
 
-df = pd.read_csv('dataset.csv', sep=';', encoding='utf-8')
-print(f"\n✓ Dataset cargado: {len(df)} registros")
+    La temperatura se ajusta con los comentarios que ya traen
+    ``Categoría del problema``, para que ``Confianza_IA`` sea comparable con
+    la del zero-shot. Sin etiquetas válidas se mantiene la temperatura inicial.
+    """
+    from clasificacion_embeddings import ClasificadorEmbeddings
 
-# Limpieza
-df_clean = df.copy()
-df_clean['Edad'].fillna(df_clean['Edad'].median(), inplace=True)
-df_clean['Comentario'].fillna('Sin comentario', inplace=True)
-df_clean['Fecha del reporte'] = pd.to_datetime(
-    df_clean['Fecha del reporte'], 
-    format='%d/%m/%Y', 
-    errors='coerce'
-)
+    clasificador = ClasificadorEmbeddings()
+    try:
+        muestra = pd.read_csv(args.dataset, sep=args.separador, encoding='utf-8',
+                              usecols=['Comentario', 'Categoría del problema'],
+                              nrows=MUESTRA_CALIBRACION * 4).dropna()
+        muestra = muestra[comentarios_validos(muestra['Comentario'])].head(MUESTRA_CALIBRACION)
+        temperatura = clasificador.calibrar(muestra['Comentario'].astype(str).tolist(),
+                                            etiquetas_reales=muestra['Categoría del problema'].tolist(),
+                                            tamano_lote=args.tamano_lote)
+        print(f"   ✓ Confianza calibrada con {len(muestra)} comentarios (temperatura {temperatura:.4f})")
+    except Exception as e:
+        print(f"   ⚠️  Sin calibración ({e}), temperatura {clasificador.temperatura}")
+    return clasificador
 
-# Crear columnas adicionales
-df_clean['Tiene_Internet'] = df_clean['Acceso a internet'].map({0: 'No', 1: 'Sí'})
-df_clean['Atencion_Gobierno'] = df_clean['Atención previa del gobierno'].map({0: 'No', 1: 'Sí'})
-df_clean['Es_Zona_Rural'] = df_clean['Zona rural'].map({0: 'No', 1: 'Sí'})
 
-print(f"✓ Datos limpios: {len(df_clean)} registros procesados")
+def cargar_modelos(backend=BACKEND_INFERENCIA, trabajadores=1, hilos=0, args=None):
+    """
+    Registro con el clasificador, el modelo de resumen y el analizador de sentimientos
+
+    Cada modelo se carga la primera vez que se usa (``RegistroModelos``), de
+    modo que una ejecución que solo reanuda o no genera resúmenes no paga la
+    carga de los modelos que no necesita. Con más de un trabajador, los
+    modelos se cargan en procesos separados (``InferenciaParalela``). Con
+    ``args.modo_clasificacion == 'embeddings'`` el clasificador es un
+    ``ClasificadorEmbeddings`` calibrado. Un modelo que no se puede cargar
+    queda en None y su paso se omite.
+    """
+    # Perfil de modelos: 'grande' (originales) o 'pequeno' (alternativas pequeñas/destiladas).
+    # MODELO_CLASIFICACION, MODELO_SENTIMIENTO y MODELO_RESUMEN fuerzan un id o ruta local
+    print(f"\n🤖 Perfil de modelos: {PERFIL_MODELOS} (se cargan al primer uso)\n")
+
+    if trabajadores <= 1 and hilos:
+        import torch
+        torch.set_num_threads(hilos)
+
+    embeddings = args is not None and args.modo_clasificacion == 'embeddings'
+
+    # Modelo 1: Clasificación de texto en español
+    def clasificador():
+        if embeddings:
+            return cargar_clasificador_embeddings(args)
+        if trabajadores > 1:
+            return cargar_pipeline_paralelo("zero-shot-classification", backend, trabajadores, hilos)
+        return cargar_pipeline_onnx_o_none("zero-shot-classification", backend) or cargar_pipeline(
+            "zero-shot-classification"
+        )
+
+    # Modelo 2: Resumen automático (sin backend ONNX)
+    def summarizer():
+        if trabajadores > 1:
+            return cargar_pipeline_paralelo("summarization", 'pytorch', trabajadores, hilos)
+        return cargar_pipeline("summarization")
+
+    # Modelo 3: Análisis de sentimientos en español
+    def sentiment_analyzer():
+        if trabajadores > 1:
+            return cargar_pipeline_paralelo("sentiment-analysis", backend, trabajadores, hilos)
+        return cargar_pipeline_onnx_o_none("sentiment-analysis", backend) or cargar_pipeline("sentiment-analysis")
+
+    tarea_clasificador = 'feature-extraction' if embeddings else 'zero-shot-classification'
+    modelos = RegistroModelos()
+    modelos.registrar('clasificador', clasificador, tarea_clasificador,
+                      f"clasificador de texto ({resolver_modelo(tarea_clasificador)})")
+    modelos.registrar('summarizer', summarizer, 'summarization',
+                      f"modelo de resumen ({resolver_modelo('summarization')})")
+    modelos.registrar('sentiment_analyzer', sentiment_analyzer, 'sentiment-analysis',
+                      f"analizador de sentimientos ({resolver_modelo('sentiment-analysis')})")
+    return modelos
+
+
+def mostrar_metricas_modelos(modelos):
+    """
+    Tiempo de carga, memoria y primera inferencia de los modelos usados
+    """
+    print("\n⏱️  Modelos de IA:")
+    for nombre, metricas in modelos.metricas().items():
+        if 'tiempo_carga_s' not in metricas:
+            print(f"   {nombre}: no se cargó")
+        elif 'error' in metricas:
+            print(f"   {nombre}: error al cargar ({metricas['tiempo_carga_s']} s)")
+        else:
+            print(f"   {nombre}: carga {metricas['tiempo_carga_s']} s, RSS +{metricas['rss_delta_mb']} MB, "
+                  f"primera inferencia {metricas['primera_inferencia_ms']} ms")
+
+
+def autoajustar_procesos(args):
+    """
+    Mide procesos × hilos con el clasificador sobre una muestra del dataset
+    """
+    print("\n🎛️  Autoajustando procesos × hilos de inferencia...")
+    comentarios = pd.read_csv(args.dataset, sep=args.separador, encoding='utf-8',
+                              usecols=['Comentario'], nrows=MUESTRA_AUTOAJUSTE * 4)['Comentario']
+    muestra = comentarios[comentarios_validos(comentarios)].astype(str).head(MUESTRA_AUTOAJUSTE)
+    (trabajadores, hilos), _ = autoajustar("zero-shot-classification", muestra,
+                                           tamano_lote=args.tamano_lote, backend=args.backend)
+    print(f"   ✓ Mejor combinación: {trabajadores} procesos × {hilos} hilos")
+    return trabajadores, hilos
 
 # ============================================
-# 3. ANÁLISIS EXPLORATORIO
+# 2. CHECKPOINTS Y SALIDA PARCIAL
 # ============================================
 
-print("\n" + "="*60)
-print("ANÁLISIS EXPLORATORIO DE DATOS")
-print("="*60)
+def rutas_trabajo(salida):
+    """
+    Archivo de salida parcial (solo se agrega) y checkpoint de una salida
+    """
+    return f"{salida}.parcial", f"{salida}.checkpoint.json"
+
+
+def huella_dataset(ruta):
+    """
+    Identifica la versión del dataset de entrada (tamaño y fecha de modificación)
+    """
+    estado = os.stat(ruta)
+    return {'ruta': os.path.abspath(ruta), 'bytes': estado.st_size, 'modificado': estado.st_mtime}
+
+
+def leer_checkpoint(ruta_checkpoint):
+    """
+    Checkpoint guardado, o None si no existe o está dañado
+    """
+    try:
+        with open(ruta_checkpoint, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def guardar_checkpoint(ruta_checkpoint, checkpoint):
+    """
+    Escribe el checkpoint de forma atómica (archivo temporal + reemplazo)
+    """
+    temporal = f"{ruta_checkpoint}.tmp"
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump(checkpoint, f, ensure_ascii=False, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporal, ruta_checkpoint)
+
 
-print("\n📊 Distribución por categoría:")
-print(df_clean['Categoría del problema'].value_counts())
+def agregar_bloque(ruta_parcial, bloque, con_encabezado):
+    """
+    Agrega un bloque procesado a la salida parcial y devuelve su tamaño en bytes
+    """
+    with open(ruta_parcial, 'a', encoding='utf-8', newline='') as f:
+        bloque.to_csv(f, index=False, header=con_encabezado)
+        f.flush()
+        os.fsync(f.fileno())
+    return os.path.getsize(ruta_parcial)
 
-print("\n⚠️  Distribución por urgencia:")
-print(df_clean['Nivel de urgencia'].value_counts())
 
-print("\n🏙️  Distribución por ciudad:")
-print(df_clean['Ciudad'].value_counts())
+def escribir_salida_vacia(ruta_parcial, dataset, separador):
+    """
+    Salida parcial solo con encabezados, para ejecuciones que no procesaron ningún bloque
+    """
+    columnas = pd.read_csv(dataset, sep=separador, encoding='utf-8', nrows=0).columns.tolist()
+    pd.DataFrame(columns=columnas + COLUMNAS_PROCESADAS).to_csv(ruta_parcial, index=False, encoding='utf-8')
 
-print("\n🌐 Acceso a servicios:")
-print(f"Con internet: {df_clean['Tiene_Internet'].value_counts()['Sí']} ({df_clean['Tiene_Internet'].value_counts()['Sí']/len(df_clean)*100:.1f}%)")
-print(f"Zona rural: {df_clean['Es_Zona_Rural'].value_counts()['Sí']} ({df_clean['Es_Zona_Rural'].value_counts()['Sí']/len(df_clean)*100:.1f}%)")
+
+def preparar_reanudacion(ruta_parcial, ruta_checkpoint, huella, configuracion, desde_cero=False):
+    """
+    Estado inicial de la ejecución: reanuda el checkpoint o empieza de cero
+
+    Si el dataset cambió se empieza de cero. Si cambió la configuración
+    (incluidos backend y modelos) no se reanuda: los bloques nuevos quedarían
+    procesados de otra forma que los ya escritos, así que la ejecución se
+    detiene hasta restaurar la configuración o pasar ``--desde-cero``. La
+    salida parcial se recorta a los bytes registrados en el checkpoint,
+    descartando un bloque que se haya escrito a medias.
+    """
+    checkpoint = None if desde_cero else leer_checkpoint(ruta_checkpoint)
+
+    if checkpoint and checkpoint.get('dataset') != huella:
+        print("⚠️  El checkpoint no corresponde a este dataset: se empieza de cero")
+        checkpoint = None
+
+    if checkpoint and checkpoint.get('configuracion') != configuracion:
+        anterior = checkpoint.get('configuracion') or {}
+        cambios = sorted(clave for clave in set(anterior) | set(configuracion)
+                         if anterior.get(clave) != configuracion.get(clave))
+        raise SystemExit(f"❌ El checkpoint {ruta_checkpoint} se creó con otra configuración "
+                         f"({', '.join(cambios)}); restaure la configuración o use --desde-cero")
+
+    if checkpoint and os.path.exists(ruta_parcial) and os.path.getsize(ruta_parcial) >= checkpoint['bytes_salida']:
+        with open(ruta_parcial, 'r+b') as f:
+            f.truncate(checkpoint['bytes_salida'])
+        print(f"↩️  Reanudando: {checkpoint['bloques_completados']} bloques "
+              f"({checkpoint['filas_completadas']} filas) ya procesados")
+        return checkpoint
+
+    if checkpoint:
+        print("⚠️  Falta la salida parcial del checkpoint: se empieza de cero")
+
+    if os.path.exists(ruta_parcial):
+        os.remove(ruta_parcial)
+    return {
+        'dataset': huella,
+        'configuracion': configuracion,
+        'bloques_completados': 0,
+        'filas_completadas': 0,
+        'bytes_salida': 0
+    }
 
 # ============================================
-# 4. CLASIFICACIÓN AUTOMÁTICA CON IA
+# 3. LIMPIEZA Y PROCESAMIENTO POR BLOQUE
 # ============================================
 
-print("\n" + "="*60)
-print("CLASIFICACIÓN AUTOMÁTICA CON IA")
-print("="*60)
+def limpiar_bloque(df, mediana_edad):
+    """
+    Limpieza y columnas derivadas de un bloque de registros
+    """
+    df_clean = df.copy()
+    df_clean['Edad'] = df_clean['Edad'].fillna(mediana_edad)
+    df_clean['Comentario'] = df_clean['Comentario'].fillna(SIN_COMENTARIO)
+    df_clean['Fecha del reporte'] = pd.to_datetime(
+        df_clean['Fecha del reporte'],
+        format='%d/%m/%Y',
+        errors='coerce'
+    )
 
-# Categorías del problema
-categorias_problema = ["Educación", "Salud", "Medio Ambiente", "Seguridad"]
+    # Crear columnas adicionales
+    df_clean['Tiene_Internet'] = df_clean['Acceso a internet'].map({0: 'No', 1: 'Sí'})
+    df_clean['Atencion_Gobierno'] = df_clean['Atención previa del gobierno'].map({0: 'No', 1: 'Sí'})
+    df_clean['Es_Zona_Rural'] = df_clean['Zona rural'].map({0: 'No', 1: 'Sí'})
+    return df_clean
 
-def clasificar_comentario(comentario):
+
+def clasificar_bloque(df_clean, modelos, args, cache):
     """
-    Clasifica un comentario usando Zero-Shot Classification
+    Clasificación de categoría (directa o en cascada) de un bloque
     """
-    if not clasificador or comentario == 'Sin comentario':
-        return "No clasificado", 0.0
-    
-    try:
-        resultado = clasificador(
-            comentario,
-            candidate_labels=categorias_problema,
-            hypothesis_template="Este texto trata sobre {}."
+    if args.cascada:
+        clasificacion, reporte_cascada = clasificar_en_cascada(
+            df_clean['Comentario'],
+            # El zero-shot se carga solo si quedan comentarios ambiguos
+            obtener_clasificador=lambda: modelos['clasificador'],
+            etiquetas=CATEGORIAS_PROBLEMA,
+            margen=args.margen_cascada,
+            tamano_lote=args.tamano_lote,
+            cache=cache
         )
-        return resultado['labels'][0], resultado['scores'][0]
-    except Exception as e:
-        return "Error", 0.0
-
-# Clasificar muestra de comentarios
-print("\n🔍 Ejemplos de clasificación automática:\n")
-muestra = df_clean[df_clean['Comentario'] != 'Sin comentario'].head(10)
-
-resultados_clasificacion = []
-
-for idx, row in muestra.iterrows():
-    comentario = row['Comentario']
-    categoria_real = row['Categoría del problema']
-    
-    categoria_ia, confianza = clasificar_comentario(comentario)
-    
-    es_correcto = categoria_ia == categoria_real
-    resultados_clasificacion.append({
-        'correcto': es_correcto,
-        'confianza': confianza
-    })
-    
-    print(f"Comentario: '{comentario[:60]}...'")
-    print(f"   Real: {categoria_real}")
-    print(f"   IA: {categoria_ia} (confianza: {confianza*100:.1f}%)")
-    print(f"   {'✓ CORRECTO' if es_correcto else '✗ INCORRECTO'}")
-    print("-" * 60)
-
-# Calcular precisión
-if resultados_clasificacion:
-    precision = sum(r['correcto'] for r in resultados_clasificacion) / len(resultados_clasificacion)
-    confianza_promedio = np.mean([r['confianza'] for r in resultados_clasificacion])
-    print(f"\n📈 Precisión en la muestra: {precision*100:.1f}%")
-    print(f"📊 Confianza promedio: {confianza_promedio*100:.1f}%")
+        print(f"   🪜 Cascada (margen {args.margen_cascada}): " + ", ".join(
+            f"{nivel} {porcentaje}%" for nivel, porcentaje in reporte_cascada['niveles'].items()
+        ))
+        return clasificacion
+
+    return clasificar_comentarios_lote(
+        modelos['clasificador'],
+        df_clean['Comentario'],
+        etiquetas=CATEGORIAS_PROBLEMA,
+        tamano_lote=args.tamano_lote,
+        cache=cache
+    )
 
-# ============================================
-# 5. ANÁLISIS DE SENTIMIENTOS
-# ============================================
 
-print("\n" + "="*60)
-print("ANÁLISIS DE SENTIMIENTOS")
-print("="*60)
+def calcular_prioridad(row):
+    """
+    Calcula un score de prioridad (0-100) basado en múltiples factores
+    """
+    score = 50  # Base
+
+    # Factor 1: Urgencia (peso: 30 puntos)
+    if row['Nivel de urgencia'] == 'Urgente':
+        score += 30
 
-def analizar_sentimiento(comentario):
+    # Factor 2: Zona rural (peso: 15 puntos)
+    if row['Zona rural'] == 1:
+        score += 15
+
+    # Factor 3: Sin internet (peso: 10 puntos)
+    if row['Acceso a internet'] == 0:
+        score += 10
+
+    # Factor 4: Sin atención previa (peso: 10 puntos)
+    if row['Atención previa del gobierno'] == 0:
+        score += 10
+
+    # Factor 5: Categoría crítica (peso: 10 puntos)
+    if row['Categoría del problema'] in ['Salud', 'Seguridad']:
+        score += 10
+
+    # Factor 6: Análisis del comentario
+    comentario = str(row['Comentario']).lower()
+    palabras_criticas = ['emergencia', 'grave', 'peligro', 'crisis', 'sin acceso', 'falta']
+    if any(palabra in comentario for palabra in palabras_criticas):
+        score += 5
+
+    return min(score, 100)  # Máximo 100
+
+
+def procesar_bloque(df, mediana_edad, modelos, args, cache):
     """
-    Analiza el sentimiento del comentario (1-5 estrellas)
+    Limpia, clasifica, analiza sentimientos y prioriza un bloque
     """
-    if not sentiment_analyzer or comentario == 'Sin comentario':
-        return "Neutral", 3
-    
-    try:
-        resultado = sentiment_analyzer(comentario[:512])  # Límite de tokens
-        label = resultado[0]['label']
-        estrellas = int(label.split()[0])
-        
-        if estrellas <= 2:
-            sentimiento = "Negativo"
-        elif estrellas == 3:
-            sentimiento = "Neutral"
-        else:
-            sentimiento = "Positivo"
-        
-        return sentimiento, estrellas
-    except Exception as e:
-        return "Error", 0
+    df_clean = limpiar_bloque(df, mediana_edad)
 
-print("\n😊 Análisis de sentimientos en comentarios:\n")
+    clasificacion = clasificar_bloque(df_clean, modelos, args, cache)
+    df_clean['Categoria_IA'] = clasificacion['Categoria_IA']
+    df_clean['Confianza_IA'] = clasificacion['Confianza_IA']
+
+    sentimientos = analizar_sentimientos_columna(
+        modelos['sentiment_analyzer'],
+        df_clean['Comentario'],
+        tamano_lote=args.tamano_lote,
+        cache=cache
+    )
+    df_clean['Sentimiento_IA'] = sentimientos['Sentimiento']
+    df_clean['Estrellas_IA'] = sentimientos['Estrellas']
 
-for idx, row in muestra.head(5).iterrows():
-    comentario = row['Comentario']
-    sentimiento, puntuacion = analizar_sentimiento(comentario)
-    
-    emoji = "😞" if sentimiento == "Negativo" else "😐" if sentimiento == "Neutral" else "😊"
-    
-    print(f"Comentario: '{comentario[:60]}...'")
-    print(f"   Sentimiento: {sentimiento} {emoji} ({puntuacion}/5)")
-    print("-" * 60)
+    df_clean['Prioridad'] = df_clean.apply(calcular_prioridad, axis=1)
+    return df_clean
+
+
+def modelos_de_bloque(args):
+    """
+    Modelo que usa cada tarea de los bloques (variables MODELO_*, perfil o copia local)
+    """
+    tareas = ['feature-extraction' if args.modo_clasificacion == 'embeddings' else 'zero-shot-classification',
+              'sentiment-analysis']
+    return {tarea: resolver_modelo(tarea) for tarea in tareas}
+
+
+def ejecutar_por_bloques(args, modelos, cache):
+    """
+    Procesa el dataset bloque a bloque con checkpoint después de cada uno
+
+    Cada bloque procesado se agrega a ``<salida>.parcial`` y luego se actualiza
+    ``<salida>.checkpoint.json``. Al terminar, la salida parcial pasa a ser la
+    salida final y se elimina el checkpoint. Devuelve el dataset procesado completo.
+    """
+    ruta_parcial, ruta_checkpoint = rutas_trabajo(args.salida)
+    configuracion = {
+        'tamano_bloque': args.tamano_bloque,
+        'limite': args.limite,
+        'separador': args.separador,
+        'cascada': args.cascada,
+        'margen_cascada': args.margen_cascada,
+        'modo_clasificacion': args.modo_clasificacion,
+        'perfil_modelos': PERFIL_MODELOS,
+        'backend': args.backend,
+        'modelos': modelos_de_bloque(args)
+    }
+    checkpoint = preparar_reanudacion(ruta_parcial, ruta_checkpoint, huella_dataset(args.dataset),
+                                      configuracion, desde_cero=args.desde_cero)
+
+    # La mediana de edad se calcula sobre todo el dataset y se conserva al reanudar
+    if 'mediana_edad' not in checkpoint:
+        edades = pd.read_csv(args.dataset, sep=args.separador, encoding='utf-8',
+                             usecols=['Edad'], nrows=args.limite or None)['Edad']
+        checkpoint['mediana_edad'] = float(edades.median())
+
+    filas_hechas = checkpoint['filas_completadas']
+    restantes = args.limite - filas_hechas if args.limite else None
+    if restantes is None or restantes > 0:
+        lector = pd.read_csv(
+            args.dataset,
+            sep=args.separador,
+            encoding='utf-8',
+            skiprows=range(1, filas_hechas + 1),
+            nrows=restantes,
+            chunksize=args.tamano_bloque
+        )
+        for bloque in lector:
+            if bloque.empty:  # pandas entrega un bloque vacío si el CSV solo tiene encabezados
+                continue
+            numero = checkpoint['bloques_completados'] + 1
+            print(f"\n📦 Bloque {numero}: filas {filas_hechas + 1}-{filas_hechas + len(bloque)}")
+
+            procesado = procesar_bloque(bloque, checkpoint['mediana_edad'], modelos, args, cache)
+            checkpoint['bytes_salida'] = agregar_bloque(ruta_parcial, procesado,
+                                                        con_encabezado=checkpoint['bytes_salida'] == 0)
+            filas_hechas += len(bloque)
+            checkpoint['bloques_completados'] = numero
+            checkpoint['filas_completadas'] = filas_hechas
+            guardar_checkpoint(ruta_checkpoint, checkpoint)
+            print(f"   ✓ Checkpoint guardado ({filas_hechas} filas)")
+
+    # Dataset vacío o límite ya cubierto por el checkpoint sin salida parcial
+    if not os.path.exists(ruta_parcial):
+        escribir_salida_vacia(ruta_parcial, args.dataset, args.separador)
+    os.replace(ruta_parcial, args.salida)
+    if os.path.exists(ruta_checkpoint):
+        os.remove(ruta_checkpoint)
+    print(f"\n✓ Dataset procesado guardado: {args.salida}")
+
+    df_clean = pd.read_csv(args.salida, encoding='utf-8')
+    df_clean['Fecha del reporte'] = pd.to_datetime(df_clean['Fecha del reporte'], errors='coerce')
+    return df_clean
 
 # ============================================
-# 6. DETERMINACIÓN INTELIGENTE DE URGENCIA
+# 4. REPORTES SOBRE EL DATASET PROCESADO
 # ============================================
 
-print("\n" + "="*60)
-print("DETERMINACIÓN INTELIGENTE DE URGENCIA")
-print("="*60)
+def mostrar_exploracion(df_clean):
+    """
+    Distribuciones principales del dataset
+    """
+    print("\n" + "="*60)
+    print("ANÁLISIS EXPLORATORIO DE DATOS")
+    print("="*60)
+
+    print("\n📊 Distribución por categoría:")
+    print(df_clean['Categoría del problema'].value_counts())
+
+    print("\n⚠️  Distribución por urgencia:")
+    print(df_clean['Nivel de urgencia'].value_counts())
+
+    print("\n🏙️  Distribución por ciudad:")
+    print(df_clean['Ciudad'].value_counts())
+
+    print("\n🌐 Acceso a servicios:")
+    con_internet = (df_clean['Tiene_Internet'] == 'Sí').sum()
+    zona_rural = (df_clean['Es_Zona_Rural'] == 'Sí').sum()
+    print(f"Con internet: {con_internet} ({con_internet/len(df_clean)*100:.1f}%)")
+    print(f"Zona rural: {zona_rural} ({zona_rural/len(df_clean)*100:.1f}%)")
+
+
+def mostrar_clasificacion(df_clean, muestra):
+    """
+    Ejemplos y precisión de la clasificación automática
+    """
+    print("\n" + "="*60)
+    print("CLASIFICACIÓN AUTOMÁTICA CON IA")
+    print("="*60)
+
+    print("\n🔍 Ejemplos de clasificación automática:\n")
+    for idx, row in muestra.iterrows():
+        categoria_ia = row['Categoria_IA']
+        confianza = row['Confianza_IA']
+
+        print(f"Comentario: '{row['Comentario'][:60]}...'")
+        print(f"   Real: {row['Categoría del problema']}")
+        print(f"   IA: {categoria_ia} (confianza: {confianza*100:.1f}%)")
+        print(f"   {'✓ CORRECTO' if categoria_ia == row['Categoría del problema'] else '✗ INCORRECTO'}")
+        print("-" * 60)
+
+    # Calcular precisión sobre todos los comentarios clasificados
+    clasificados = df_clean[~df_clean['Categoria_IA'].isin(["No clasificado", "Error"])]
+    if len(clasificados) > 0:
+        precision = (clasificados['Categoria_IA'] == clasificados['Categoría del problema']).mean()
+        confianza_promedio = clasificados['Confianza_IA'].mean()
+        print(f"\n📈 Precisión sobre {len(clasificados)} comentarios: {precision*100:.1f}%")
+        print(f"📊 Confianza promedio: {confianza_promedio*100:.1f}%")
+
+
+def mostrar_sentimientos(df_clean, muestra):
+    """
+    Ejemplos del análisis de sentimientos
+    """
+    print("\n" + "="*60)
+    print("ANÁLISIS DE SENTIMIENTOS")
+    print("="*60)
+
+    print("\n😊 Análisis de sentimientos en comentarios:\n")
+    for idx, row in df_clean.loc[muestra.index].head(5).iterrows():
+        comentario = row['Comentario']
+        sentimiento, puntuacion = row['Sentimiento_IA'], row['Estrellas_IA']
+
+        emoji = "😞" if sentimiento == "Negativo" else "😐" if sentimiento == "Neutral" else "😊"
+
+        print(f"Comentario: '{comentario[:60]}...'")
+        print(f"   Sentimiento: {sentimiento} {emoji} ({puntuacion}/5)")
+        print("-" * 60)
+
 
 def determinar_urgencia_ia(comentario, categoria):
     """
     Determina urgencia basándose en palabras clave y contexto
     """
     comentario_lower = comentario.lower()
-    
+
     # Palabras que indican urgencia alta
     palabras_urgentes = [
         'urgente', 'inmediato', 'peligro', 'riesgo', 'emergencia',
         'grave', 'crítico', 'necesitamos', 'falta', 'sin acceso',
         'no hay', 'escasez', 'carencia', 'crisis'
     ]
-    
+
     # Palabras que indican urgencia baja
     palabras_no_urgentes = [
         'mejorar', 'sería bueno', 'podríamos', 'deseamos',
         'nos gustaría', 'esperamos', 'quisiéramos'
     ]
-    
+
     # Contar coincidencias
     urgencia_score = sum(1 for palabra in palabras_urgentes if palabra in comentario_lower)
     no_urgencia_score = sum(1 for palabra in palabras_no_urgentes if palabra in comentario_lower)
-    
+
     # Categorías que suelen ser más urgentes
     categorias_urgentes = ['Salud', 'Seguridad']
-    
+
     if categoria in categorias_urgentes:
         urgencia_score += 1
-    
+
     # Decisión
     if urgencia_score > no_urgencia_score:
         return "Urgente", urgencia_score
     else:
         return "No urgente", urgencia_score
 
-print("\n⚡ Evaluación de urgencia:\n")
-
-for idx, row in muestra.head(5).iterrows():
-    comentario = row['Comentario']
-    categoria = row['Categoría del problema']
-    urgencia_real = row['Nivel de urgencia']
-    
-    urgencia_ia, score = determinar_urgencia_ia(comentario, categoria)
-    
-    print(f"Comentario: '{comentario[:60]}...'")
-    print(f"   Real: {urgencia_real}")
-    print(f"   IA: {urgencia_ia} (score: {score})")
-    print(f"   {'✓ CORRECTO' if urgencia_ia == urgencia_real else '✗ DIFERENTE'}")
-    print("-" * 60)
 
-# ============================================
-# 7. RESÚMENES AUTOMÁTICOS POR CATEGORÍA
-# ============================================
+def mostrar_urgencia(muestra):
+    """
+    Evaluación de urgencia por palabras clave sobre la muestra
+    """
+    print("\n" + "="*60)
+    print("DETERMINACIÓN INTELIGENTE DE URGENCIA")
+    print("="*60)
+
+    print("\n⚡ Evaluación de urgencia:\n")
+    for idx, row in muestra.head(5).iterrows():
+        comentario = row['Comentario']
+        categoria = row['Categoría del problema']
+        urgencia_real = row['Nivel de urgencia']
+
+        urgencia_ia, score = determinar_urgencia_ia(comentario, categoria)
+
+        print(f"Comentario: '{comentario[:60]}...'")
+        print(f"   Real: {urgencia_real}")
+        print(f"   IA: {urgencia_ia} (score: {score})")
+        print(f"   {'✓ CORRECTO' if urgencia_ia == urgencia_real else '✗ DIFERENTE'}")
+        print("-" * 60)
+
+
+def generar_resumenes_categorias(df_clean, summarizer, cache=None, min_caracteres=1000):
+    """
+    Resumen de cada categoría: {categoria: resumen}
 
-print("\n" + "="*60)
-print("RESÚMENES AUTOMÁTICOS POR CATEGORÍA")
-print("="*60)
-
-def generar_resumen_categoria(df_categoria, categoria, max_comentarios=20):
-    """
-    Genera un resumen de los problemas en una categoría
-    """
-    comentarios = df_categoria[df_categoria['Comentario'] != 'Sin comentario']['Comentario'].tolist()
-    
-    if not comentarios:
-        return "No hay comentarios disponibles para resumir."
-    
-    # Tomar muestra representativa
-    comentarios_muestra = comentarios[:max_comentarios]
-    texto_completo = " ".join(comentarios_muestra)
-    
-    # Si el texto es muy largo, resumir con IA
-    if len(texto_completo) > 1000 and summarizer:
+    Las categorías con más de ``min_caracteres`` de comentarios se resumen con
+    IA (map-reduce sobre todos sus comentarios, ver ``resumir_grupos``); las
+    demás, o todas si no hay modelo o falla, con ``generar_resumen_manual``.
+    Se calcula una vez y se usa en la consola y en el reporte.
+    """
+    grupos = {}
+    for categoria, df_cat in df_clean.groupby('Categoría del problema', sort=False):
+        comentarios = df_cat.loc[df_cat['Comentario'] != SIN_COMENTARIO, 'Comentario'].dropna().astype(str).tolist()
+        if summarizer and sum(len(c) + 1 for c in comentarios) > min_caracteres:
+            grupos[categoria] = comentarios
+
+    resumenes = {}
+    if grupos:
         try:
-            # Dividir en chunks si es necesario
-            max_chunk = 1024
-            if len(texto_completo) > max_chunk:
-                texto_completo = texto_completo[:max_chunk]
-            
-            resumen_ia = summarizer(
-                texto_completo,
-                max_length=150,
-                min_length=50,
-                do_sample=False
-            )
-            resumen = resumen_ia[0]['summary_text']
+            resumenes = resumir_grupos(summarizer, grupos, cache=cache)
+            print(f"✓ Resúmenes con IA: {len(resumenes)} categorías")
         except Exception as e:
-            resumen = f"Error al generar resumen automático: {e}"
-    else:
-        # Resumen manual basado en frecuencia de palabras clave
-        resumen = generar_resumen_manual(df_categoria, categoria)
-    
-    return resumen
+            print(f"⚠️  Error al generar resúmenes automáticos: {e}")
+
+    for categoria, df_cat in df_clean.groupby('Categoría del problema', sort=False):
+        if categoria not in resumenes:
+            resumenes[categoria] = generar_resumen_manual(df_cat, categoria)
+    return resumenes
+
 
 def generar_resumen_manual(df_categoria, categoria):
     """
@@ -318,212 +652,268 @@ def generar_resumen_manual(df_categoria, categoria):
     urgentes = len(df_categoria[df_categoria['Nivel de urgencia'] == 'Urgente'])
     zona_rural = len(df_categoria[df_categoria['Zona rural'] == 1])
     sin_internet = len(df_categoria[df_categoria['Acceso a internet'] == 0])
-    
+
     resumen = f"""En la categoría de {categoria} se registraron {total} reportes. """
-    
+
     if urgentes > 0:
         resumen += f"{urgentes} casos ({urgentes/total*100:.1f}%) requieren atención urgente. "
-    
+
     if zona_rural > total/2:
         resumen += f"La mayoría de los reportes provienen de zonas rurales ({zona_rural} casos). "
-    
+
     if sin_internet > total/3:
         resumen += f"Un {sin_internet/total*100:.1f}% de los reportantes no tienen acceso a internet. "
-    
+
     # Palabras más frecuentes
     from collections import Counter
     palabras = " ".join(df_categoria['Comentario'].dropna()).lower().split()
     palabras_filtradas = [p for p in palabras if len(p) > 4]
     mas_comunes = Counter(palabras_filtradas).most_common(5)
-    
+
     if mas_comunes:
         palabras_clave = ", ".join([p[0] for p in mas_comunes[:3]])
         resumen += f"Palabras clave: {palabras_clave}."
-    
-    return resumen
 
-# Generar resúmenes por categoría
-print("\n📄 Resúmenes ejecutivos por categoría:\n")
-
-for categoria in df_clean['Categoría del problema'].unique():
-    print(f"{'='*60}")
-    print(f"📋 CATEGORÍA: {categoria.upper()}")
-    print('='*60)
-    
-    df_cat = df_clean[df_clean['Categoría del problema'] == categoria]
-    
-    print(f"\n📊 Estadísticas:")
-    print(f"   Total de reportes: {len(df_cat)}")
-    print(f"   Casos urgentes: {len(df_cat[df_cat['Nivel de urgencia'] == 'Urgente'])}")
-    print(f"   Zona rural: {len(df_cat[df_cat['Zona rural'] == 1])}")
-    print(f"   Sin internet: {len(df_cat[df_cat['Acceso a internet'] == 0])}")
-    
-    resumen = generar_resumen_categoria(df_cat, categoria)
-    print(f"\n📝 RESUMEN:\n{resumen}\n")
-
-# ============================================
-# 8. PRIORIZACIÓN INTELIGENTE
-# ============================================
+    return resumen
 
-print("="*60)
-print("SISTEMA DE PRIORIZACIÓN INTELIGENTE")
-print("="*60)
 
-def calcular_prioridad(row):
+def mostrar_resumenes(df_clean, resumenes):
     """
-    Calcula un score de prioridad (0-100) basado en múltiples factores
+    Estadísticas y resumen ejecutivo de cada categoría
     """
-    score = 50  # Base
-    
-    # Factor 1: Urgencia (peso: 30 puntos)
-    if row['Nivel de urgencia'] == 'Urgente':
-        score += 30
-    
-    # Factor 2: Zona rural (peso: 15 puntos)
-    if row['Zona rural'] == 1:
-        score += 15
-    
-    # Factor 3: Sin internet (peso: 10 puntos)
-    if row['Acceso a internet'] == 0:
-        score += 10
-    
-    # Factor 4: Sin atención previa (peso: 10 puntos)
-    if row['Atención previa del gobierno'] == 0:
-        score += 10
-    
-    # Factor 5: Categoría crítica (peso: 10 puntos)
-    if row['Categoría del problema'] in ['Salud', 'Seguridad']:
-        score += 10
-    
-    # Factor 6: Análisis del comentario
-    comentario = str(row['Comentario']).lower()
-    palabras_criticas = ['emergencia', 'grave', 'peligro', 'crisis', 'sin acceso', 'falta']
-    if any(palabra in comentario for palabra in palabras_criticas):
-        score += 5
-    
-    return min(score, 100)  # Máximo 100
+    print("\n" + "="*60)
+    print("RESÚMENES AUTOMÁTICOS POR CATEGORÍA")
+    print("="*60)
 
-# Calcular prioridades
-df_clean['Prioridad'] = df_clean.apply(calcular_prioridad, axis=1)
+    print("\n📄 Resúmenes ejecutivos por categoría:\n")
+    for categoria in df_clean['Categoría del problema'].unique():
+        print(f"{'='*60}")
+        print(f"📋 CATEGORÍA: {categoria.upper()}")
+        print('='*60)
 
-# Ordenar por prioridad
-df_priorizado = df_clean.sort_values('Prioridad', ascending=False)
+        df_cat = df_clean[df_clean['Categoría del problema'] == categoria]
 
-print("\n🎯 TOP 10 CASOS MÁS PRIORITARIOS:\n")
+        print(f"\n📊 Estadísticas:")
+        print(f"   Total de reportes: {len(df_cat)}")
+        print(f"   Casos urgentes: {len(df_cat[df_cat['Nivel de urgencia'] == 'Urgente'])}")
+        print(f"   Zona rural: {len(df_cat[df_cat['Zona rural'] == 1])}")
+        print(f"   Sin internet: {len(df_cat[df_cat['Acceso a internet'] == 0])}")
 
-for idx, row in df_priorizado.head(10).iterrows():
-    print(f"Prioridad: {row['Prioridad']}/100 ⭐")
-    print(f"   ID: {row['ID']}")
-    print(f"   Ciudad: {row['Ciudad']}")
-    print(f"   Categoría: {row['Categoría del problema']}")
-    print(f"   Urgencia: {row['Nivel de urgencia']}")
-    print(f"   Zona rural: {row['Es_Zona_Rural']}")
-    print(f"   Comentario: {row['Comentario'][:70]}...")
-    print("-" * 60)
+        print(f"\n📝 RESUMEN:\n{resumenes[categoria]}\n")
 
-# ============================================
-# 9. CONSIDERACIONES ÉTICAS
-# ============================================
 
-print("\n" + "="*60)
-print("ANÁLISIS ÉTICO - DETECCIÓN DE SESGOS")
-print("="*60)
-
-print("\n⚠️  SESGOS IDENTIFICADOS:\n")
-
-# Sesgo 1: Género
-print("1. Distribución por género:")
-distribucion_genero = df_clean['Género'].value_counts(normalize=True) * 100
-print(distribucion_genero)
-if distribucion_genero.max() > 60:
-    print("   ⚠️  Posible sesgo: Sobrerrepresentación de un género\n")
-
-# Sesgo 2: Brecha digital
-print("2. Acceso a internet:")
-rural_internet = df_clean[df_clean['Zona rural'] == 1]['Acceso a internet'].mean() * 100
-urbano_internet = df_clean[df_clean['Zona rural'] == 0]['Acceso a internet'].mean() * 100
-print(f"   Zona rural: {rural_internet:.1f}%")
-print(f"   Zona urbana: {urbano_internet:.1f}%")
-if urbano_internet > rural_internet * 1.5:
-    print(f"   ⚠️  Brecha digital: {urbano_internet - rural_internet:.1f}% de diferencia\n")
-
-# Sesgo 3: Atención gubernamental
-print("3. Atención previa del gobierno:")
-rural_atencion = df_clean[df_clean['Zona rural'] == 1]['Atención previa del gobierno'].mean() * 100
-urbano_atencion = df_clean[df_clean['Zona rural'] == 0]['Atención previa del gobierno'].mean() * 100
-print(f"   Zona rural: {rural_atencion:.1f}%")
-print(f"   Zona urbana: {urbano_atencion:.1f}%")
-if urbano_atencion > rural_atencion:
-    print(f"   ⚠️  Desigualdad en atención: {urbano_atencion - rural_atencion:.1f}% de diferencia\n")
-
-print("✓ MEDIDAS DE PRIVACIDAD IMPLEMENTADAS:")
-print("   - Datos anonimizados")
-print("   - No se comparte información personal identificable")
-print("   - Agregación estadística para proteger identidades")
-print("   - Consentimiento implícito en reportes públicos\n")
-
-# ============================================
-# 10. EXPORTAR RESULTADOS
-# ============================================
+def mostrar_prioridades(df_priorizado):
+    """
+    Casos con mayor prioridad
+    """
+    print("="*60)
+    print("SISTEMA DE PRIORIZACIÓN INTELIGENTE")
+    print("="*60)
+
+    print("\n🎯 TOP 10 CASOS MÁS PRIORITARIOS:\n")
+    for idx, row in df_priorizado.head(10).iterrows():
+        print(f"Prioridad: {row['Prioridad']}/100 ⭐")
+        print(f"   ID: {row['ID']}")
+        print(f"   Ciudad: {row['Ciudad']}")
+        print(f"   Categoría: {row['Categoría del problema']}")
+        print(f"   Urgencia: {row['Nivel de urgencia']}")
+        print(f"   Zona rural: {row['Es_Zona_Rural']}")
+        print(f"   Comentario: {row['Comentario'][:70]}...")
+        print("-" * 60)
+
+
+def analizar_sesgos(df_clean):
+    """
+    Detección de sesgos: género, brecha digital y atención gubernamental
+    """
+    print("\n" + "="*60)
+    print("ANÁLISIS ÉTICO - DETECCIÓN DE SESGOS")
+    print("="*60)
+
+    print("\n⚠️  SESGOS IDENTIFICADOS:\n")
+
+    # Sesgo 1: Género
+    print("1. Distribución por género:")
+    distribucion_genero = df_clean['Género'].value_counts(normalize=True) * 100
+    print(distribucion_genero)
+    if distribucion_genero.max() > 60:
+        print("   ⚠️  Posible sesgo: Sobrerrepresentación de un género\n")
+
+    # Sesgo 2: Brecha digital
+    print("2. Acceso a internet:")
+    rural_internet = df_clean[df_clean['Zona rural'] == 1]['Acceso a internet'].mean() * 100
+    urbano_internet = df_clean[df_clean['Zona rural'] == 0]['Acceso a internet'].mean() * 100
+    print(f"   Zona rural: {rural_internet:.1f}%")
+    print(f"   Zona urbana: {urbano_internet:.1f}%")
+    if urbano_internet > rural_internet * 1.5:
+        print(f"   ⚠️  Brecha digital: {urbano_internet - rural_internet:.1f}% de diferencia\n")
+
+    # Sesgo 3: Atención gubernamental
+    print("3. Atención previa del gobierno:")
+    rural_atencion = df_clean[df_clean['Zona rural'] == 1]['Atención previa del gobierno'].mean() * 100
+    urbano_atencion = df_clean[df_clean['Zona rural'] == 0]['Atención previa del gobierno'].mean() * 100
+    print(f"   Zona rural: {rural_atencion:.1f}%")
+    print(f"   Zona urbana: {urbano_atencion:.1f}%")
+    if urbano_atencion > rural_atencion:
+        print(f"   ⚠️  Desigualdad en atención: {urbano_atencion - rural_atencion:.1f}% de diferencia\n")
+
+    print("✓ MEDIDAS DE PRIVACIDAD IMPLEMENTADAS:")
+    print("   - Datos anonimizados")
+    print("   - No se comparte información personal identificable")
+    print("   - Agregación estadística para proteger identidades")
+    print("   - Consentimiento implícito en reportes públicos\n")
+
+    return {
+        'brecha_digital': urbano_internet - rural_internet,
+        'brecha_atencion': urbano_atencion - rural_atencion
+    }
+
+
+def exportar_reportes(df_clean, df_priorizado, brechas, resumenes):
+    """
+    Casos prioritarios y reporte de texto con resúmenes y consideraciones éticas
+    """
+    print("="*60)
+    print("EXPORTANDO RESULTADOS")
+    print("="*60)
+
+    # Guardar casos prioritarios
+    df_priorizado.head(50).to_csv('casos_prioritarios.csv', index=False, encoding='utf-8')
+    print("✓ Casos prioritarios guardados: casos_prioritarios.csv")
+
+    # Generar reporte completo
+    with open('reporte_analisis_ia.txt', 'w', encoding='utf-8') as f:
+        f.write("="*60 + "\n")
+        f.write("REPORTE DE ANÁLISIS CON INTELIGENCIA ARTIFICIAL\n")
+        f.write("Modelos: HuggingFace Transformers\n")
+        f.write("="*60 + "\n\n")
+
+        f.write(f"Total de registros analizados: {len(df_clean)}\n")
+        f.write(f"Casos urgentes: {len(df_clean[df_clean['Nivel de urgencia'] == 'Urgente'])}\n")
+        f.write(f"Zona rural: {len(df_clean[df_clean['Zona rural'] == 1])}\n\n")
+
+        f.write("RESÚMENES POR CATEGORÍA:\n")
+        f.write("="*60 + "\n\n")
+
+        for categoria in df_clean['Categoría del problema'].unique():
+            f.write(f"{categoria}:\n{resumenes[categoria]}\n\n")
+
+        f.write("="*60 + "\n")
+        f.write("CONSIDERACIONES ÉTICAS\n")
+        f.write("="*60 + "\n\n")
+        f.write(f"Brecha digital (rural vs urbano): {brechas['brecha_digital']:.1f}%\n")
+        f.write(f"Brecha de atención gubernamental: {brechas['brecha_atencion']:.1f}%\n")
+
+    print("✓ Reporte completo guardado: reporte_analisis_ia.txt")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Análisis con IA del dataset por bloques reanudables")
+    parser.add_argument('--dataset', default='dataset.csv')
+    parser.add_argument('--salida', default='dataset_procesado_huggingface.csv')
+    parser.add_argument('--separador', default=',')
+    parser.add_argument('--tamano-bloque', type=int, default=TAMANO_BLOQUE,
+                        help="Filas por bloque (checkpoint después de cada uno)")
+    parser.add_argument('--tamano-lote', type=int, default=int(os.environ.get('TAMANO_LOTE', 16)),
+                        help="Comentarios por lote en cada pasada del modelo")
+    parser.add_argument('--limite', type=int, default=int(os.environ.get('LIMITE_CLASIFICACION', 0)),
+                        help="Máximo de filas a procesar (0 = todo el dataset)")
+    parser.add_argument('--cascada', action='store_true',
+                        default=os.environ.get('CASCADA', '0').lower() in ('1', 'true', 'si', 'sí'),
+                        help="Palabras clave primero, zero-shot solo para comentarios ambiguos")
+    parser.add_argument('--margen-cascada', type=float,
+                        default=float(os.environ.get('MARGEN_CASCADA', MARGEN_CASCADA)))
+    parser.add_argument('--modo-clasificacion', choices=['zero-shot', 'embeddings'], default=MODO_CLASIFICACION,
+                        help="'embeddings': una pasada por comentario y similitud con las etiquetas")
+    parser.add_argument('--backend', choices=['pytorch', 'onnx'], default=BACKEND_INFERENCIA)
+    parser.add_argument('--trabajadores', type=int, default=TRABAJADORES_INFERENCIA,
+                        help="Procesos de inferencia, cada uno con su copia del modelo")
+    parser.add_argument('--hilos', type=int, default=HILOS_INFERENCIA,
+                        help="Hilos de torch por proceso (0 = núcleos / procesos)")
+    parser.add_argument('--autoajustar', action='store_true',
+                        help="Elegir procesos × hilos midiendo el rendimiento en esta máquina")
+    parser.add_argument('--calentar', action='store_true',
+                        help="Cargar los modelos y hacer una inferencia de prueba antes de procesar")
+    parser.add_argument('--desde-cero', action='store_true', help="Ignorar el checkpoint existente")
+    parser.add_argument('--sin-reportes', action='store_true',
+                        help="Solo procesar el dataset, sin resúmenes ni reportes")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    print("="*60)
+    print("ANÁLISIS CON IA - HUGGINGFACE TRANSFORMERS")
+    print("="*60)
+
+    if args.autoajustar:
+        args.trabajadores, args.hilos = autoajustar_procesos(args)
+
+    modelos = cargar_modelos(args.backend, args.trabajadores, args.hilos, args)
+
+    if args.calentar:
+        modelos.calentar()
+
+    # Caché de inferencia en disco: las re-ejecuciones solo infieren textos nuevos
+    cache_inferencia = CacheInferencia()
+
+    print("="*60)
+    print("PROCESAMIENTO POR BLOQUES")
+    print("="*60)
+    print(f"\n🔍 Dataset: {args.dataset} (bloques de {args.tamano_bloque} filas, "
+          f"lotes de {args.tamano_lote} comentarios)")
 
-print("="*60)
-print("EXPORTANDO RESULTADOS")
-print("="*60)
-
-# Guardar dataset procesado
-df_clean.to_csv('dataset_procesado_huggingface.csv', index=False, encoding='utf-8')
-print("\n✓ Dataset procesado guardado: dataset_procesado_huggingface.csv")
-
-# Guardar casos prioritarios
-df_priorizado.head(50).to_csv('casos_prioritarios.csv', index=False, encoding='utf-8')
-print("✓ Casos prioritarios guardados: casos_prioritarios.csv")
-
-# Generar reporte completo
-with open('reporte_analisis_ia.txt', 'w', encoding='utf-8') as f:
-    f.write("="*60 + "\n")
-    f.write("REPORTE DE ANÁLISIS CON INTELIGENCIA ARTIFICIAL\n")
-    f.write("Modelos: HuggingFace Transformers\n")
-    f.write("="*60 + "\n\n")
-    
-    f.write(f"Total de registros analizados: {len(df_clean)}\n")
-    f.write(f"Casos urgentes: {len(df_clean[df_clean['Nivel de urgencia'] == 'Urgente'])}\n")
-    f.write(f"Zona rural: {len(df_clean[df_clean['Zona rural'] == 1])}\n\n")
-    
-    f.write("RESÚMENES POR CATEGORÍA:\n")
-    f.write("="*60 + "\n\n")
-    
-    for categoria in df_clean['Categoría del problema'].unique():
-        df_cat = df_clean[df_clean['Categoría del problema'] == categoria]
-        resumen = generar_resumen_categoria(df_cat, categoria)
-        f.write(f"{categoria}:\n{resumen}\n\n")
-    
-    f.write("="*60 + "\n")
-    f.write("CONSIDERACIONES ÉTICAS\n")
-    f.write("="*60 + "\n\n")
-    f.write(f"Brecha digital (rural vs urbano): {urbano_internet - rural_internet:.1f}%\n")
-    f.write(f"Brecha de atención gubernamental: {urbano_atencion - rural_atencion:.1f}%\n")
-
-print("✓ Reporte completo guardado: reporte_analisis_ia.txt")
-
-print("\n" + "="*60)
-print("✅ PROCESO COMPLETADO EXITOSAMENTE")
-print("="*60)
-
-print("\n🎯 Capacidades implementadas:")
-print("   ✓ Clasificación automática con Zero-Shot Learning")
-print("   ✓ Análisis de sentimientos multilingüe")
-print("   ✓ Determinación inteligente de urgencia")
-print("   ✓ Resúmenes automáticos por categoría")
-print("   ✓ Sistema de priorización (0-100)")
-print("   ✓ Detección de sesgos éticos")
-print("   ✓ Medidas de privacidad")
-
-print("\n📁 Archivos generados:")
-print("   1. dataset_procesado_huggingface.csv")
-print("   2. casos_prioritarios.csv")
-print("   3. reporte_analisis_ia.txt")
-
-print("\n💡 Sugerencia para el reto:")
-print("   Este análisis cumple con el 40% de 'Uso correcto de técnicas de IA'")
-print("   Ahora puedes crear la aplicación web para visualizar estos resultados")
-print("   y completar los requisitos de innovación y presentación.")
+    try:
+        df_clean = ejecutar_por_bloques(args, modelos, cache_inferencia)
+        print(f"✓ Datos procesados: {len(df_clean)} registros")
+
+        if args.sin_reportes:
+            return
+
+        muestra = df_clean[df_clean['Comentario'] != SIN_COMENTARIO].head(10)
+        mostrar_exploracion(df_clean)
+        mostrar_clasificacion(df_clean, muestra)
+        mostrar_sentimientos(df_clean, muestra)
+        mostrar_urgencia(muestra)
+
+        # Resúmenes calculados una vez (y guardados en caché) para la consola y el reporte
+        resumenes = generar_resumenes_categorias(df_clean, modelos['summarizer'], cache_inferencia)
+        mostrar_resumenes(df_clean, resumenes)
+
+        # Ordenar por prioridad
+        df_priorizado = df_clean.sort_values('Prioridad', ascending=False)
+        mostrar_prioridades(df_priorizado)
+
+        brechas = analizar_sesgos(df_clean)
+        exportar_reportes(df_clean, df_priorizado, brechas, resumenes)
+    finally:
+        mostrar_metricas_modelos(modelos)
+        modelos.cerrar()
+
+    print("\n" + "="*60)
+    print("✅ PROCESO COMPLETADO EXITOSAMENTE")
+    print("="*60)
+
+    print("\n🎯 Capacidades implementadas:")
+    print("   ✓ Clasificación automática con Zero-Shot Learning")
+    print("   ✓ Análisis de sentimientos multilingüe")
+    print("   ✓ Determinación inteligente de urgencia")
+    print("   ✓ Resúmenes automáticos por categoría")
+    print("   ✓ Sistema de priorización (0-100)")
+    print("   ✓ Detección de sesgos éticos")
+    print("   ✓ Medidas de privacidad")
+
+    print("\n📁 Archivos generados:")
+    print(f"   1. {args.salida}")
+    print("   2. casos_prioritarios.csv")
+    print("   3. reporte_analisis_ia.txt")
+
+    print("\n💡 Sugerencia para el reto:")
+    print("   Este análisis cumple con el 40% de 'Uso correcto de técnicas de IA'")
+    print("   Ahora puedes crear la aplicación web para visualizar estos resultados")
+    print("   y completar los requisitos de innovación y presentación.")
+
+
+if __name__ == '__main__':
+    main()
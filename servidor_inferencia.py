@@ -0,0 +1,295 @@
+"""
+Servicio local de inferencia compartido por los workers web
+Carga una sola vez el clasificador, el analizador de sentimientos y el modelo
+de resumen, y atiende llamadas por lotes en HTTP local (JSON)
+
+Uso:
+    python servidor_inferencia.py --puerto 8765
+
+Rutas:
+    GET  /salud        estado y modelos cargados
+    GET  /metricas     histogramas de tamaño de lote y profundidad de cola, carga de modelos
+    POST /clasificar   {"textos": [...], "etiquetas": [...], "plantilla": "..."}
+    POST /sentimiento  {"textos": [...]}
+    POST /resumir      {"textos": [...], "max_length": 150, "min_length": 50}
+"""
+
+import argparse
+import json
+import os
+import threading
+from concurrent.futures import TimeoutError as TimeoutFuturo
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from agrupador_lotes import AgrupadorLotes
+from inferencia_ia import (clasificar_comentarios_lote, analizar_sentimientos_columna,
+                           CATEGORIAS_PROBLEMA, PLANTILLA_HIPOTESIS, TAMANO_LOTE)
+
+HOST_INFERENCIA = os.environ.get('HOST_INFERENCIA', '127.0.0.1')
+PUERTO_INFERENCIA = int(os.environ.get('PUERTO_INFERENCIA', 8765))
+
+# Máximo de textos por petición
+MAX_TEXTOS_PETICION = int(os.environ.get('MAX_TEXTOS_PETICION', 512))
+
+# Agrupador dinámico: textos por pasada del modelo y espera máxima para completar un lote
+LOTE_MAXIMO = int(os.environ.get('LOTE_MAXIMO_AGRUPADOR', TAMANO_LOTE))
+ESPERA_MAXIMA_MS = float(os.environ.get('ESPERA_MAXIMA_MS', 10))
+# Tiempo máximo que una petición espera sus resultados
+TIMEOUT_PETICION = float(os.environ.get('TIMEOUT_PETICION', 60))
+
+
+class ErrorPeticion(Exception):
+    """Petición inválida (400), modelo no disponible (503) o sin respuesta a tiempo (504)"""
+
+    def __init__(self, mensaje, estado=400):
+        super().__init__(mensaje)
+        self.estado = estado
+
+
+class ServicioInferencia:
+    """
+    Modelos cargados una vez y llamadas por lotes sobre ellos
+
+    Los textos de peticiones simultáneas se juntan en un ``AgrupadorLotes``
+    por operación (y por conjunto de etiquetas en la clasificación). Cada
+    modelo se protege con su propio lock: los pipelines no son seguros entre
+    hilos, pero modelos distintos pueden trabajar a la vez.
+    """
+
+    def __init__(self, modelos, tamano_lote=TAMANO_LOTE, cache=None, lote_maximo=LOTE_MAXIMO,
+                 espera_maxima_ms=ESPERA_MAXIMA_MS, timeout=TIMEOUT_PETICION):
+        self.modelos = modelos
+        self.tamano_lote = tamano_lote
+        self.cache = cache
+        self.lote_maximo = lote_maximo
+        self.espera_maxima = espera_maxima_ms / 1000
+        self.timeout = timeout
+        self.locks = {nombre: threading.Lock() for nombre in modelos}
+        self.agrupadores = {}
+        self._lock_agrupadores = threading.Lock()
+
+    def _agrupador(self, nombre, funcion):
+        with self._lock_agrupadores:
+            if nombre not in self.agrupadores:
+                self.agrupadores[nombre] = AgrupadorLotes(funcion, self.lote_maximo, self.espera_maxima,
+                                                          nombre=f'agrupador-{nombre}')
+            return self.agrupadores[nombre]
+
+    def _procesar(self, agrupador, textos):
+        try:
+            return agrupador.procesar(textos, timeout=self.timeout)
+        except TimeoutFuturo:
+            raise ErrorPeticion(f"Sin respuesta del modelo en {self.timeout} s", estado=504)
+
+    def _modelo(self, nombre):
+        if self.modelos.get(nombre) is None:
+            raise ErrorPeticion(f"Modelo '{nombre}' no disponible", estado=503)
+        return self.modelos[nombre]
+
+    def estado(self):
+        """
+        Modelos cargados en el servicio
+        """
+        return {'estado': 'ok', 'modelos': {nombre: modelo is not None for nombre, modelo in self.modelos.items()}}
+
+    def metricas(self):
+        """
+        Métricas de cada agrupador de lotes y de carga de los modelos
+        """
+        with self._lock_agrupadores:
+            agrupadores = dict(self.agrupadores)
+        metricas = {nombre: agrupador.metricas() for nombre, agrupador in agrupadores.items()}
+        if hasattr(self.modelos, 'metricas'):
+            metricas['modelos'] = self.modelos.metricas()
+        return metricas
+
+    def _clasificar_lote(self, textos, etiquetas, plantilla):
+        with self.locks['clasificador']:
+            resultado = clasificar_comentarios_lote(
+                self.modelos['clasificador'], textos,
+                etiquetas=list(etiquetas),
+                plantilla=plantilla,
+                tamano_lote=self.tamano_lote,
+                cache=self.cache,
+                informar=False
+            )
+        return [{'categoria': c, 'confianza': float(p)}
+                for c, p in zip(resultado['Categoria_IA'], resultado['Confianza_IA'])]
+
+    def _sentimiento_lote(self, textos):
+        with self.locks['sentiment_analyzer']:
+            resultado = analizar_sentimientos_columna(self.modelos['sentiment_analyzer'], textos,
+                                                      tamano_lote=self.tamano_lote, cache=self.cache,
+                                                      informar=False)
+        return [{'sentimiento': s, 'estrellas': int(e)}
+                for s, e in zip(resultado['Sentimiento'], resultado['Estrellas'])]
+
+    def _resumir_lote(self, textos, max_length, min_length):
+        with self.locks['summarizer']:
+            # El tokenizador recorta al límite de tokens del modelo (no por caracteres)
+            salidas = self.modelos['summarizer'](list(textos), max_length=max_length, min_length=min_length,
+                                                 do_sample=False, truncation=True)
+        return [s['summary_text'] for s in salidas]
+
+    def clasificar(self, textos, etiquetas=None, plantilla=None):
+        """
+        [{'categoria', 'confianza'}, ...] de cada texto
+        """
+        self._modelo('clasificador')
+        etiquetas = tuple(etiquetas or CATEGORIAS_PROBLEMA)
+        plantilla = plantilla or PLANTILLA_HIPOTESIS
+        agrupador = self._agrupador(f"clasificar[{','.join(etiquetas)}|{plantilla}]",
+                                    lambda lote: self._clasificar_lote(lote, etiquetas, plantilla))
+        return self._procesar(agrupador, textos)
+
+    def sentimiento(self, textos):
+        """
+        [{'sentimiento', 'estrellas'}, ...] de cada texto
+        """
+        self._modelo('sentiment_analyzer')
+        return self._procesar(self._agrupador('sentimiento', self._sentimiento_lote), textos)
+
+    def resumir(self, textos, max_length=150, min_length=50):
+        """
+        Resumen de cada texto
+        """
+        self._modelo('summarizer')
+        agrupador = self._agrupador(f"resumir[{max_length},{min_length}]",
+                                    lambda lote: self._resumir_lote(lote, max_length, min_length))
+        return self._procesar(agrupador, textos)
+
+
+def _leer_textos(cuerpo):
+    textos = cuerpo.get('textos')
+    if not isinstance(textos, list) or not all(isinstance(t, str) for t in textos):
+        raise ErrorPeticion("'textos' debe ser una lista de cadenas")
+    if len(textos) > MAX_TEXTOS_PETICION:
+        raise ErrorPeticion(f"Máximo {MAX_TEXTOS_PETICION} textos por petición")
+    return textos
+
+
+def crear_manejador(servicio):
+    """
+    Clase de manejador HTTP ligada a un ``ServicioInferencia``
+    """
+
+    class ManejadorInferencia(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def _responder(self, estado, cuerpo):
+            datos = json.dumps(cuerpo, ensure_ascii=False).encode('utf-8')
+            self.send_response(estado)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(datos)))
+            self.end_headers()
+            self.wfile.write(datos)
+
+        def do_GET(self):
+            if self.path == '/salud':
+                self._responder(200, servicio.estado())
+            elif self.path == '/metricas':
+                self._responder(200, servicio.metricas())
+            else:
+                self._responder(404, {'error': 'Ruta no encontrada'})
+
+        def do_POST(self):
+            try:
+                longitud = int(self.headers.get('Content-Length', 0))
+                cuerpo = json.loads(self.rfile.read(longitud) or b'{}')
+                if not isinstance(cuerpo, dict):
+                    raise ErrorPeticion("El cuerpo debe ser un objeto JSON")
+
+                if self.path == '/clasificar':
+                    resultados = servicio.clasificar(_leer_textos(cuerpo), cuerpo.get('etiquetas'),
+                                                     cuerpo.get('plantilla'))
+                elif self.path == '/sentimiento':
+                    resultados = servicio.sentimiento(_leer_textos(cuerpo))
+                elif self.path == '/resumir':
+                    resultados = servicio.resumir(_leer_textos(cuerpo), int(cuerpo.get('max_length', 150)),
+                                                  int(cuerpo.get('min_length', 50)))
+                else:
+                    self._responder(404, {'error': 'Ruta no encontrada'})
+                    return
+                self._responder(200, {'resultados': resultados})
+            except ErrorPeticion as e:
+                self._responder(e.estado, {'error': str(e)})
+            except ValueError as e:
+                self._responder(400, {'error': f"JSON inválido: {e}"})
+            except Exception as e:
+                print(f"❌ Error en {self.path}: {e}")
+                self._responder(500, {'error': str(e)})
+
+        def log_message(self, formato, *args):
+            pass  # Sin una línea de log por petición
+
+    return ManejadorInferencia
+
+
+def crear_servidor(servicio, host=HOST_INFERENCIA, puerto=PUERTO_INFERENCIA):
+    """
+    Servidor HTTP con un hilo por conexión
+    """
+    servidor = ThreadingHTTPServer((host, puerto), crear_manejador(servicio))
+    servidor.daemon_threads = True
+    return servidor
+
+
+def cargar_modelos_servicio(backend='pytorch'):
+    """
+    Registro con los tres modelos (se cargan al primer uso o con ``calentar``)
+    """
+    from modelos_ia import cargar_pipeline, resolver_modelo
+    from registro_modelos import RegistroModelos
+
+    def fabrica(tarea):
+        if backend == 'onnx' and tarea != 'summarization':
+            from backend_onnx import cargar_pipeline_onnx
+            return lambda: cargar_pipeline_onnx(tarea)
+        return lambda: cargar_pipeline(tarea)
+
+    modelos = RegistroModelos()
+    for nombre, tarea in [('clasificador', 'zero-shot-classification'),
+                          ('sentiment_analyzer', 'sentiment-analysis'),
+                          ('summarizer', 'summarization')]:
+        modelos.registrar(nombre, fabrica(tarea), tarea, f"{tarea} ({resolver_modelo(tarea)})")
+    return modelos
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servicio local de inferencia")
+    parser.add_argument('--host', default=HOST_INFERENCIA)
+    parser.add_argument('--puerto', type=int, default=PUERTO_INFERENCIA)
+    parser.add_argument('--backend', choices=['pytorch', 'onnx'],
+                        default=os.environ.get('BACKEND_INFERENCIA', 'pytorch').lower())
+    parser.add_argument('--tamano-lote', type=int, default=TAMANO_LOTE)
+    parser.add_argument('--lote-maximo', type=int, default=LOTE_MAXIMO,
+                        help="Máximo de textos que el agrupador junta por pasada del modelo")
+    parser.add_argument('--espera-maxima-ms', type=float, default=ESPERA_MAXIMA_MS,
+                        help="Espera máxima para completar un lote")
+    parser.add_argument('--sin-cache', action='store_true', help="No usar la caché de inferencia en disco")
+    args = parser.parse_args()
+
+    print("📥 Cargando modelos del servicio de inferencia...")
+    modelos = cargar_modelos_servicio(args.backend)
+    # Carga y primera inferencia antes de aceptar peticiones
+    modelos.calentar()
+
+    cache = None
+    if not args.sin_cache:
+        from cache_inferencia import CacheInferencia
+        cache = CacheInferencia()
+
+    servidor = crear_servidor(ServicioInferencia(modelos, args.tamano_lote, cache,
+                                                  args.lote_maximo, args.espera_maxima_ms), args.host, args.puerto)
+    print(f"🚀 Servicio de inferencia en http://{args.host}:{args.puerto}")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+        modelos.cerrar()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+🧩 Conteo de palabras clave por fragmentos (shards) en varios procesos
+Divide una columna de texto en bloques de filas, cuenta coincidencias en un
+pool de procesos y combina los conteos parciales
+"""
+
+import atexit
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+# Por debajo de este número de filas no compensa arrancar procesos
+DEFAULT_MIN_ROWS = 100000
+
+_pool = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def _count_in_values(values, patterns):
+    """Contar, para cada patrón, las filas que lo contienen (sin distinguir mayúsculas)"""
+    lowered = pd.Series(values, dtype=object).astype(str).str.lower()
+    return {name: int(lowered.str.contains(pattern, na=False).sum()) for name, pattern in patterns.items()}
+
+
+def _get_pool(workers):
+    """Pool de procesos compartido, creado bajo demanda"""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            # 'spawn' evita heredar locks de los hilos del análisis al hacer fork
+            _pool = ProcessPoolExecutor(max_workers=workers,
+                                        mp_context=multiprocessing.get_context('spawn'))
+            _pool_workers = workers
+        return _pool
+
+
+def shutdown_pool():
+    """Cerrar el pool de procesos si está activo"""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True)
+            _pool = None
+            _pool_workers = 0
+
+
+atexit.register(shutdown_pool)
+
+
+def count_pattern_matches(series, patterns, min_rows=DEFAULT_MIN_ROWS, workers=None):
+    """Contar cuántas filas de la serie contienen cada patrón (expresión regular)
+
+    ``patterns`` es un diccionario ``{nombre: patrón}``. Si la serie tiene al
+    menos ``min_rows`` filas y hay más de un proceso disponible, las filas se
+    reparten en fragmentos que se procesan en un pool de procesos; en otro caso
+    se usa el camino de un solo proceso. El resultado es ``{nombre: conteo}``.
+    """
+    workers = workers or os.cpu_count() or 1
+    n_rows = len(series)
+
+    if workers <= 1 or n_rows < max(min_rows, 2):
+        return _count_in_values(series.to_numpy(dtype=object), patterns)
+
+    values = series.to_numpy(dtype=object)
+    n_shards = min(workers * 2, n_rows)
+    bounds = [n_rows * i // n_shards for i in range(n_shards + 1)]
+    pool = _get_pool(workers)
+    futures = [
+        pool.submit(_count_in_values, values[start:end], patterns)
+        for start, end in zip(bounds[:-1], bounds[1:])
+    ]
+
+    totals = dict.fromkeys(patterns, 0)
+    for future in futures:
+        for name, count in future.result().items():
+            totals[name] += count
+    return totals
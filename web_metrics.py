@@ -0,0 +1,99 @@
+"""
+📈 Métricas de la aplicación web en formato de texto de Prometheus
+Contadores, gauges e histogramas con etiquetas, seguros entre hilos, que se
+exponen en ``/metrics``
+"""
+
+import threading
+
+from histograma import Histograma
+
+# Límites de los histogramas (el último cubo es +Inf)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+STAGE_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+ROW_BUCKETS = (100, 1000, 10000, 100000, 1000000, 10000000)
+MEMORY_BUCKETS = (1048576, 8388608, 33554432, 134217728, 536870912, 2147483648, 8589934592)
+
+
+def _labels_key(labels):
+    return tuple(sorted((labels or {}).items()))
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+class MetricsRegistry:
+    """Registro de métricas con nombre, tipo y ayuda
+
+    Cada métrica se declara una vez (``counter``, ``gauge`` o ``histogram``)
+    y luego se actualiza con etiquetas: ``inc``, ``set`` y ``observe``.
+    """
+
+    def __init__(self):
+        self._definitions = {}
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _define(self, name, kind, help_text, buckets=None):
+        self._definitions[name] = (kind, help_text, buckets)
+        self._values.setdefault(name, {})
+
+    def counter(self, name, help_text):
+        self._define(name, 'counter', help_text)
+
+    def gauge(self, name, help_text):
+        self._define(name, 'gauge', help_text)
+
+    def histogram(self, name, help_text, buckets=LATENCY_BUCKETS):
+        self._define(name, 'histogram', help_text, buckets)
+
+    def inc(self, name, labels=None, value=1):
+        """Incrementar un contador"""
+        key = _labels_key(labels)
+        with self._lock:
+            self._values[name][key] = self._values[name].get(key, 0) + value
+
+    def set(self, name, value, labels=None):
+        """Fijar el valor de un gauge"""
+        with self._lock:
+            self._values[name][_labels_key(labels)] = value
+
+    def observe(self, name, value, labels=None):
+        """Registrar una observación en un histograma"""
+        key = _labels_key(labels)
+        with self._lock:
+            histogram = self._values[name].get(key)
+            if histogram is None:
+                histogram = self._values[name][key] = Histograma(self._definitions[name][2])
+        histogram.observar(value)
+
+    def value(self, name, labels=None):
+        """Valor actual de un contador o gauge (0 si no existe)"""
+        with self._lock:
+            return self._values[name].get(_labels_key(labels), 0)
+
+    def render(self):
+        """Todas las métricas en formato de exposición de texto de Prometheus"""
+        with self._lock:
+            snapshot = {name: dict(series) for name, series in self._values.items()}
+
+        lines = []
+        for name, (kind, help_text, _) in self._definitions.items():
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            for labels, value in sorted(snapshot[name].items()):
+                if kind != 'histogram':
+                    lines.append(f'{name}{_format_labels(labels)} {value}')
+                    continue
+                summary = value.resumen()
+                for bound, count in summary['cubos'].items():
+                    lines.append(f'{name}_bucket{_format_labels(labels, [("le", bound)])} {count}')
+                lines.append(f'{name}_sum{_format_labels(labels)} {summary["suma"]}')
+                lines.append(f'{name}_count{_format_labels(labels)} {summary["total"]}')
+        return '\n'.join(lines) + '\n'